@@ -0,0 +1,102 @@
+import argparse
+import random
+import time
+import pandas as pd
+import phonenumbers
+from nameparser import HumanName
+from src import data_cleansing
+
+FIRST_NAMES = ["john", "Jane", "MICHAEL", "sarah", "David", "laura", "James", "emily", "Robert", "linda", "Mary", "Ann"]
+LAST_NAMES = ["smith", "Johnson", "WILLIAMS", "brown", "Jones", "garcia", "Miller", "davis", "O'Neil", "Van Dyke"]
+TITLES = ["Dr.", "Mr", "Mrs.", "Ms"]
+SUFFIXES = ["Jr.", "III", "MD", "PhD"]
+PHONE_FORMATS = ["({a}) {e}-{n}", "{a}-{e}-{n}", "{a}{e}{n}", "+1 {a} {e} {n}", "1-{a}-{e}-{n}", "{a}.{e}.{n}",
+                 "{e}-{n}", "{a}-{e}-{n} x{x}", "+44 20 7946 {n}", "N/A", ""]
+
+def generate_raw_values(n_rows, distinct_ratio=0.3, seed=7):
+    rng = random.Random(seed)
+    n_distinct = max(1, int(n_rows * distinct_ratio))
+    names, phones = [], []
+    for _ in range(n_distinct):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        roll = rng.random()
+        if roll < 0.1:
+            name = f"{rng.choice(TITLES)} {name}"
+        elif roll < 0.2:
+            name = f"{name} {rng.choice(SUFFIXES)}"
+        elif roll < 0.25:
+            name = f"{name.split(' ')[1]}, {name.split(' ')[0]}"
+        names.append(name)
+        phones.append(rng.choice(PHONE_FORMATS).format(
+            a=rng.randrange(100, 1000), e=rng.randrange(100, 1000), n=rng.randrange(1000, 10000), x=rng.randrange(1, 999)))
+    names.append(None)
+    phones.append(None)
+    return (pd.Series([rng.choice(names) for _ in range(n_rows)]),
+            pd.Series([rng.choice(phones) for _ in range(n_rows)]))
+
+def legacy_standardize_names(name_series):
+    parsed_names = []
+    for name_str in name_series.fillna(""):
+        if isinstance(name_str, str) and name_str.strip():
+            try:
+                name = HumanName(name_str)
+                parsed_names.append({
+                    'first_name': name.first.title() if name.first else None,
+                    'last_name': name.last.title() if name.last else None,
+                    'full_name_standardized': str(name).title() if str(name).strip() else None
+                })
+            except Exception:
+                parsed_names.append({'first_name': None, 'last_name': None, 'full_name_standardized': None})
+        else:
+            parsed_names.append({'first_name': None, 'last_name': None, 'full_name_standardized': None})
+    return pd.DataFrame(parsed_names, index=name_series.index)
+
+def legacy_standardize_phone(phone_series, region="US"):
+    standardized_phones = []
+    for p_num_str in phone_series.fillna(""):
+        if isinstance(p_num_str, str) and p_num_str.strip():
+            try:
+                parsed_num = phonenumbers.parse(p_num_str, region)
+                if phonenumbers.is_valid_number(parsed_num):
+                    standardized_phones.append(phonenumbers.format_number(parsed_num, phonenumbers.PhoneNumberFormat.E164))
+                else:
+                    standardized_phones.append(None)
+            except phonenumbers.NumberParseException:
+                standardized_phones.append(None)
+        else:
+            standardized_phones.append(None)
+    return pd.Series(standardized_phones, index=phone_series.index)
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run(sizes, n_jobs):
+    for n in sizes:
+        names, phones = generate_raw_values(n)
+        data_cleansing._parse_name.cache_clear()
+        data_cleansing._parse_phone.cache_clear()
+        data_cleansing._is_valid_nanp_number.cache_clear()
+
+        legacy_names, legacy_name_secs = _timed(legacy_standardize_names, names)
+        legacy_phones, legacy_phone_secs = _timed(legacy_standardize_phone, phones)
+        new_names, name_secs = _timed(data_cleansing.standardize_names, names, n_jobs=n_jobs)
+        new_phones, phone_secs = _timed(data_cleansing.standardize_phone, phones, n_jobs=n_jobs)
+
+        pd.testing.assert_frame_equal(legacy_names, new_names)
+        pd.testing.assert_series_equal(legacy_phones, new_phones)
+
+        print(f"\n--- Cleansing benchmark: {n} rows (n_jobs={n_jobs}) ---")
+        print(f"Names:  legacy {n / legacy_name_secs:,.0f} rows/s, new {n / name_secs:,.0f} rows/s "
+              f"({legacy_name_secs / name_secs:.1f}x)")
+        print(f"Phones: legacy {n / legacy_phone_secs:,.0f} rows/s, new {n / phone_secs:,.0f} rows/s "
+              f"({legacy_phone_secs / phone_secs:.1f}x)")
+        print("Outputs match the legacy implementation.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark name and phone standardization.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+    run(args.sizes, args.n_jobs)
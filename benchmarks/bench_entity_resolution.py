@@ -0,0 +1,69 @@
+import argparse
+import random
+import string
+import time
+import pandas as pd
+from src import entity_resolution, config
+
+FIRST_NAMES = ["john", "jane", "michael", "sarah", "david", "laura", "james", "emily", "robert", "linda",
+               "william", "karen", "joseph", "nancy", "thomas", "lisa", "daniel", "betty", "matthew", "helen"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+              "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin"]
+DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "example.com", "outlook.com"]
+
+def _typo(word, rng):
+    if len(word) < 4:
+        return word
+    pos = rng.randrange(1, len(word) - 1)
+    choice = rng.random()
+    if choice < 0.4:
+        return word[:pos] + word[pos + 1:]
+    if choice < 0.7:
+        return word[:pos] + rng.choice(string.ascii_lowercase) + word[pos + 1:]
+    return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+
+def generate_sources(n_customers, duplicate_rate=0.1, seed=42):
+    rng = random.Random(seed)
+    crm_rows, ecom_rows = [], []
+    for i in range(n_customers):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        local = f"{first}.{last}{i}"
+        email = f"{local}@{rng.choice(DOMAINS)}"
+        phone = f"+1{rng.randrange(200, 999)}{rng.randrange(1000000, 9999999)}"
+        crm_rows.append({'email_address': email, 'first_name': first.title(), 'last_name': last.title(),
+                         'phone_standardized': phone})
+        ecom_rows.append({'cust_email': email, 'order_id': i})
+        if rng.random() < duplicate_rate:
+            noisy_local = f"{_typo(first, rng)}.{last}{i}"
+            ecom_rows.append({'cust_email': noisy_local + email[len(local):], 'order_id': i})
+    return pd.DataFrame(crm_rows), pd.DataFrame(ecom_rows), pd.DataFrame(columns=['user_email'])
+
+def run(sizes, duplicate_rate):
+    for n in sizes:
+        crm_df, ecom_df, web_df = generate_sources(n, duplicate_rate)
+
+        start = time.perf_counter()
+        exact = entity_resolution.create_master_customer_ids(crm_df, ecom_df, web_df)
+        exact_secs = time.perf_counter() - start
+
+        records = entity_resolution.build_resolution_records(crm_df, ecom_df, web_df)
+        start = time.perf_counter()
+        labels, stats = entity_resolution.resolve_entity_clusters(records, threshold=config.FUZZY_MATCH_THRESHOLD)
+        fuzzy_secs = time.perf_counter() - start
+
+        all_pairs = stats['records'] * (stats['records'] - 1) // 2
+        print(f"\n--- Entity resolution benchmark: {n} customers ---")
+        print(f"Emails: {stats['records']}, blocks: {stats['blocks']}")
+        print(f"Exact:  {exact['master_customer_id'].nunique()} ids in {exact_secs:.3f}s "
+              f"({stats['records'] / max(exact_secs, 1e-9):,.0f} emails/s)")
+        print(f"Fuzzy:  {len(set(labels))} ids in {fuzzy_secs:.3f}s "
+              f"({stats['records'] / max(fuzzy_secs, 1e-9):,.0f} emails/s)")
+        print(f"Pairs compared: {stats['pairs_compared']:,} of {all_pairs:,} all-pairs "
+              f"({stats['pairs_compared'] / max(all_pairs, 1):.6%})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark exact vs blocked fuzzy entity resolution.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    run(args.sizes, args.duplicate_rate)
@@ -0,0 +1,77 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from benchmarks import synthetic_data
+from src import config, scheduler, entity_resolution, customer_segmentation, memory_optimization
+from src.instrumentation import peak_rss_mb
+from src.scheduler import Stage
+import main
+
+REPORT_STAGES = ['load_crm', 'load_ecommerce', 'load_website', 'clean_crm', 'clean_ecommerce', 'clean_website',
+                 'integrate', 'enrich', 'segment']
+DATE_COLUMNS = ['signup_date', 'last_order_date']
+
+def benchmark_stages(memory_optimized):
+    # The pipeline's own stages minus profiling, with the ID registry and segment model kept out of state/.
+    stages = []
+    for stage in main.pipeline_stages('2025-06-01', memory_optimized):
+        if stage.name.startswith('profile_'):
+            continue
+        if stage.name == 'resolve_entities':
+            stage = Stage(stage.name, entity_resolution.create_master_customer_ids, stage.deps, {'registry_path': None})
+        elif stage.name == 'segment':
+            stage = Stage(stage.name, customer_segmentation.segment_customers, stage.deps)
+        stages.append(stage)
+    return stages
+
+def run_mode(data_dir, memory_optimized):
+    config.CRM_DATA_PATH = os.path.join(data_dir, 'crm_data.csv')
+    config.ECOMMERCE_DATA_PATH = os.path.join(data_dir, 'ecommerce_data.csv')
+    config.WEBSITE_LOGS_PATH = os.path.join(data_dir, 'website_logs.csv')
+    if memory_optimized:
+        memory_optimization.enable_copy_on_write()
+    baseline_mb = peak_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, metrics = scheduler.run_stages(benchmark_stages(memory_optimized), workers=1)
+    report = memory_optimization.memory_report({name: results[name] for name in REPORT_STAGES})
+    output = results['segment']
+    for col in DATE_COLUMNS:
+        output[col] = pd.to_datetime(output[col])
+    return report, baseline_mb, peak_rss_mb(), metrics['_pipeline']['wall_seconds'], output
+
+def _run_isolated(data_dir, memory_optimized):
+    # Each mode runs in a fresh interpreter so its peak RSS is not inherited from the other.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_mode, data_dir, memory_optimized).result()
+
+def run(sizes, data_root):
+    for n in sizes:
+        data_dir = os.path.join(data_root, str(n))
+        if not os.path.exists(os.path.join(data_dir, 'website_logs.csv')):
+            synthetic_data.generate_dataset(data_dir, n)
+        input_mb = sum(os.path.getsize(os.path.join(data_dir, name)) for name in
+                       ('crm_data.csv', 'ecommerce_data.csv', 'website_logs.csv')) / (1024 * 1024)
+        before, before_base, before_peak, before_secs, legacy = _run_isolated(data_dir, False)
+        after, after_base, after_peak, after_secs, optimized = _run_isolated(data_dir, True)
+
+        pd.testing.assert_frame_equal(legacy, optimized, check_dtype=False, check_categorical=False)
+        print(f"\n--- Memory benchmark: {n:,} rows per source ({input_mb:,.1f} MB of CSV input) ---")
+        with pd.option_context('display.width', 120):
+            print(memory_optimization.compare_reports(before, after).to_string(index=False))
+        for label, base, peak, secs in (("Default", before_base, before_peak, before_secs),
+                                        ("Memory-optimized", after_base, after_peak, after_secs)):
+            print(f"{label:<17} peak RSS {peak:,.1f} MB ({(peak - base) / input_mb:.1f}x input above the "
+                  f"{base:,.0f} MB interpreter baseline), {secs:.2f}s")
+        print("Outputs match the default mode.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare bytes per row and peak RSS with and without memory-optimized dtypes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"),
+                        help="Synthetic datasets are generated into <data-dir>/<rows> and reused.")
+    args = parser.parse_args()
+    run(args.sizes, args.data_dir)
@@ -0,0 +1,74 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from benchmarks import synthetic_data
+from benchmarks.bench_memory import benchmark_stages
+from src import config, customer_segmentation, data_enrichment, partitioned, scheduler
+from src.instrumentation import peak_rss_mb
+
+AS_OF = '2025-06-01'
+
+def use_dataset(data_dir):
+    config.CRM_DATA_PATH = os.path.join(data_dir, 'crm_data.csv')
+    config.ECOMMERCE_DATA_PATH = os.path.join(data_dir, 'ecommerce_data.csv')
+    config.WEBSITE_LOGS_PATH = os.path.join(data_dir, 'website_logs.csv')
+
+def run_single_process(memory_optimized):
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, _ = scheduler.run_stages(benchmark_stages(memory_optimized), workers=1)
+    return results['segment']
+
+def run_partitioned(memory_optimized, n_partitions, workers):
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()):
+        integrated = partitioned.build_customer_360_partitioned(memory_optimized, n_partitions, workers,
+                                                                os.path.join(work_dir, 'partitions'), registry_path=None,
+                                                                as_of=AS_OF)
+        enriched = data_enrichment.enrich_customer_data(integrated, as_of=AS_OF)
+        return customer_segmentation.segment_customers(enriched)
+
+def _timed(data_dir, func, *args):
+    # A spawned interpreter inherits the 'spawn' start method; the backend's own pool uses the platform default.
+    multiprocessing.set_start_method(multiprocessing.get_all_start_methods()[0], force=True)
+    use_dataset(data_dir)
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start, peak_rss_mb()
+
+def _run_isolated(data_dir, func, *args):
+    # Each run starts from a fresh interpreter so cleansing caches and peak RSS are not shared between runs.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_timed, data_dir, func, *args).result()
+
+def run(sizes, worker_counts, n_partitions, memory_optimized, data_root):
+    for n in sizes:
+        data_dir = os.path.join(data_root, str(n))
+        if not os.path.exists(os.path.join(data_dir, 'website_logs.csv')):
+            synthetic_data.generate_dataset(data_dir, n)
+        expected, single_secs, single_peak = _run_isolated(data_dir, run_single_process, memory_optimized)
+        print(f"\n--- Partitioned backend: {n:,} rows per source, {n_partitions} partitions "
+              f"({os.cpu_count()} CPUs) ---")
+        print(f"{'single process':<16} {single_secs:>8.2f}s            peak RSS {single_peak:,.1f} MB")
+        for workers in worker_counts:
+            output, secs, peak = _run_isolated(data_dir, run_partitioned, memory_optimized, n_partitions, workers)
+            pd.testing.assert_frame_equal(expected, output)
+            print(f"{workers:>3} workers      {secs:>8.2f}s   {single_secs / secs:>5.2f}x   "
+                  f"peak RSS {peak:,.1f} MB (coordinator)")
+        print("Outputs match the single-process pipeline.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the hash-partitioned process-pool backend with the "
+                                                 "single-process pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--partitions", type=int, default=config.PARTITION_COUNT)
+    parser.add_argument("--memory-optimized", action="store_true")
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"),
+                        help="Synthetic datasets are generated into <data-dir>/<rows> and reused.")
+    args = parser.parse_args()
+    run(args.sizes, args.workers, args.partitions, args.memory_optimized, args.data_dir)
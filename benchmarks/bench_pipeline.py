@@ -0,0 +1,122 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+import time
+from benchmarks import synthetic_data
+from src import config, data_ingestion, data_cleansing, entity_resolution
+from src import schema_mapping, data_enrichment, customer_segmentation, web_analytics
+from src.instrumentation import RssSampler
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "pipeline_history.json")
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=config.BASE_DIR, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _timed_stage(metrics, name, rows_in, func, *args, **kwargs):
+    start = time.perf_counter()
+    with RssSampler() as rss:
+        result = func(*args, **kwargs)
+    wall = time.perf_counter() - start
+    metrics[name] = {
+        'wall_seconds': round(wall, 4),
+        'rows_in': int(rows_in),
+        'rows_per_second': round(rows_in / wall, 1) if wall > 0 else None,
+        'peak_rss_delta_mb': rss.peak_delta_mb(),
+    }
+    return result
+
+def run_benchmark(data_dir):
+    config.CRM_DATA_PATH = os.path.join(data_dir, 'crm_data.csv')
+    config.ECOMMERCE_DATA_PATH = os.path.join(data_dir, 'ecommerce_data.csv')
+    config.WEBSITE_LOGS_PATH = os.path.join(data_dir, 'website_logs.csv')
+    metrics = {}
+
+    crm_df, ecommerce_df, website_df = _timed_stage(metrics, 'load_data', 0, data_ingestion.load_data)
+    metrics['load_data']['rows_in'] = total_rows = len(crm_df) + len(ecommerce_df) + len(website_df)
+    metrics['load_data']['rows_per_second'] = round(total_rows / max(metrics['load_data']['wall_seconds'], 1e-9), 1)
+
+    crm_clean = _timed_stage(metrics, 'clean_crm_data', len(crm_df), data_cleansing.clean_crm_data, crm_df)
+    ecommerce_clean = _timed_stage(metrics, 'clean_ecommerce_data', len(ecommerce_df),
+                                   data_cleansing.clean_ecommerce_data, ecommerce_df)
+    website_clean = _timed_stage(metrics, 'clean_website_data', len(website_df),
+                                 data_cleansing.clean_website_data, website_df)
+
+    with tempfile.TemporaryDirectory() as registry_dir:
+        master = _timed_stage(metrics, 'create_master_customer_ids', total_rows,
+                              entity_resolution.create_master_customer_ids, crm_clean, ecommerce_clean, website_clean,
+                              registry_path=os.path.join(registry_dir, 'registry.sqlite'))
+    integrated = _timed_stage(metrics, 'integrate_data', total_rows, schema_mapping.integrate_data,
+                              master, crm_clean, ecommerce_clean, website_clean)
+    web_features = _timed_stage(metrics, 'sessionize_web_logs', len(website_clean),
+                                web_analytics.sessionize_web_logs, website_clean)
+    integrated = web_analytics.add_web_features(integrated, web_features)
+    enriched = _timed_stage(metrics, 'enrich_customer_data', len(integrated),
+                            data_enrichment.enrich_customer_data, integrated)
+    _timed_stage(metrics, 'segment_customers', len(enriched), customer_segmentation.segment_customers, enriched)
+    return metrics
+
+def load_history(history_path):
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return json.load(f)
+
+def find_regressions(history, entry, tolerance):
+    previous = [run for run in history if run['rows'] == entry['rows']]
+    if not previous:
+        return []
+    baseline = previous[-1]['stages']
+    regressions = []
+    for stage, stage_metrics in entry['stages'].items():
+        before = baseline.get(stage, {}).get('wall_seconds')
+        after = stage_metrics['wall_seconds']
+        if before and after > before * (1 + tolerance) and after - before > 0.05:
+            regressions.append((stage, before, after))
+    return regressions
+
+def print_report(entry, regressions):
+    print(f"\n--- Pipeline benchmark: {entry['rows']:,} rows per source ---")
+    for stage, m in entry['stages'].items():
+        rate = f"{m['rows_per_second']:>14,.0f} rows/s" if m['rows_per_second'] else " " * 21
+        peak = f"+{m['peak_rss_delta_mb']:,.1f} MB" if m['peak_rss_delta_mb'] is not None else "n/a"
+        print(f"{stage:<28} {m['wall_seconds']:>9.3f}s {rate}   peak RSS {peak}")
+    for stage, before, after in regressions:
+        print(f"REGRESSION: {stage} took {after:.3f}s vs {before:.3f}s in the previous run at this scale")
+    print("--- End Pipeline Benchmark ---")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on synthetic data.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per source (10k to 10M).")
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"),
+                        help="Synthetic datasets are generated into <data-dir>/<rows> and reused.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the history file.")
+    args = parser.parse_args()
+
+    data_dir = os.path.join(args.data_dir, str(args.rows))
+    if not os.path.exists(os.path.join(data_dir, 'website_logs.csv')):
+        synthetic_data.generate_dataset(data_dir, args.rows)
+
+    entry = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'rows': args.rows,
+        'stages': run_benchmark(data_dir),
+    }
+    history = load_history(args.history)
+    regressions = find_regressions(history, entry, args.tolerance)
+    print_report(entry, regressions)
+    if not args.no_record:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        history.append(entry)
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"Benchmark results appended to {args.history}")
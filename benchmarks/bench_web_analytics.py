@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks import synthetic_data
+from src import config, data_cleansing, streaming, web_analytics
+
+AS_OF = pd.Timestamp("2025-06-01")
+
+def legacy_web_features(website_df, as_of, window_days, gap_minutes=config.WEB_SESSION_GAP_MINUTES):
+    df = website_df.dropna(subset=['user_email']).copy()
+    df['visit_timestamp'] = pd.to_datetime(df['visit_timestamp'], errors='coerce')
+    df = df[df['visit_timestamp'].notna() & (df['visit_timestamp'] <= as_of)]
+    if window_days:
+        df = df[df['visit_timestamp'] > as_of - pd.Timedelta(days=window_days)]
+    rows = []
+    for email, events in df.groupby('user_email', sort=False):
+        events = events.sort_values('visit_timestamp')
+        gaps = events['visit_timestamp'].diff() > pd.Timedelta(minutes=gap_minutes)
+        page_counts = events['page_visited'].value_counts()
+        rows.append({
+            'email': email,
+            'web_events': len(events),
+            'web_sessions': 1 + int(gaps.sum()),
+            'web_active_days': events['visit_timestamp'].dt.normalize().nunique(),
+            'first_visit': events['visit_timestamp'].iloc[0],
+            'last_visit': events['visit_timestamp'].iloc[-1],
+            'top_page': min(page_counts[page_counts == page_counts.max()].index) if len(page_counts) else np.nan,
+            'top_page_share': page_counts.max() / len(events) if len(page_counts) else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+def _normalized(df):
+    df = df.sort_values('email', ignore_index=True)
+    return df.astype({'email': 'str', 'web_events': 'int64', 'web_sessions': 'int64', 'web_active_days': 'int64',
+                      'first_visit': 'datetime64[ns]', 'last_visit': 'datetime64[ns]', 'top_page': 'str',
+                      'top_page_share': 'float64'})
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run(sizes, window_days=None, legacy_max_rows=100_000):
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as data_dir, contextlib.redirect_stdout(io.StringIO()):
+            paths = synthetic_data.generate_dataset(data_dir, n)
+            website = data_cleansing.clean_website_data(pd.read_csv(paths['website']))
+            new, new_secs = _timed(web_analytics.sessionize_web_logs, website, AS_OF, window_days)
+            streamed, stream_secs = _timed(streaming.stream_web_features, paths['website'], AS_OF, window_days,
+                                           work_dir=os.path.join(data_dir, 'web_events'))
+            legacy, legacy_secs = None, None
+            if n <= legacy_max_rows:
+                legacy, legacy_secs = _timed(legacy_web_features, website, AS_OF, window_days)
+
+        print(f"\n--- Web analytics benchmark: {n} website events ({len(new)} visitors, "
+              f"window {window_days or 'all'} days) ---")
+        pd.testing.assert_frame_equal(_normalized(new), _normalized(streamed), check_exact=True)
+        if legacy is not None:
+            pd.testing.assert_frame_equal(_normalized(legacy), _normalized(new), check_exact=True)
+            print(f"Per-customer groupby: {legacy_secs:.3f}s, segmented: {new_secs:.3f}s "
+                  f"({legacy_secs / new_secs:.1f}x)")
+        else:
+            print(f"Segmented: {new_secs:.3f}s (per-customer groupby skipped above {legacy_max_rows} rows)")
+        print(f"Streaming spill + per-partition sessionization: {stream_secs:.3f}s")
+        print("Outputs match" + (" the per-customer implementation and" if legacy is not None else "")
+              + " across in-memory and streaming modes.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark segmented sessionization against a per-customer groupby.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--window-days", type=int, default=None)
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000,
+                        help="Skip the per-customer reference above this many rows (it is slow).")
+    args = parser.parse_args()
+    run(args.sizes, args.window_days, args.legacy_max_rows)
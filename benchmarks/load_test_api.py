@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote, urlsplit
+import numpy as np
+from src import config
+
+class HttpConnection:
+    # Minimal keep-alive HTTP/1.1 client so the load test needs nothing beyond the standard library.
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if payload:
+            headers += "Content-Type: application/json\r\n"
+        self.writer.write(headers.encode() + b"\r\n" + payload)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return int(status_line.split()[1]), data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+async def sample_keys(base, n):
+    conn = HttpConnection(*base)
+    _, data = await conn.request("GET", f"/customers?page_size={config.API_MAX_PAGE_SIZE}")
+    conn.close()
+    customers = json.loads(data)['customers']
+    rng = random.Random(7)
+    rng.shuffle(customers)
+    customers = customers[:n]
+    return [c['email'] for c in customers if c['email']], [c['master_customer_id'] for c in customers]
+
+def build_requests(emails, ids, n_requests, batch_size, seed=7):
+    rng = random.Random(seed)
+    kinds = ['email', 'id', 'batch', 'list']
+    requests = []
+    for _ in range(n_requests):
+        kind = rng.choice(kinds)
+        if kind == 'email':
+            requests.append((kind, "GET", f"/customers/email/{quote(rng.choice(emails))}", None))
+        elif kind == 'id':
+            requests.append((kind, "GET", f"/customers/id/{quote(rng.choice(ids))}", None))
+        elif kind == 'batch':
+            requests.append((kind, "POST", "/customers/batch", {'emails': rng.sample(emails, min(batch_size, len(emails)))}))
+        else:
+            requests.append((kind, "GET", f"/customers?is_vip=true&page={rng.randrange(5)}&page_size=50", None))
+    return requests
+
+async def run_load(base, requests, concurrency):
+    queue = asyncio.Queue()
+    for item in requests:
+        queue.put_nowait(item)
+    latencies = {}
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        conn = HttpConnection(*base)
+        while not queue.empty():
+            kind, method, path, body = queue.get_nowait()
+            start = time.perf_counter()
+            status, _ = await conn.request(method, path, body)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            errors += status >= 500
+        conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def print_report(latencies, errors, elapsed):
+    total = sum(len(v) for v in latencies.values())
+    print(f"\n--- Query API load test: {total} requests in {elapsed:.2f}s ({total / elapsed:,.0f} req/s) ---")
+    for kind, values in sorted(latencies.items()) + [('all', [x for v in latencies.values() for x in v])]:
+        ms = np.array(values) * 1000
+        print(f"{kind:<6} n={len(ms):<7} p50 {np.percentile(ms, 50):7.2f} ms   p99 {np.percentile(ms, 99):7.2f} ms   "
+              f"max {ms.max():7.2f} ms")
+    print(f"Server errors: {errors}")
+    print("--- End Load Test ---")
+
+async def main(url, n_requests, concurrency, batch_size):
+    parts = urlsplit(url)
+    base = (parts.hostname, parts.port or 80)
+    emails, ids = await sample_keys(base, 1000)
+    requests = build_requests(emails, ids, n_requests, batch_size)
+    print_report(*await run_load(base, requests, concurrency))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the local Customer 360 query API.")
+    parser.add_argument("--url", default=f"http://{config.API_HOST}:{config.API_PORT}")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.requests, args.concurrency, args.batch_size))
@@ -0,0 +1,187 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = np.array([
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+    "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Nancy", "Daniel", "Lisa", "Matthew", "Betty", "Anthony", "Margaret", "Mark", "Sandra",
+    "Donald", "Ashley", "Steven", "Kimberly", "Paul", "Emily", "Andrew", "Donna", "Joshua", "Michelle",
+], dtype=object)
+LAST_NAMES = np.array([
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+], dtype=object)
+TITLES = np.array(["Dr.", "Mr.", "Mrs.", "Ms."], dtype=object)
+SUFFIXES = np.array(["Jr.", "III", "MD", "PhD"], dtype=object)
+DOMAINS = np.array(["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "example.com", "example.org"], dtype=object)
+CITIES = np.array(["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio",
+                   "San Diego", "Dallas", "San Jose", "Austin", "Tulsa", "Omaha", "Atlanta", "NYC"], dtype=object)
+PRODUCTS = np.array(["Laptop", "Mouse", "Keyboard", "Monitor", "Headphones", "Webcam", "Printer", "Tablet",
+                     "Phone Case", "Charger"], dtype=object)
+PAGES = np.array(["/homepage", "/cart", "/checkout", "/products/laptop", "/products/monitor", "/search",
+                  "/account", "/support"], dtype=object)
+STREETS = np.array(["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St"], dtype=object)
+
+def _choice(rng, values, size):
+    return values[rng.integers(0, len(values), size)]
+
+def _str(values):
+    return pd.Series(values).astype(str).to_numpy(dtype=object)
+
+def build_customer_pool(n_customers, rng):
+    first = _choice(rng, FIRST_NAMES, n_customers)
+    last = _choice(rng, LAST_NAMES, n_customers)
+    separators = np.where(rng.random(n_customers) < 0.5, ".", "_")
+    ids = _str(np.arange(n_customers))
+    emails = (pd.Series(first).str.lower() + separators + pd.Series(last).str.lower() + ids + "@"
+              + _choice(rng, DOMAINS, n_customers)).to_numpy(dtype=object)
+    return pd.DataFrame({'first': first, 'last': last, 'email': emails})
+
+PLUS_TAG_DOMAINS = ("@gmail.com", "@hotmail.com", "@outlook.com")
+
+def provider_variants(emails, rng, variant_rate):
+    # Same mailbox, different spelling: "+tag" aliases, plus dropped dots for Gmail.
+    emails = pd.Series(emails, dtype=object)
+    chosen = (rng.random(len(emails)) < variant_rate) & emails.str.endswith(PLUS_TAG_DOMAINS, na=False)
+    tags = pd.Series(_choice(rng, np.array(["+news", "+shop", "+promo"], dtype=object), len(emails)), dtype=object)
+    local, domain = emails.str.split("@", n=1, expand=True)[0], emails.str.split("@", n=1, expand=True)[1]
+    dotless = chosen & (domain == "gmail.com") & (rng.random(len(emails)) < 0.5)
+    local = local.where(~dotless, local.str.replace(".", "", regex=False))
+    emails[chosen] = (local + tags.where(~dotless, "") + "@" + domain)[chosen]
+    return emails.to_numpy(dtype=object)
+
+def dirty_emails(emails, rng, dirty_rate, missing_rate=0.02, variant_rate=0.0):
+    if variant_rate:
+        emails = provider_variants(emails, rng, variant_rate)
+    emails = pd.Series(emails, dtype=object)
+    roll = rng.random(len(emails))
+    upper = roll < dirty_rate * 0.5
+    padded = (roll >= dirty_rate * 0.5) & (roll < dirty_rate * 0.8)
+    invalid = (roll >= dirty_rate * 0.8) & (roll < dirty_rate)
+    emails[upper] = emails[upper].str.upper()
+    emails[padded] = " " + emails[padded] + " "
+    emails[invalid] = emails[invalid].str.replace(r"\.[a-z]+$", "", regex=True)
+    emails[rng.random(len(emails)) < missing_rate] = None
+    return emails.to_numpy(dtype=object)
+
+def noisy_names(first, last, rng, noise_rate):
+    names = pd.Series(first, dtype=object) + " " + pd.Series(last, dtype=object)
+    roll = rng.random(len(names))
+    upper = roll < noise_rate * 0.3
+    titled = (roll >= noise_rate * 0.3) & (roll < noise_rate * 0.6)
+    suffixed = (roll >= noise_rate * 0.6) & (roll < noise_rate * 0.8)
+    reversed_ = (roll >= noise_rate * 0.8) & (roll < noise_rate)
+    names[upper] = names[upper].str.upper()
+    names[titled] = pd.Series(_choice(rng, TITLES, len(names)), dtype=object)[titled] + " " + names[titled]
+    names[suffixed] = names[suffixed] + " " + pd.Series(_choice(rng, SUFFIXES, len(names)), dtype=object)[suffixed]
+    names[reversed_] = (pd.Series(last, dtype=object)[reversed_] + ", " + pd.Series(first, dtype=object)[reversed_])
+    return names.to_numpy(dtype=object)
+
+def noisy_phones(n, rng, noise_rate):
+    area = _str(rng.integers(201, 990, n))
+    exchange = _str(rng.integers(200, 999, n))
+    line = pd.Series(rng.integers(0, 10000, n)).astype(str).str.zfill(4).to_numpy(dtype=object)
+    formats = [
+        lambda: "(" + area + ") " + exchange + "-" + line,
+        lambda: area + "-" + exchange + "-" + line,
+        lambda: area + exchange + line,
+        lambda: "+1 " + area + " " + exchange + " " + line,
+    ]
+    format_idx = rng.integers(0, len(formats), n)
+    phones = np.empty(n, dtype=object)
+    for i, make in enumerate(formats):
+        mask = format_idx == i
+        phones[mask] = make()[mask]
+    roll = rng.random(n)
+    phones[roll < noise_rate * 0.5] = "N/A"
+    short = (roll >= noise_rate * 0.5) & (roll < noise_rate)
+    phones[short] = (exchange + "-" + line)[short]
+    return phones
+
+def random_dates(n, rng, start, days, with_time=False):
+    base = np.datetime64(start, 's')
+    seconds = rng.integers(0, days * 86400, n) if with_time else rng.integers(0, days, n) * 86400
+    stamps = pd.Series(base + seconds.astype('timedelta64[s]'))
+    return stamps.dt.strftime("%Y-%m-%d %H:%M:%S" if with_time else "%Y-%m-%d").to_numpy(dtype=object)
+
+def generate_crm(pool, start_id, n_rows, rng, duplicate_rate, dirty_rate, noise_rate):
+    n_unique = min(len(pool), max(1, int(n_rows * (1 - duplicate_rate))))
+    picks = np.concatenate([np.arange(n_unique), rng.integers(0, n_unique, n_rows - n_unique)])
+    rows = pool.iloc[picks].reset_index(drop=True)
+    return pd.DataFrame({
+        'customer_id': np.arange(start_id, start_id + n_rows),
+        'full_name': noisy_names(rows['first'].to_numpy(), rows['last'].to_numpy(), rng, noise_rate),
+        'email_address': dirty_emails(rows['email'].to_numpy(), rng, dirty_rate),
+        'phone': noisy_phones(n_rows, rng, noise_rate),
+        'city': _choice(rng, CITIES, n_rows),
+        'signup_date': random_dates(n_rows, rng, '2022-01-01', 1200),
+    })
+
+def generate_ecommerce_chunk(pool, start_id, n_rows, rng, dirty_rate):
+    customers = rng.integers(0, len(pool), n_rows)
+    return pd.DataFrame({
+        'order_id': np.arange(start_id, start_id + n_rows),
+        'cust_email': dirty_emails(pool['email'].to_numpy()[customers], rng, dirty_rate),
+        'product_name': _choice(rng, PRODUCTS, n_rows),
+        'order_date': random_dates(n_rows, rng, '2023-01-01', 870),
+        'order_value': np.round(rng.gamma(2.0, 120.0, n_rows), 2),
+        'shipping_address': _str(rng.integers(1, 9999, n_rows)) + " " + _choice(rng, STREETS, n_rows),
+    })
+
+def generate_website_chunk(pool, start_id, n_rows, rng, dirty_rate, events_per_session=3):
+    n_sessions = max(1, n_rows // events_per_session)
+    session_ids = rng.integers(0, n_sessions, n_rows) + start_id
+    session_customer = rng.integers(0, len(pool), n_sessions)
+    customers = session_customer[session_ids - start_id]
+    return pd.DataFrame({
+        'session_id': "S" + pd.Series(session_ids).astype(str),
+        'user_email': dirty_emails(pool['email'].to_numpy()[customers], rng, dirty_rate),
+        'page_visited': _choice(rng, PAGES, n_rows),
+        'visit_timestamp': random_dates(n_rows, rng, '2023-01-01', 870, with_time=True),
+        'time_spent_seconds': rng.integers(5, 900, n_rows),
+    })
+
+def _write_chunks(path, make_chunk, n_rows, chunk_size):
+    written = 0
+    for start in range(0, n_rows, chunk_size):
+        size = min(chunk_size, n_rows - start)
+        make_chunk(start, size).to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        written += size
+    return written
+
+def generate_dataset(output_dir, n_rows, customer_ratio=0.8, duplicate_rate=0.05, dirty_rate=0.1,
+                     noise_rate=0.15, chunk_size=1_000_000, seed=42):
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    pool = build_customer_pool(max(1, int(n_rows * customer_ratio)), rng)
+    paths = {
+        'crm': os.path.join(output_dir, 'crm_data.csv'),
+        'ecommerce': os.path.join(output_dir, 'ecommerce_data.csv'),
+        'website': os.path.join(output_dir, 'website_logs.csv'),
+    }
+    crm_rows = min(n_rows, len(pool))
+    _write_chunks(paths['crm'], lambda start, size: generate_crm(
+        pool.iloc[start:start + size], 1 + start, size, rng, duplicate_rate, dirty_rate, noise_rate), crm_rows, chunk_size)
+    _write_chunks(paths['ecommerce'], lambda start, size: generate_ecommerce_chunk(
+        pool, 100 + start, size, rng, dirty_rate), n_rows, chunk_size)
+    _write_chunks(paths['website'], lambda start, size: generate_website_chunk(
+        pool, start, size, rng, dirty_rate), n_rows, chunk_size)
+    print(f"Generated {crm_rows} CRM rows and {n_rows} e-commerce/website rows in {output_dir}")
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic CRM, e-commerce and website sources.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per source (10k to 10M).")
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "data"))
+    parser.add_argument("--customer-ratio", type=float, default=0.8)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--dirty-rate", type=float, default=0.1)
+    parser.add_argument("--noise-rate", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate_dataset(os.path.join(args.output_dir, str(args.rows)), args.rows, args.customer_ratio,
+                     args.duplicate_rate, args.dirty_rate, args.noise_rate, seed=args.seed)
@@ -2,15 +2,40 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
-from src import config # Ensure this line is present and correct
+from src import config, utils, data_profiling
+from src.dashboard_backend import CustomerStore
 
 st.set_page_config(
     page_title="Customer 360 Dashboard",
     layout="wide"
 )
 
+def find_columnar_output(csv_path=config.OUTPUT_CSV_PATH):
+    # Prefer the typed Arrow/Parquet output unless the CSV was written more recently
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
+    for columnar_path in (config.OUTPUT_ARROW_PATH, config.OUTPUT_PARQUET_PATH):
+        if os.path.exists(columnar_path) and os.path.getmtime(columnar_path) >= csv_mtime:
+            return columnar_path
+    return None
+
+def output_mtimes():
+    paths = (config.OUTPUT_CSV_PATH, config.OUTPUT_ARROW_PATH, config.OUTPUT_PARQUET_PATH,
+             config.DASHBOARD_SUMMARY_PATH, config.DASHBOARD_EMAIL_INDEX_PATH, config.DASHBOARD_SEGMENT_INDEX_PATH)
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in paths)
+
 @st.cache_data
-def load_data(file_path=config.OUTPUT_CSV_PATH): # Using config for the path
+def load_data(file_path=config.OUTPUT_CSV_PATH, mtimes=None): # Using config for the path
+    columnar_path = find_columnar_output(file_path)
+    if columnar_path is not None:
+        try:
+            # Typed columnar output needs no string/numeric/boolean repair
+            df = utils.load_columnar(columnar_path)
+            if 'segment' in df.columns:
+                df['segment'] = df['segment'].fillna('Unknown')
+            return df
+        except Exception as e:
+            st.warning(f"Could not read '{columnar_path}' ({e}). Falling back to CSV.")
+
     if os.path.exists(file_path):
         try:
             df = pd.read_csv(file_path)
@@ -57,100 +82,110 @@ def load_data(file_path=config.OUTPUT_CSV_PATH): # Using config for the path
         st.warning(f"Data file '{file_path}' not found. Please run `main.py` first to generate it.")
         return pd.DataFrame()
 
-df_360 = load_data()
+@st.cache_resource
+def load_store(mtimes=None):
+    # Precomputed artifacts from main.py when they match the newest output; otherwise index the loaded table.
+    # mtimes only keys the caches, so a new pipeline run rebuilds the store.
+    store = CustomerStore.from_artifacts()
+    if store is not None:
+        return store
+    df = load_data(mtimes=mtimes)
+    return CustomerStore.from_dataframe(df) if not df.empty else None
+
+store = load_store(output_mtimes())
 
 st.title("Customer 360 Dashboard")
 st.markdown("AI-Driven Data Integration Quality for Multi-Source Analytics Overview")
 
-if not df_360.empty:
+if store is not None:
+    summary = store.summary
     st.header("Key Performance Indicators (KPIs)")
     col1, col2, col3, col4 = st.columns(4)
-    
-    total_customers = df_360['master_customer_id'].nunique() if 'master_customer_id' in df_360.columns else 0
-    total_spend = df_360['total_spend'].sum() if 'total_spend' in df_360.columns and df_360['total_spend'].notna().any() else 0.0
-    avg_orders = df_360['num_orders'].mean() if 'num_orders' in df_360.columns and df_360['num_orders'].notna().any() else 0.0
-    
-    col1.metric("Total Unique Customers", f"{total_customers:,}")
-    col2.metric("Total Revenue", f"${total_spend:,.2f}")
-    col3.metric("Avg. Orders per Customer", f"{avg_orders:.2f}")
-
-    if 'is_vip' in df_360.columns:
-        # Ensure 'is_vip' is boolean before sum, as sum on boolean treats True as 1, False as 0
-        vip_count = df_360['is_vip'].astype(bool).sum()
-        col4.metric("VIP Customers", f"{vip_count:,}")
+
+    col1.metric("Total Unique Customers", f"{summary['total_customers']:,}")
+    col2.metric("Total Revenue", f"${summary['total_revenue']:,.2f}")
+    col3.metric("Avg. Orders per Customer", f"{summary['avg_orders']:.2f}")
+    if summary.get('vip_count') is not None:
+        col4.metric("VIP Customers", f"{summary['vip_count']:,}")
     else:
         col4.metric("VIP Customers", "N/A")
 
     st.markdown("---")
 
-    if 'segment' in df_360.columns and df_360['segment'].nunique() > 0:
+    segment_stats = pd.DataFrame(summary.get('segments', []))
+    if not segment_stats.empty:
         st.header("Customer Segments Overview")
-        
-        segment_counts = df_360['segment'].value_counts().reset_index()
-        # Ensure consistent column naming after value_counts and reset_index
-        if 'index' in segment_counts.columns and 'segment' in segment_counts.columns and len(segment_counts.columns) == 2: # typical output
-            segment_counts.columns = ['Segment', 'Number of Customers']
-        elif len(segment_counts.columns) == 2: # Fallback if names are different but structure is same
-            segment_counts.columns = ['Segment', 'Number of Customers']
-        else: # If structure is unexpected, use a default
-            st.warning("Segment counts structure unexpected. Using default column names.")
-            segment_counts = pd.DataFrame({'Segment': [], 'Number of Customers': []})
-
-
-        if not segment_counts.empty:
-            fig_segment_dist = px.bar(segment_counts, 
-                                      x='Segment', 
-                                      y='Number of Customers', 
-                                      title="Customer Distribution by Segment",
-                                      color='Segment', # Plotly uses this for discrete colors
-                                      text_auto=True)
-            fig_segment_dist.update_layout(xaxis_title="Segment ID", yaxis_title="Number of Customers")
-            st.plotly_chart(fig_segment_dist, use_container_width=True)
-
-        if 'total_spend' in df_360.columns and df_360['total_spend'].notna().any():
-            segment_spend = df_360.groupby('segment')['total_spend'].mean().reset_index()
-            segment_spend.columns = ['Segment', 'Average Spend'] # Ensure consistent naming
-            if not segment_spend.empty:
-                fig_segment_spend = px.bar(segment_spend,
-                                           x='Segment',
-                                           y='Average Spend',
-                                           title="Average Spend by Segment",
-                                           color='Segment',
-                                           text_auto=True)
-                fig_segment_spend.update_layout(yaxis_tickprefix='$', yaxis_tickformat=',.2f')
-                st.plotly_chart(fig_segment_spend, use_container_width=True)
+
+        segment_counts = segment_stats.rename(columns={'segment': 'Segment', 'count': 'Number of Customers'})
+        fig_segment_dist = px.bar(segment_counts,
+                                  x='Segment',
+                                  y='Number of Customers',
+                                  title="Customer Distribution by Segment",
+                                  color='Segment', # Plotly uses this for discrete colors
+                                  text_auto=True)
+        fig_segment_dist.update_layout(xaxis_title="Segment ID", yaxis_title="Number of Customers")
+        st.plotly_chart(fig_segment_dist, use_container_width=True)
+
+        segment_spend = segment_stats.dropna(subset=['avg_spend']).rename(
+            columns={'segment': 'Segment', 'avg_spend': 'Average Spend'})
+        if not segment_spend.empty:
+            fig_segment_spend = px.bar(segment_spend.sort_values('Segment'),
+                                       x='Segment',
+                                       y='Average Spend',
+                                       title="Average Spend by Segment",
+                                       color='Segment',
+                                       text_auto=True)
+            fig_segment_spend.update_layout(yaxis_tickprefix='$', yaxis_tickformat=',.2f')
+            st.plotly_chart(fig_segment_spend, use_container_width=True)
     else:
         st.info("Segmentation data not available or not diverse enough for display.")
 
     st.markdown("---")
     st.header("Customer Data Explorer")
-    
-    display_df_main = df_360 # Default display
-    if 'segment' in df_360.columns and df_360['segment'].nunique() > 0:
-        unique_segments = ['All'] + sorted(df_360['segment'].unique().tolist())
+
+    selected_segment = 'All'
+    if not segment_stats.empty:
+        unique_segments = ['All'] + sorted(segment_stats['segment'].tolist())
         selected_segment = st.selectbox("Filter by Segment:", unique_segments)
-        if selected_segment != 'All':
-            display_df_main = df_360[df_360['segment'] == selected_segment]
-    
+    page_size = config.DASHBOARD_PAGE_SIZE
+    segment_filter = None if selected_segment == 'All' else selected_segment
+    _, total_rows = store.segment_page(segment_filter, 0, 0)
+    num_pages = max(1, -(-total_rows // page_size))
+    page = st.number_input(f"Page (of {num_pages:,}, {total_rows:,} rows)", min_value=1, max_value=num_pages, value=1)
+    display_df_main, _ = store.segment_page(segment_filter, page - 1, page_size)
     st.dataframe(display_df_main, use_container_width=True, height=400)
 
     st.subheader("Individual Customer Profile")
-    if 'email' in df_360.columns and df_360['email'].notna().any():
-        # Ensure email options are unique strings, handle potential NaNs from fillna('')
-        email_options = [""] + sorted(df_360['email'][df_360['email'] != ''].astype(str).dropna().unique().tolist())
-        selected_email = st.selectbox("Select Customer Email:", email_options)
+    # Prefix search over the sorted email index instead of listing every email
+    email_prefix = st.text_input("Search Customer Email (prefix):")
+    if email_prefix:
+        search_page = st.number_input("Results page:", min_value=1, value=1)
+        matches, total_matches = store.search_emails(email_prefix, search_page - 1, page_size)
+        st.caption(f"{total_matches:,} matching emails")
+        selected_email = st.selectbox("Select Customer Email:", [""] + matches)
         if selected_email: # Ensure selected_email is not an empty string
-            customer_profile = df_360[df_360['email'] == selected_email]
+            customer_profile = store.get_customer(selected_email)
             if not customer_profile.empty:
-                st.write(customer_profile.T) # Transpose for better vertical display
+                st.write(customer_profile.T.astype(str)) # Transpose for better vertical display
             else:
                 st.write("Customer not found.")
-    else:
-        st.write("Email column not available for customer lookup.")
+
+    source_profiles = data_profiling.load_profiles()
+    if source_profiles:
+        st.subheader("Source Data Quality")
+        # Profiles are written by main.py's profiling stage, so no source is rescanned here.
+        quality = pd.DataFrame([
+            {'Source': name, 'Rows': profile['rows'], 'Quantile Sample Rows': profile['profiled_rows'],
+             'Duplicate Rate': f"{profile['duplicate_rate']:.2%}", 'Profiled At': profile['generated_at']}
+            for name, profile in source_profiles.items()
+        ])
+        st.dataframe(quality, use_container_width=True, hide_index=True)
+        selected_source = st.selectbox("Column profile for source:", list(source_profiles))
+        st.dataframe(pd.DataFrame(source_profiles[selected_source]['columns']).T.astype(str), use_container_width=True)
 
     if st.checkbox("Show Raw Integrated Data (Sample)"):
         st.subheader("Raw Customer 360 Data (First 100 Rows)")
-        st.dataframe(df_360.head(100), use_container_width=True)
+        st.dataframe(store.segment_page(None, 0, 100)[0], use_container_width=True)
 else:
     st.error("No data to display. Ensure data pipeline has run and `customer_360_final.csv` exists.")
 
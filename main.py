@@ -1,39 +1,217 @@
+import argparse
+import os
 from src import data_ingestion, data_profiling, data_cleansing
 from src import entity_resolution, schema_mapping, data_enrichment
-from src import customer_segmentation, utils, config
+from src import customer_segmentation, utils, config, incremental, streaming, scheduler, dashboard_backend, stage_cache
+from src import instrumentation, memory_optimization, partitioned, web_analytics
+from src.scheduler import Stage
 import pandas as pd
 
-def main():
-    print("Starting Customer 360 AI-Driven Data Integration Quality Project...")
+def resolve_entities(crm_df_cleaned, ecommerce_df_cleaned, website_df_cleaned):
+    if config.ENTITY_RESOLUTION_MODE == "fuzzy":
+        return entity_resolution.create_fuzzy_master_customer_ids(
+            crm_df_cleaned, ecommerce_df_cleaned, website_df_cleaned
+        )
+    return entity_resolution.create_master_customer_ids(
+        crm_df_cleaned, ecommerce_df_cleaned, website_df_cleaned
+    )
+
+def segment_customers(customer_360_enriched):
+    if config.SEGMENTATION_MODE == "scalable":
+        return customer_segmentation.segment_customers_scalable(customer_360_enriched)
+    return customer_segmentation.segment_customers(customer_360_enriched)
 
-    crm_df, ecommerce_df, website_df = data_ingestion.load_data()
+# Config values each stage's output depends on; they are part of the stage cache key along with
+# the stage's inputs, kwargs and code version.
+PROFILE_PARAMS = ('PROFILE_SAMPLE_FRACTION', 'PROFILE_CHUNK_SIZE', 'PROFILE_HLL_PRECISION',
+                  'PROFILE_QUANTILE_SAMPLE_SIZE', 'PROFILE_DUPLICATE_SAMPLE_SIZE')
+RESOLUTION_PARAMS = ('ENTITY_RESOLUTION_MODE', 'FUZZY_MATCH_THRESHOLD', 'FUZZY_BLOCK_PREFIX_LENGTH',
+                     'FUZZY_MAX_BLOCK_SIZE', 'FUZZY_NEIGHBOURHOOD_WINDOW', 'ID_REGISTRY_PATH',
+                     'EMAIL_CANONICALIZATION', 'EMAIL_DOMAIN_ALIASES', 'EMAIL_DOT_INSENSITIVE_DOMAINS',
+                     'EMAIL_PLUS_TAG_DOMAINS')
+ENRICHMENT_PARAMS = ('ENRICHMENT_FEATURES', 'MIN_ORDER_VALUE_FOR_VIP', 'CHURN_INACTIVITY_DAYS', 'RFM_SCORE_BINS')
+SEGMENTATION_PARAMS = ('SEGMENTATION_MODE', 'SEGMENT_MODEL_PATH', 'SEGMENT_SAMPLE_SIZE', 'SEGMENT_K_RANGE',
+                       'SEGMENT_BATCH_SIZE', 'SEGMENT_DRIFT_THRESHOLD', 'SEGMENT_FEATURES')
 
-    data_profiling.run_profiling(crm_df, ecommerce_df, website_df)
+def load_options(source, memory_optimized):
+    return memory_optimization.source_read_options(source) if memory_optimized else {}
 
+def pipeline_stages(as_of=config.ENRICHMENT_AS_OF, memory_optimized=config.MEMORY_OPTIMIZED,
+                    web_window_days=config.WEB_WINDOW_DAYS):
+    return [
+        Stage('load_crm', data_ingestion.load_source,
+              kwargs={'path': config.CRM_DATA_PATH, **load_options('crm', memory_optimized)}),
+        Stage('load_ecommerce', data_ingestion.load_source,
+              kwargs={'path': config.ECOMMERCE_DATA_PATH, **load_options('ecommerce', memory_optimized)}),
+        Stage('load_website', data_ingestion.load_source,
+              kwargs={'path': config.WEBSITE_LOGS_PATH, **load_options('website', memory_optimized)}),
+        Stage('profile_crm', data_profiling.profile_dataframe, ['load_crm'], {'df_name': "CRM Data"}, PROFILE_PARAMS,
+              [data_profiling.profile_path_for("CRM Data")]),
+        Stage('profile_ecommerce', data_profiling.profile_dataframe, ['load_ecommerce'], {'df_name': "E-commerce Data"},
+              PROFILE_PARAMS, [data_profiling.profile_path_for("E-commerce Data")]),
+        Stage('profile_website', data_profiling.profile_dataframe, ['load_website'], {'df_name': "Website Logs Data"},
+              PROFILE_PARAMS, [data_profiling.profile_path_for("Website Logs Data")]),
+        Stage('clean_crm', data_cleansing.clean_crm_data, ['load_crm']),
+        Stage('clean_ecommerce', data_cleansing.clean_ecommerce_data, ['load_ecommerce']),
+        Stage('clean_website', data_cleansing.clean_website_data, ['load_website']),
+        Stage('resolve_entities', resolve_entities, ['clean_crm', 'clean_ecommerce', 'clean_website'],
+              params=RESOLUTION_PARAMS, outputs=[config.ID_REGISTRY_PATH]),
+        Stage('integrate', schema_mapping.integrate_data,
+              ['resolve_entities', 'clean_crm', 'clean_ecommerce', 'clean_website'],
+              {'integer_counts': True} if memory_optimized else None),
+        Stage('sessionize', web_analytics.sessionize_web_logs, ['clean_website'],
+              {'as_of': as_of, 'window_days': web_window_days, 'gap_minutes': config.WEB_SESSION_GAP_MINUTES}),
+        Stage('web_features', web_analytics.add_web_features, ['integrate', 'sessionize']),
+        Stage('enrich', data_enrichment.enrich_customer_data, ['web_features'], {'as_of': as_of}, ENRICHMENT_PARAMS),
+        Stage('segment', segment_customers, ['enrich'], params=SEGMENTATION_PARAMS, outputs=[config.SEGMENT_MODEL_PATH]),
+    ]
+
+def run_full_pipeline(crm_df=None, ecommerce_df=None, website_df=None, workers=config.PIPELINE_WORKERS,
+                      as_of=config.ENRICHMENT_AS_OF, use_cache=config.STAGE_CACHE_ENABLED,
+                      memory_optimized=config.MEMORY_OPTIMIZED, web_window_days=config.WEB_WINDOW_DAYS):
+    initial_results = None
+    if crm_df is not None or ecommerce_df is not None or website_df is not None:
+        initial_results = {'load_crm': crm_df, 'load_ecommerce': ecommerce_df, 'load_website': website_df}
+    cache = stage_cache.StageCache() if use_cache else None
+    results, metrics = scheduler.run_stages(pipeline_stages(as_of, memory_optimized, web_window_days), workers=workers,
+                                            initial_results=initial_results, cache=cache)
+    scheduler.print_stage_report(metrics)
+    if config.PERSIST_INTERMEDIATES:
+        for stage_name in ['clean_crm', 'clean_ecommerce', 'clean_website']:
+            utils.save_columnar(results[stage_name], os.path.join(config.INTERMEDIATE_DIR, f"{stage_name}.arrow"))
+    return results
+
+def build_customer_360_streaming(memory_optimized=config.MEMORY_OPTIMIZED, as_of=config.ENRICHMENT_AS_OF,
+                                 web_window_days=config.WEB_WINDOW_DAYS):
+    crm_df = data_ingestion.load_source(config.CRM_DATA_PATH, **load_options('crm', memory_optimized))
+    data_profiling.profile_dataframe(crm_df, "CRM Data")
     crm_df_cleaned = data_cleansing.clean_crm_data(crm_df)
-    ecommerce_df_cleaned = data_cleansing.clean_ecommerce_data(ecommerce_df)
-    website_df_cleaned = data_cleansing.clean_website_data(website_df)
 
-    master_customers = entity_resolution.create_master_customer_ids(
-        crm_df_cleaned, ecommerce_df_cleaned, website_df_cleaned
-    )
+    ecommerce_agg = streaming.stream_ecommerce_aggregates()
+    website_agg = streaming.stream_website_aggregates()
+    ecommerce_emails = pd.DataFrame({'cust_email': ecommerce_agg['email'] if ecommerce_agg is not None else []})
+    website_emails = pd.DataFrame({'user_email': website_agg['email'] if website_agg is not None else []})
 
-    customer_360_raw = schema_mapping.integrate_data(
-        master_customers, crm_df_cleaned, ecommerce_df_cleaned, website_df_cleaned
+    master_customers = entity_resolution.create_master_customer_ids(crm_df_cleaned, ecommerce_emails, website_emails)
+    customer_360_df = schema_mapping.integrate_data(
+        master_customers, crm_df_cleaned, None, None, ecommerce_agg=ecommerce_agg, website_agg=website_agg,
+        integer_counts=memory_optimized
     )
+    web_features = streaming.stream_web_features(as_of=as_of, window_days=web_window_days)
+    return web_analytics.add_web_features(customer_360_df, web_features)
+
+def finalize_customer_360(customer_360_raw, as_of=config.ENRICHMENT_AS_OF):
+    customer_360_enriched = data_enrichment.enrich_customer_data(customer_360_raw, as_of=as_of)
+    return segment_customers(customer_360_enriched)
 
-    customer_360_enriched = data_enrichment.enrich_customer_data(customer_360_raw)
+def save_customer_360(customer_360_final, formats=config.OUTPUT_FORMATS):
+    # Readers pick the newest output and treat dashboard artifacts older than the Arrow table as stale,
+    # so the Arrow output and its artifacts are written last.
+    if "csv" in formats:
+        utils.save_dataframe(customer_360_final, config.OUTPUT_CSV_PATH)
+    if "parquet" in formats:
+        utils.save_columnar(customer_360_final, config.OUTPUT_PARQUET_PATH, schema=utils.CUSTOMER_360_SCHEMA)
+    if "arrow" in formats:
+        utils.save_columnar(customer_360_final, config.OUTPUT_ARROW_PATH, schema=utils.CUSTOMER_360_SCHEMA)
+        # Row positions in the index refer to the Arrow output, so both are written together.
+        dashboard_backend.write_dashboard_artifacts(customer_360_final)
 
-    customer_360_final = customer_segmentation.segment_customers(customer_360_enriched)
+def main(incremental_mode=False, streaming_mode=False, workers=config.PIPELINE_WORKERS, as_of=config.ENRICHMENT_AS_OF,
+         use_cache=config.STAGE_CACHE_ENABLED, memory_optimized=config.MEMORY_OPTIMIZED, partitioned_mode=False,
+         web_window_days=config.WEB_WINDOW_DAYS):
+    print("Starting Customer 360 AI-Driven Data Integration Quality Project...")
+    instrumentation.start_run()
+    if memory_optimized:
+        memory_optimization.enable_copy_on_write()
+
+    # Pin the enrichment clock once so every stage and mode sees the same "as of" time.
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    incremental_state = None
+    if partitioned_mode and config.ENTITY_RESOLUTION_MODE == "fuzzy":
+        # Fuzzy matches can span hash partitions, so fuzzy resolution keeps the single-process pipeline.
+        print("Partitioned mode supports exact entity resolution only. Running the single-process pipeline.")
+        partitioned_mode = False
+    if partitioned_mode:
+        customer_360_raw = partitioned.build_customer_360_partitioned(memory_optimized, as_of=as_of,
+                                                                      web_window_days=web_window_days)
+        customer_360_final = finalize_customer_360(customer_360_raw, as_of)
+    elif streaming_mode:
+        customer_360_final = finalize_customer_360(
+            build_customer_360_streaming(memory_optimized, as_of, web_window_days), as_of)
+    elif incremental_mode:
+        crm_df, ecommerce_df, website_df = data_ingestion.load_data()
+        sources_loaded = all(df is not None for df in (crm_df, ecommerce_df, website_df))
+        incremental_result = (incremental.run_incremental(crm_df, ecommerce_df, website_df, as_of, web_window_days)
+                              if sources_loaded else None)
+        if incremental_result is not None:
+            customer_360_raw, crm_state, session_pairs, web_state = incremental_result
+            customer_360_raw = web_analytics.add_web_features(customer_360_raw, web_state['features'])
+            customer_360_final = finalize_customer_360(customer_360_raw, as_of)
+        else:
+            results = run_full_pipeline(crm_df, ecommerce_df, website_df, workers=workers, as_of=as_of,
+                                        use_cache=use_cache, memory_optimized=memory_optimized,
+                                        web_window_days=web_window_days)
+            customer_360_final = results['segment']
+            if sources_loaded:
+                crm_state = incremental.crm_state_from_cleaned(crm_df, results['clean_crm'])
+                session_pairs = incremental.session_pair_hashes(results['clean_website']).to_numpy()
+                web_state = incremental.web_state_from_cleaned(results['clean_website'], results['sessionize'], as_of,
+                                                               web_window_days)
+        if sources_loaded:
+            incremental_state = (crm_df, crm_state, ecommerce_df, website_df, session_pairs, web_state)
+        else:
+            # Row hashes cover all three sources, so a run with a missing source saves no incremental state.
+            print("Not all sources could be loaded. Incremental state was not saved.")
+    else:
+        customer_360_final = run_full_pipeline(workers=workers, as_of=as_of, use_cache=use_cache,
+                                               memory_optimized=memory_optimized,
+                                               web_window_days=web_window_days)['segment']
 
     if customer_360_final is not None and not customer_360_final.empty:
         print("\n--- Final Customer 360 View (Sample) ---")
         print(customer_360_final.head())
-        utils.save_dataframe(customer_360_final, config.OUTPUT_CSV_PATH)
+        if incremental_state is not None:
+            # Incremental runs merge into the previous CSV output, so it is always written in that mode.
+            save_customer_360(customer_360_final, formats=set(config.OUTPUT_FORMATS) | {"csv"})
+            incremental.save_state(*incremental_state)
+        else:
+            save_customer_360(customer_360_final)
     else:
         print("Final Customer 360 DataFrame is empty or None. Nothing to save or display.")
 
+    instrumentation.finish_run("partitioned" if partitioned_mode else "streaming" if streaming_mode
+                               else "incremental" if incremental_mode else "full")
     print("\nProject execution finished.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Customer 360 data pipeline.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="Process only new or changed source rows and merge them into the previous output.")
+    mode.add_argument("--streaming", action="store_true",
+                      help="Read e-commerce and website sources in bounded chunks instead of loading them whole.")
+    mode.add_argument("--partitioned", action="store_true",
+                      help="Hash-partition every source by email and clean/aggregate the partitions on a process pool.")
+    parser.add_argument("--workers", type=int, default=config.PIPELINE_WORKERS,
+                        help="Worker count for running independent pipeline stages concurrently (1 = sequential).")
+    parser.add_argument("--as-of", default=config.ENRICHMENT_AS_OF,
+                        help="Timestamp enrichment features are computed against (e.g. 2025-06-30); defaults to now.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every stage instead of reusing cached outputs for unchanged inputs.")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Record per-stage and per-function timings, row counts and memory to state/metrics.")
+    parser.add_argument("--profile", action="store_true",
+                        help="With --instrument, also write cProfile stats for each top-level instrumented call.")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="With --instrument, also report Python heap peaks per call (slower).")
+    parser.add_argument("--memory-optimized", action="store_true",
+                        help="Load sources with typed/categorical dtypes and parsed dates and keep counts as integers.")
+    parser.add_argument("--web-window-days", type=int, default=config.WEB_WINDOW_DAYS,
+                        help="Only website events in the last N days before --as-of feed sessions and web features.")
+    args = parser.parse_args()
+    instrumentation.configure(enabled=args.instrument or None, profile=args.profile or None,
+                              trace_memory=args.tracemalloc or None)
+    main(incremental_mode=args.incremental, streaming_mode=args.streaming, workers=args.workers, as_of=args.as_of,
+         use_cache=config.STAGE_CACHE_ENABLED and not args.no_cache,
+         memory_optimized=config.MEMORY_OPTIMIZED or args.memory_optimized, partitioned_mode=args.partitioned,
+         web_window_days=args.web_window_days)
\ No newline at end of file
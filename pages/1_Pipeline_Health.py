@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from src import instrumentation
+
+st.set_page_config(
+    page_title="Pipeline Health",
+    layout="wide"
+)
+
+st.title("Pipeline Health")
+
+run = instrumentation.load_run_summary()
+if run is None:
+    st.warning("No pipeline metrics found. Run `python main.py --instrument` to record them.")
+    st.stop()
+
+pipeline = run.get('pipeline', {})
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Run", run['run_id'], help=f"Mode: {run.get('mode')}")
+col2.metric("Wall Time", f"{pipeline.get('wall_seconds', 0.0):.2f}s")
+col3.metric("Cached Stages", pipeline.get('cached_stages', 0))
+col4.metric("Peak RSS", f"{run['peak_rss_mb']:,.0f} MB" if run.get('peak_rss_mb') is not None else "N/A")
+
+events = pd.DataFrame(run['events'])
+if events.empty:
+    st.info("The last run recorded no events.")
+    st.stop()
+
+stages = events[events['kind'] == 'stage']
+if not stages.empty:
+    st.header("Stages")
+    stages = stages.assign(rows_per_second=stages['rows_in'] / stages['wall_seconds'].where(stages['wall_seconds'] > 0))
+    fig_stages = px.bar(stages, x='name', y='wall_seconds', color='cached', title="Wall Time by Stage",
+                        labels={'name': 'Stage', 'wall_seconds': 'Seconds'})
+    st.plotly_chart(fig_stages, use_container_width=True)
+    st.dataframe(stages[['name', 'cached', 'wall_seconds', 'rows_in', 'rows_out', 'rows_per_second',
+                         'output_memory_mb', 'peak_rss_delta_mb']], use_container_width=True, hide_index=True)
+
+functions = events[events['kind'] == 'function']
+if not functions.empty:
+    st.header("Functions")
+    columns = [col for col in ['name', 'thread', 'depth', 'wall_seconds', 'rows_in', 'rows_out', 'output_memory_mb',
+                               'process_peak_rss_mb', 'tracemalloc_peak_mb', 'profile_path'] if col in functions.columns]
+    st.dataframe(functions[columns], use_container_width=True, hide_index=True)
+
+history = instrumentation.load_run_history()
+if not history.empty and 'kind' in history.columns:
+    runs = history[history['kind'] == 'pipeline']
+    if len(runs) > 1:
+        st.header("Run History")
+        fig_history = px.line(runs, x='run_id', y='wall_seconds', markers=True, title="Pipeline Wall Time by Run",
+                              labels={'run_id': 'Run', 'wall_seconds': 'Seconds'})
+        st.plotly_chart(fig_history, use_container_width=True)
@@ -8,5 +8,92 @@ ECOMMERCE_DATA_PATH = os.path.join(DATA_DIR, 'ecommerce_data.csv')
 WEBSITE_LOGS_PATH = os.path.join(DATA_DIR, 'website_logs.csv')
 
 FUZZY_MATCH_THRESHOLD = 85
+ENTITY_RESOLUTION_MODE = "exact"  # "exact" or "fuzzy"
+FUZZY_BLOCK_PREFIX_LENGTH = 2
+FUZZY_MAX_BLOCK_SIZE = 50
+FUZZY_NEIGHBOURHOOD_WINDOW = 10
 MIN_ORDER_VALUE_FOR_VIP = 100
-OUTPUT_CSV_PATH = os.path.join(BASE_DIR, "customer_360_final.csv")
\ No newline at end of file
+ENRICHMENT_FEATURES = ("last_order_date", "is_vip", "days_since_last_order", "days_since_last_visit",
+                       "web_visit_frequency", "web_pages_per_session")  # names in feature_registry.FEATURE_REGISTRY
+ENRICHMENT_AS_OF = None  # fixed "as of" timestamp, e.g. "2025-06-30"; None uses the current time
+CHURN_INACTIVITY_DAYS = 180
+RFM_SCORE_BINS = 5
+OUTPUT_CSV_PATH = os.path.join(BASE_DIR, "customer_360_final.csv")
+OUTPUT_ARROW_PATH = os.path.join(BASE_DIR, "customer_360_final.arrow")
+OUTPUT_PARQUET_PATH = os.path.join(BASE_DIR, "customer_360_final.parquet")
+OUTPUT_FORMATS = ("csv", "arrow")  # any of "csv", "arrow", "parquet"
+PERSIST_INTERMEDIATES = False
+
+DASHBOARD_ARTIFACT_DIR = os.path.join(BASE_DIR, "state", "dashboard")
+DASHBOARD_SUMMARY_PATH = os.path.join(DASHBOARD_ARTIFACT_DIR, "summary.json")
+DASHBOARD_EMAIL_INDEX_PATH = os.path.join(DASHBOARD_ARTIFACT_DIR, "email_index.arrow")
+DASHBOARD_SEGMENT_INDEX_PATH = os.path.join(DASHBOARD_ARTIFACT_DIR, "segment_index.arrow")
+DASHBOARD_PAGE_SIZE = 50
+INTERMEDIATE_DIR = os.path.join(BASE_DIR, "state", "intermediate")
+
+ID_REGISTRY_PATH = os.path.join(BASE_DIR, "state", "master_id_registry.sqlite")
+ID_REGISTRY_BATCH_SIZE = 500
+INCREMENTAL_STATE_DIR = os.path.join(BASE_DIR, "state", "incremental")
+
+CLEANSING_CACHE_SIZE = 200_000
+CLEANSING_N_JOBS = 1
+CLEANSING_PARALLEL_MIN_ROWS = 50_000
+
+SEGMENTATION_MODE = "kmeans"  # "kmeans" or "scalable"
+SEGMENT_MODEL_PATH = os.path.join(BASE_DIR, "state", "segment_model.json")
+SEGMENT_SAMPLE_SIZE = 100_000
+SEGMENT_K_RANGE = (2, 8)
+SEGMENT_BATCH_SIZE = 1024
+SEGMENT_DRIFT_THRESHOLD = 0.25
+SEGMENT_FEATURES = ('total_spend', 'num_orders', 'total_time_spent_seconds', 'web_sessions', 'web_visit_frequency',
+                    'web_pages_per_session')
+
+WEB_SESSION_GAP_MINUTES = 30  # inactivity that closes a website session
+WEB_WINDOW_DAYS = None  # only events in the last N days before the as-of time feed web features, e.g. 30 or 90
+
+PIPELINE_WORKERS = 4
+PIPELINE_EXECUTOR = "thread"  # "thread" or "process"
+
+PARTITION_COUNT = 16  # hash partitions per source; more partitions lower each worker's peak memory
+PARTITION_WORKERS = os.cpu_count() or 1
+PARTITION_RANGE_BYTES = 64 * 1024 ** 2  # CSV bytes parsed by each split task
+PARTITION_DIR = os.path.join(BASE_DIR, "state", "partitions")
+
+STREAM_CHUNK_SIZE = 100_000
+STREAM_COMPACT_ROWS = 1_000_000  # buffered partial-aggregate rows before streaming folds merge them
+PROFILE_DIR = os.path.join(BASE_DIR, "state", "profiles")
+PROFILE_CHUNK_SIZE = 100_000
+PROFILE_SAMPLE_FRACTION = 1.0  # < 1.0 feeds only a random sample of rows to the quantile reservoir
+PROFILE_HLL_PRECISION = 14  # 2**14 registers per column, ~0.8% cardinality error
+PROFILE_QUANTILE_SAMPLE_SIZE = 10_000
+PROFILE_DUPLICATE_SAMPLE_SIZE = 200_000  # distinct row hashes kept for the duplicate-rate estimate
+
+STAGE_CACHE_ENABLED = True
+STAGE_CACHE_DIR = os.path.join(BASE_DIR, "state", "stage_cache")
+STAGE_CACHE_MAX_BYTES = 2 * 1024 ** 3  # least recently used outputs are evicted beyond this size
+
+API_HOST = "127.0.0.1"
+API_PORT = 8360
+API_RELOAD_INTERVAL_SECONDS = 5.0  # how often the query API checks for a new pipeline output
+API_DEFAULT_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 1000
+API_MAX_BATCH_SIZE = 1000
+
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_PROFILE = False  # cProfile the outermost instrumented call per thread
+INSTRUMENTATION_TRACEMALLOC = False  # report Python heap peaks per call (slows the pipeline down)
+INSTRUMENTATION_RSS_SAMPLE_SECONDS = 0.01  # RSS polling interval for each stage's peak memory
+INSTRUMENTATION_DEEP_MEMORY = False  # deep=True memory_usage scans object columns
+METRICS_DIR = os.path.join(BASE_DIR, "state", "metrics")
+METRICS_LOG_PATH = os.path.join(METRICS_DIR, "pipeline_events.jsonl")
+METRICS_SUMMARY_PATH = os.path.join(METRICS_DIR, "last_run.json")
+
+MEMORY_OPTIMIZED = False  # typed/categorical source dtypes, parsed dates and integer counts
+
+EMAIL_CANONICALIZATION = True  # cluster provider-equivalent addresses (Gmail dots, +tags) under one master ID
+EMAIL_CHUNK_SIZE = 1_000_000
+EMAIL_WORKERS = os.cpu_count() or 1
+EMAIL_DOMAIN_ALIASES = {"googlemail.com": "gmail.com"}
+EMAIL_DOT_INSENSITIVE_DOMAINS = ("gmail.com",)
+EMAIL_PLUS_TAG_DOMAINS = ("gmail.com", "outlook.com", "hotmail.com", "live.com", "icloud.com", "me.com",
+                          "fastmail.com", "protonmail.com", "proton.me")
@@ -1,44 +1,55 @@
+import json
+import os
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from scipy.optimize import linear_sum_assignment
 import numpy as np
+from src import config
+from src.instrumentation import instrument
 
+def _segment_features(df, segment_features=config.SEGMENT_FEATURES):
+    features = [col for col in segment_features if col in df.columns]
+    segment_data = df[features].copy()
+    for col in features:
+        segment_data[col] = pd.to_numeric(segment_data[col], errors='coerce').fillna(0)
+    return features, segment_data
+
+def _count_distinct_rows(segment_data):
+    # Hashing rows is linear; np.unique(axis=0) sorts the whole feature matrix.
+    return pd.util.hash_pandas_object(segment_data, index=False).nunique()
+
+@instrument
 def segment_customers(customer_360_df, n_clusters=3):
     if customer_360_df is None or customer_360_df.empty:
         print("Customer 360 DataFrame is empty. Skipping segmentation.")
         return pd.DataFrame()
     print("\nSegmenting customers...")
-    df = customer_360_df.copy()
+    df = customer_360_df.copy(deep=False)
+
+    features, segment_data = _segment_features(df)
 
-    features = []
-    if 'total_spend' in df.columns: features.append('total_spend')
-    if 'num_orders' in df.columns: features.append('num_orders')
-    if 'total_time_spent_seconds' in df.columns: features.append('total_time_spent_seconds')
-    
     if not features:
         print("Not enough features for segmentation. Assigning default segment.")
         df['segment'] = 'default'
         return df
 
-    segment_data = df[features].copy()
-    for col in features:
-        segment_data[col] = pd.to_numeric(segment_data[col], errors='coerce').fillna(0)
-
     if segment_data.empty or (segment_data == 0).all().all() or len(segment_data) < n_clusters:
         print("Insufficient or non-variable data for clustering. Assigning default segment.")
         df['segment'] = 'default'
         return df
-        
+
     scaler = StandardScaler()
     scaled_features = scaler.fit_transform(segment_data)
-    
-    actual_n_clusters = min(n_clusters, len(np.unique(scaled_features, axis=0)))
+
+    actual_n_clusters = min(n_clusters, _count_distinct_rows(segment_data))
     if actual_n_clusters < 1: # needs at least 1 cluster
         print(f"Not enough distinct data points for {n_clusters} clusters. Assigning to default segment.")
         df['segment'] = 'default'
         return df
     if actual_n_clusters == 1: # KMeans needs at least 2 for typical use, but handle 1
-         df['segment'] = 0 
+         df['segment'] = 0
          print(f"Only one distinct group found. Assigning all to segment 0.")
          return df
 
@@ -49,6 +60,133 @@ def segment_customers(customer_360_df, n_clusters=3):
     except Exception as e:
         print(f"Error during Kmeans fitting: {e}. Assigning default segment.")
         df['segment'] = 'error_default'
-    
+
+    print("Customer segmentation complete.")
+    return df
+
+def select_n_clusters(scaled_sample, k_range=config.SEGMENT_K_RANGE, random_state=42):
+    best_k, best_score = None, -1.0
+    for k in range(k_range[0], k_range[1] + 1):
+        if k >= len(scaled_sample):
+            break
+        labels = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3).fit_predict(scaled_sample)
+        if len(np.unique(labels)) < 2:
+            continue
+        score = silhouette_score(scaled_sample, labels, sample_size=min(len(scaled_sample), 5000),
+                                 random_state=random_state)
+        if score > best_score:
+            best_k, best_score = k, score
+    return best_k, best_score
+
+def _canonical_order(centroids, scaler_mean, scaler_scale, features, previous_model=None):
+    # Order clusters by centroid spend so labels mean the same thing across refits,
+    # then match to the previous model's centroids when k and the feature list are unchanged.
+    raw_centroids = centroids * scaler_scale + scaler_mean
+    order = np.lexsort(raw_centroids.T[::-1])
+    if previous_model is not None and previous_model['features'] == features \
+            and len(previous_model['centroids']) == len(centroids):
+        previous_raw = (np.asarray(previous_model['centroids']) * np.asarray(previous_model['scale'])
+                        + np.asarray(previous_model['mean']))
+        cost = np.linalg.norm((previous_raw[:, None, :] - raw_centroids[None, :, :]) / scaler_scale, axis=2)
+        _, order = linear_sum_assignment(cost)
+    return order
+
+def load_segment_model(model_path=config.SEGMENT_MODEL_PATH):
+    if not os.path.exists(model_path):
+        return None
+    with open(model_path) as f:
+        return json.load(f)
+
+def save_segment_model(model, model_path=config.SEGMENT_MODEL_PATH):
+    model_dir = os.path.dirname(model_path)
+    if model_dir:
+        os.makedirs(model_dir, exist_ok=True)
+    with open(model_path, 'w') as f:
+        json.dump(model, f, indent=2)
+
+def detect_drift(model, segment_data, threshold=config.SEGMENT_DRIFT_THRESHOLD):
+    mean = np.asarray(model['mean'])
+    scale = np.asarray(model['scale'])
+    current_mean = segment_data.to_numpy(dtype=float).mean(axis=0)
+    current_std = segment_data.to_numpy(dtype=float).std(axis=0)
+    mean_shift = np.abs(current_mean - mean) / scale
+    std_ratio = np.where(scale > 0, current_std / scale, 1.0)
+    drifted = bool((mean_shift > threshold).any() or (np.abs(np.log(np.maximum(std_ratio, 1e-12))) > np.log1p(threshold)).any())
+    return drifted, {'mean_shift': mean_shift.round(4).tolist(), 'std_ratio': std_ratio.round(4).tolist()}
+
+def fit_segment_model(segment_data, features, n_clusters=None, sample_size=config.SEGMENT_SAMPLE_SIZE,
+                      previous_model=None, random_state=42):
+    sample = segment_data.sample(n=min(sample_size, len(segment_data)), random_state=random_state)
+    scaler = StandardScaler().fit(sample)
+    scale = np.where(scaler.scale_ > 0, scaler.scale_, 1.0)
+    scaled_sample = (sample.to_numpy(dtype=float) - scaler.mean_) / scale
+
+    if n_clusters is None:
+        n_clusters, score = select_n_clusters(scaled_sample, random_state=random_state)
+        if n_clusters is None:
+            return None
+        print(f"Selected k={n_clusters} (silhouette {score:.3f}) on a sample of {len(sample)} customers.")
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3,
+                             batch_size=config.SEGMENT_BATCH_SIZE).fit(scaled_sample)
+    order = _canonical_order(kmeans.cluster_centers_, scaler.mean_, scale, features, previous_model)
+    return {
+        'features': features,
+        'mean': scaler.mean_.tolist(),
+        'scale': scale.tolist(),
+        'centroids': kmeans.cluster_centers_[order].tolist(),
+        'n_clusters': int(n_clusters),
+    }
+
+def assign_segments(model, segment_data, chunk_size=config.SEGMENT_BATCH_SIZE * 100):
+    centroids = np.asarray(model['centroids'])
+    mean, scale = np.asarray(model['mean']), np.asarray(model['scale'])
+    values = segment_data[model['features']].to_numpy(dtype=float)
+    labels = np.empty(len(values), dtype='int64')
+    for start in range(0, len(values), chunk_size):
+        scaled = (values[start:start + chunk_size] - mean) / scale
+        distances = ((scaled[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        labels[start:start + chunk_size] = distances.argmin(axis=1)
+    return labels
+
+@instrument
+def segment_customers_scalable(customer_360_df, n_clusters=None, model_path=config.SEGMENT_MODEL_PATH, refit=False):
+    if customer_360_df is None or customer_360_df.empty:
+        print("Customer 360 DataFrame is empty. Skipping segmentation.")
+        return pd.DataFrame()
+    print("\nSegmenting customers (scalable mode)...")
+    df = customer_360_df.copy(deep=False)
+
+    features, segment_data = _segment_features(df)
+    if not features or (segment_data == 0).all().all() or len(segment_data) < 2:
+        print("Insufficient or non-variable data for clustering. Assigning default segment.")
+        df['segment'] = 'default'
+        return df
+
+    model = load_segment_model(model_path)
+    previous_model = model if model is not None and model['features'] == features else None
+    if model is not None and model['features'] != features:
+        print("Segment model features changed. Refitting.")
+        model = None
+    elif model is not None and n_clusters is not None and model['n_clusters'] != n_clusters:
+        model = None
+    elif model is not None and not refit:
+        drifted, drift_stats = detect_drift(model, segment_data)
+        if drifted:
+            print(f"Feature drift detected ({drift_stats}). Refitting segment model.")
+            model = None
+
+    if model is None or refit:
+        model = fit_segment_model(segment_data, features, n_clusters=n_clusters, previous_model=previous_model)
+        if model is None:
+            print("Not enough distinct data points for clustering. Assigning default segment.")
+            df['segment'] = 'default'
+            return df
+        save_segment_model(model, model_path)
+        print(f"Segment model saved to {model_path}")
+    else:
+        print(f"Reusing segment model from {model_path} (k={model['n_clusters']}).")
+
+    df['segment'] = assign_segments(model, segment_data)
     print("Customer segmentation complete.")
-    return df
\ No newline at end of file
+    return df
@@ -0,0 +1,143 @@
+import bisect
+import json
+import os
+import numpy as np
+import pandas as pd
+from src import config, utils
+
+PREFIX_SEARCH_SENTINEL = "\U0010ffff"
+
+def build_summary(df):
+    segments = df['segment'].astype('string').fillna('Unknown') if 'segment' in df.columns else None
+    summary = {
+        'row_count': int(len(df)),
+        'total_customers': int(df['master_customer_id'].nunique()) if 'master_customer_id' in df.columns else 0,
+        'total_revenue': float(df['total_spend'].sum()) if 'total_spend' in df.columns else 0.0,
+        'avg_orders': float(df['num_orders'].mean()) if 'num_orders' in df.columns and df['num_orders'].notna().any() else 0.0,
+        'vip_count': int(df['is_vip'].fillna(False).astype(bool).sum()) if 'is_vip' in df.columns else None,
+        'segments': [],
+    }
+    if segments is not None:
+        grouped = pd.DataFrame({'segment': segments, 'total_spend': df.get('total_spend', 0.0)}).groupby('segment')
+        stats = grouped['total_spend'].agg(['size', 'mean']).sort_values('size', ascending=False)
+        summary['segments'] = [
+            {'segment': str(segment), 'count': int(row['size']),
+             'avg_spend': None if pd.isna(row['mean']) else float(row['mean'])}
+            for segment, row in stats.iterrows()
+        ]
+    return summary
+
+def build_email_index(df):
+    emails = df['email'].astype('string')
+    positions = pd.DataFrame({'email': emails, 'row': np.arange(len(df), dtype='int64')}).dropna(subset=['email'])
+    positions = positions.sort_values(['email', 'row'], kind='stable')
+    grouped = positions.groupby('email', sort=True)['row'].agg(list)
+    return pd.DataFrame({'email': grouped.index.astype(str), 'rows': grouped.to_numpy()})
+
+def build_segment_index(df):
+    segments = df['segment'].astype('string').fillna('Unknown').to_numpy(dtype=object)
+    order = np.lexsort((np.arange(len(df)), segments))
+    segment_rows = pd.DataFrame({'segment': segments[order], 'row': order.astype('int64')})
+    offsets = {}
+    if not segment_rows.empty:
+        boundaries = np.flatnonzero(segment_rows['segment'].to_numpy()[1:] != segment_rows['segment'].to_numpy()[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(segment_rows)]])
+        for start, end in zip(starts, ends):
+            offsets[str(segment_rows['segment'].iat[start])] = [int(start), int(end)]
+    return segment_rows, offsets
+
+def write_dashboard_artifacts(df, summary_path=config.DASHBOARD_SUMMARY_PATH,
+                              email_index_path=config.DASHBOARD_EMAIL_INDEX_PATH,
+                              segment_index_path=config.DASHBOARD_SEGMENT_INDEX_PATH):
+    print("\nWriting dashboard artifacts...")
+    summary = build_summary(df)
+    utils.save_columnar(build_email_index(df), email_index_path)
+    if 'segment' in df.columns:
+        segment_rows, summary['segment_offsets'] = build_segment_index(df)
+        utils.save_columnar(segment_rows, segment_index_path)
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Dashboard summary saved to {summary_path}")
+
+class _ArrowStringSequence:
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, i):
+        return self.array[i].as_py()
+
+class CustomerStore:
+    def __init__(self, table, summary, email_index, segment_rows=None):
+        self.table = table
+        self.summary = summary
+        self.email_index = email_index
+        self.segment_rows = segment_rows
+        self._emails = _ArrowStringSequence(email_index.column('email').combine_chunks())
+
+    @classmethod
+    def from_artifacts(cls, table_path=config.OUTPUT_ARROW_PATH, summary_path=config.DASHBOARD_SUMMARY_PATH,
+                       email_index_path=config.DASHBOARD_EMAIL_INDEX_PATH,
+                       segment_index_path=config.DASHBOARD_SEGMENT_INDEX_PATH,
+                       other_output_paths=(config.OUTPUT_CSV_PATH, config.OUTPUT_PARQUET_PATH)):
+        for path in (table_path, summary_path, email_index_path):
+            if not os.path.exists(path):
+                return None
+        # Artifacts older than the Arrow table, or an Arrow table older than another output (a CSV-only run,
+        # a failed artifact write), belong to an earlier run; the caller then indexes the newest output instead.
+        table_mtime = os.path.getmtime(table_path)
+        if any(os.path.getmtime(path) < table_mtime for path in (summary_path, email_index_path)) \
+                or any(os.path.exists(path) and os.path.getmtime(path) > table_mtime for path in other_output_paths):
+            return None
+        with open(summary_path) as f:
+            summary = json.load(f)
+        segment_rows = None
+        if 'segment_offsets' in summary and os.path.exists(segment_index_path) \
+                and os.path.getmtime(segment_index_path) >= table_mtime:
+            segment_rows = utils.load_columnar_table(segment_index_path)
+        return cls(utils.load_columnar_table(table_path), summary, utils.load_columnar_table(email_index_path),
+                   segment_rows)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        summary = build_summary(df)
+        segment_rows = None
+        if 'segment' in df.columns:
+            segment_rows, summary['segment_offsets'] = build_segment_index(df)
+            segment_rows = utils.to_arrow_table(segment_rows)
+        return cls(utils.to_arrow_table(df), summary, utils.to_arrow_table(build_email_index(df)), segment_rows)
+
+    def _to_pandas(self, table):
+        return utils.arrow_table_to_pandas(table)
+
+    def _take_rows(self, rows):
+        return self._to_pandas(self.table.take(rows)) if len(rows) else self._to_pandas(self.table.slice(0, 0))
+
+    def search_emails(self, prefix, page=0, page_size=config.DASHBOARD_PAGE_SIZE):
+        prefix = (prefix or "").strip().lower()
+        lo = bisect.bisect_left(self._emails, prefix)
+        hi = bisect.bisect_left(self._emails, prefix + PREFIX_SEARCH_SENTINEL, lo)
+        start = min(lo + page * page_size, hi)
+        end = min(start + page_size, hi)
+        matches = self.email_index.column('email').slice(start, end - start).to_pylist()
+        return matches, hi - lo
+
+    def get_customer(self, email):
+        email = (email or "").strip().lower()
+        i = bisect.bisect_left(self._emails, email)
+        if i == len(self._emails) or self._emails[i] != email:
+            return self._take_rows([])
+        return self._take_rows(self.email_index.column('rows')[i].as_py())
+
+    def segment_page(self, segment=None, page=0, page_size=config.DASHBOARD_PAGE_SIZE):
+        if segment is None or self.segment_rows is None:
+            total = self.table.num_rows
+            start = min(page * page_size, total)
+            return self._to_pandas(self.table.slice(start, page_size)), total
+        start, end = self.summary.get('segment_offsets', {}).get(str(segment), [0, 0])
+        page_start = min(start + page * page_size, end)
+        rows = self.segment_rows.column('row').slice(page_start, min(page_size, end - page_start)).to_pylist()
+        return self._take_rows(rows), end - start
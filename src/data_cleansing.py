@@ -1,96 +1,288 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from nameparser import HumanName
+from nameparser.config import CONSTANTS
 import phonenumbers
+from src import config
+from src.instrumentation import instrument
 
-def standardize_email(email_series):
+EMAIL_STATUSES = ['valid', 'canonicalized', 'missing', 'malformed', 'invalid_local_part', 'invalid_domain']
+_EMAIL_REGEX = r"^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$"
+_EMAIL_PARTS_REGEX = r"^(?P<local>[^@]*)@(?P<domain>[^@]*)$"
+_EMAIL_LOCAL_REGEX = r"^[a-z0-9._%+-]+$"
+
+def _invalid_email_statuses(normalized):
+    # Only rows failing the address regex are split up to find out why.
+    parts = pc.extract_regex(normalized, _EMAIL_PARTS_REGEX)
+    local = pc.struct_field(parts, 'local')
+    status = np.full(len(normalized), EMAIL_STATUSES.index('invalid_domain'), dtype='int8')
+    checks = [
+        ('invalid_local_part', pc.invert(pc.fill_null(pc.match_substring_regex(local, _EMAIL_LOCAL_REGEX), False))),
+        ('malformed', pc.is_null(parts)),
+        ('missing', pc.fill_null(pc.equal(normalized, ''), True)),
+    ]
+    for name, mask in checks:
+        status[mask.to_numpy(zero_copy_only=False)] = EMAIL_STATUSES.index(name)
+    return status
+
+def _apply_to(emails, mask, func):
+    mask = pc.fill_null(mask, False)
+    if not pc.any(mask).as_py():
+        return emails
+    return pc.replace_with_mask(emails, mask, func(pc.filter(emails, mask)))
+
+def _strip_dots_from_local_part(emails):
+    parts = pc.split_pattern(emails, "@")
+    local = pc.replace_substring(pc.list_element(parts, 0), ".", "")
+    return pc.binary_join_element_wise(local, pc.list_element(parts, 1), pa.scalar("@", emails.type))
+
+def _canonical_keys(emails):
+    # Each rule only touches the rows it can change: domain aliases, then "+tag" removal, then Gmail dots.
+    # An address that is nothing but a tag (e.g. "+news@gmail.com") keeps its local part.
+    for alias, domain in config.EMAIL_DOMAIN_ALIASES.items():
+        emails = _apply_to(emails, pc.ends_with(emails, "@" + alias),
+                           lambda values: pc.replace_substring_regex(values, "@" + re.escape(alias) + "$", "@" + domain))
+    tag_domains = "|".join(re.escape(domain) for domain in config.EMAIL_PLUS_TAG_DOMAINS)
+    emails = _apply_to(emails, pc.match_substring_regex(emails, r"^[^@+]+\+[^@]*@(" + tag_domains + ")$"),
+                       lambda values: pc.replace_substring_regex(values, r"\+[^@]*@", "@"))
+    for domain in config.EMAIL_DOT_INSENSITIVE_DOMAINS:
+        dotted = pc.and_(pc.ends_with(emails, "@" + domain), pc.match_substring_regex(emails, r"\.[^@]*@"))
+        emails = _apply_to(emails, dotted, _strip_dots_from_local_part)
+    return emails
+
+def _canonicalize_email_chunk(values, provider_rules):
+    if pc.all(pc.string_is_ascii(values)).as_py() is not False:
+        normalized = pc.ascii_trim_whitespace(pc.ascii_lower(values))
+    else:
+        normalized = pc.utf8_trim_whitespace(pc.utf8_lower(values))
+    valid = pc.fill_null(pc.match_substring_regex(normalized, _EMAIL_REGEX), False)
+    email = pc.if_else(valid, normalized, pa.scalar(None, normalized.type))
+    status = np.zeros(len(values), dtype='int8')
+    invalid = pc.invert(valid)
+    invalid_rows = np.flatnonzero(invalid.to_numpy(zero_copy_only=False))
+    if len(invalid_rows):
+        status[invalid_rows] = _invalid_email_statuses(pc.filter(normalized, invalid))
+    if not provider_rules:
+        return email, email, status
+
+    key = _canonical_keys(email)
+    changed = pc.fill_null(pc.not_equal(key, email), False).to_numpy(zero_copy_only=False)
+    status[changed] = EMAIL_STATUSES.index('canonicalized')
+    return email, key, status
+
+def canonicalize_emails(email_series, provider_rules=config.EMAIL_CANONICALIZATION,
+                        chunk_size=config.EMAIL_CHUNK_SIZE, workers=config.EMAIL_WORKERS):
     if email_series is None or not isinstance(email_series, pd.Series):
-        return pd.Series(dtype='object')
+        return pd.DataFrame({'email': pd.Series(dtype='str'), 'email_key': pd.Series(dtype='str'),
+                             'email_status': pd.Categorical([], categories=EMAIL_STATUSES)})
     if not pd.api.types.is_string_dtype(email_series):
-        email_series = email_series.astype(str)
+        email_series = email_series.astype('str')
+
+    # Arrow kernels release the GIL, so chunks are normalized, validated and canonicalized on a thread pool.
+    values = pa.array(email_series, type=pa.large_string(), from_pandas=True)
+    if isinstance(values, pa.ChunkedArray):
+        # Arrow-backed columns read from large CSVs arrive in several chunks; the mask kernels need one array.
+        values = values.combine_chunks()
+    chunks = [values.slice(start, chunk_size) for start in range(0, len(values), chunk_size)] or [values]
+    if workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_canonicalize_email_chunk, chunks, [provider_rules] * len(chunks)))
+    else:
+        results = [_canonicalize_email_chunk(chunk, provider_rules) for chunk in chunks]
+    email, key, status = zip(*results)
+    return pd.DataFrame({
+        'email': pd.array(pa.chunked_array(email, pa.large_string()), dtype='str'),
+        'email_key': pd.array(pa.chunked_array(key, pa.large_string()), dtype='str'),
+        'email_status': pd.Categorical.from_codes(np.concatenate(status), categories=EMAIL_STATUSES),
+    }, index=email_series.index)
+
+def canonical_email_keys(emails):
+    # Entity resolution canonicalizes the distinct cleaned addresses, not every source row.
+    return canonicalize_emails(pd.Series(emails, dtype='str'), provider_rules=True)['email_key']
+
+def validate_emails(email_series):
+    return canonicalize_emails(email_series, provider_rules=False)[['email', 'email_status']]
+
+def standardize_email(email_series):
+    return validate_emails(email_series)['email']
+
+def _report_email_statuses(statuses):
+    counts = statuses.value_counts()
+    print("Email status: " + ", ".join(f"{status} {counts[status]}" for status in EMAIL_STATUSES if counts[status]))
+
+_SIMPLE_NAME_REGEX = r"^[A-Za-z]{2,} [A-Za-z]{2,}$"
+_NANP_PHONE_REGEX = r"^\s*(?:\+?1[\s.-]?)?\(?([2-9]\d{2})\)?[\s.-]?([2-9]\d{2})[\s.-]?(\d{4})\s*$"
+_EMPTY_NAME = (None, None, None)
 
-    email_series = email_series.str.lower().str.strip()
-    email_regex = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    
-    valid_mask = email_series.str.match(email_regex, na=False)
-    email_series_cleaned = email_series.copy()
-    email_series_cleaned[~valid_mask] = None
-    return email_series_cleaned
+def _nameparser_reserved_words():
+    reserved = set()
+    for word_set in (CONSTANTS.titles, CONSTANTS.suffix_acronyms, CONSTANTS.suffix_not_acronyms,
+                     CONSTANTS.prefixes, CONSTANTS.conjunctions):
+        reserved.update(word.lower() for word in word_set)
+    return reserved
 
-def standardize_names(name_series):
+_NAME_RESERVED_WORDS = _nameparser_reserved_words()
+
+@lru_cache(maxsize=config.CLEANSING_CACHE_SIZE)
+def _parse_name(name_str):
+    if not name_str.strip():
+        return _EMPTY_NAME
+    try:
+        name = HumanName(name_str)
+        return (
+            name.first.title() if name.first else None,
+            name.last.title() if name.last else None,
+            str(name).title() if str(name).strip() else None
+        )
+    except Exception:
+        return _EMPTY_NAME
+
+@lru_cache(maxsize=config.CLEANSING_CACHE_SIZE)
+def _parse_phone(p_num_str, region):
+    if not p_num_str.strip():
+        return None
+    try:
+        parsed_num = phonenumbers.parse(p_num_str, region)
+        if phonenumbers.is_valid_number(parsed_num):
+            return phonenumbers.format_number(parsed_num, phonenumbers.PhoneNumberFormat.E164)
+        return None
+    except phonenumbers.NumberParseException:
+        return None
+
+@lru_cache(maxsize=config.CLEANSING_CACHE_SIZE)
+def _is_valid_nanp_number(national_digits):
+    return phonenumbers.is_valid_number(phonenumbers.PhoneNumber(country_code=1, national_number=int(national_digits)))
+
+def _string_mask(series):
+    if pd.api.types.is_string_dtype(series) and not pd.api.types.is_object_dtype(series):
+        return pd.Series(True, index=series.index)
+    return series.map(lambda value: isinstance(value, str)).astype(bool)
+
+def _map_distinct(values, func, n_jobs, *args):
+    if n_jobs > 1 and len(values) >= config.CLEANSING_PARALLEL_MIN_ROWS:
+        chunksize = max(1, len(values) // (n_jobs * 4))
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            return list(executor.map(func, values, *[[arg] * len(values) for arg in args], chunksize=chunksize))
+    return [func(value, *args) for value in values]
+
+@instrument
+def standardize_names(name_series, n_jobs=config.CLEANSING_N_JOBS):
     if name_series is None or not isinstance(name_series, pd.Series):
         return pd.DataFrame(columns=['first_name', 'last_name', 'full_name_standardized'])
-        
-    parsed_names = []
-    for name_str in name_series.fillna(""):
-        if isinstance(name_str, str) and name_str.strip():
-            try:
-                name = HumanName(name_str)
-                parsed_names.append({
-                    'first_name': name.first.title() if name.first else None,
-                    'last_name': name.last.title() if name.last else None,
-                    'full_name_standardized': str(name).title() if str(name).strip() else None
-                })
-            except Exception:
-                 parsed_names.append({'first_name': None, 'last_name': None, 'full_name_standardized': None})
-        else:
-            parsed_names.append({'first_name': None, 'last_name': None, 'full_name_standardized': None})
-    return pd.DataFrame(parsed_names, index=name_series.index)
-
-def standardize_phone(phone_series, region="US"):
+
+    values = name_series.fillna("")
+    distinct = pd.Series(pd.unique(values[_string_mask(values)]), dtype=object)
+    parsed = {}
+
+    # Plain "First Last" names parse identically under nameparser, so they skip it.
+    tokens = distinct.str.split(" ", n=1, expand=True) if not distinct.empty else None
+    simple = distinct.str.match(_SIMPLE_NAME_REGEX).fillna(False).astype(bool)
+    if simple.any():
+        simple &= ~tokens[0].str.lower().isin(_NAME_RESERVED_WORDS) & ~tokens[1].str.lower().isin(_NAME_RESERVED_WORDS)
+        first = tokens.loc[simple, 0].str.title()
+        last = tokens.loc[simple, 1].str.title()
+        full = distinct[simple].str.title()
+        parsed.update(zip(distinct[simple], zip(first, last, full)))
+
+    hard = distinct[~simple].tolist()
+    parsed.update(zip(hard, _map_distinct(hard, _parse_name, n_jobs)))
+
+    rows = [parsed.get(value, _EMPTY_NAME) if isinstance(value, str) else _EMPTY_NAME for value in values]
+    first_names, last_names, full_names = zip(*rows) if rows else ((), (), ())
+    return pd.DataFrame({
+        'first_name': list(first_names),
+        'last_name': list(last_names),
+        'full_name_standardized': list(full_names)
+    }, index=name_series.index)
+
+@instrument
+def standardize_phone(phone_series, region="US", n_jobs=config.CLEANSING_N_JOBS):
     if phone_series is None or not isinstance(phone_series, pd.Series):
         return pd.Series(dtype='object')
 
-    standardized_phones = []
-    for p_num_str in phone_series.fillna(""):
-        if isinstance(p_num_str, str) and p_num_str.strip():
-            try:
-                parsed_num = phonenumbers.parse(p_num_str, region)
-                if phonenumbers.is_valid_number(parsed_num):
-                    standardized_phones.append(phonenumbers.format_number(parsed_num, phonenumbers.PhoneNumberFormat.E164))
-                else:
-                    standardized_phones.append(None)
-            except phonenumbers.NumberParseException:
-                standardized_phones.append(None)
-        else:
-            standardized_phones.append(None)
-    return pd.Series(standardized_phones, index=phone_series.index)
-
-def clean_crm_data(crm_df):
+    values = phone_series.fillna("")
+    distinct = pd.Series(pd.unique(values[_string_mask(values)]), dtype=object)
+    standardized = {}
+
+    # Well-formed NANP numbers map straight to E.164; validity is checked once per distinct number.
+    nanp = distinct.str.extract(_NANP_PHONE_REGEX) if region == "US" and not distinct.empty else None
+    fast = nanp[0].notna() if nanp is not None else pd.Series(False, index=distinct.index)
+    if fast.any():
+        national_digits = nanp.loc[fast, 0] + nanp.loc[fast, 1] + nanp.loc[fast, 2]
+        national_digits = national_digits.tolist()
+        valid = _map_distinct(national_digits, _is_valid_nanp_number, n_jobs)
+        standardized.update(zip(distinct[fast], [f"+1{digits}" if ok else None for digits, ok in zip(national_digits, valid)]))
+
+    hard = distinct[~fast].tolist()
+    standardized.update(zip(hard, _map_distinct(hard, _parse_phone, n_jobs, region)))
+
+    return pd.Series([standardized.get(value) if isinstance(value, str) else None for value in values],
+                     index=phone_series.index)
+
+@instrument
+def clean_crm_data(crm_df, verbose=True):
     if crm_df is None or crm_df.empty:
-        print("CRM data is empty or None. Skipping cleaning.")
+        if verbose:
+            print("CRM data is empty or None. Skipping cleaning.")
         return pd.DataFrame()
-    print("\nCleaning CRM Data...")
-    df = crm_df.copy()
+    if verbose:
+        print("\nCleaning CRM Data...")
+    df = crm_df.copy(deep=False)
     if 'email_address' in df.columns:
-        df['email_address'] = standardize_email(df['email_address'])
+        emails = validate_emails(df['email_address'])
+        df['email_address'] = emails['email']
+        df['email_status'] = emails['email_status']
+        if verbose:
+            _report_email_statuses(df['email_status'])
     if 'full_name' in df.columns:
         name_df = standardize_names(df['full_name'])
         df = pd.concat([df.drop(columns=['full_name'], errors='ignore'), name_df], axis=1)
     if 'phone' in df.columns:
         df['phone_standardized'] = standardize_phone(df['phone'])
         df.drop(columns=['phone'], inplace=True, errors='ignore')
-    print("CRM Data cleaned.")
+    if verbose:
+        print("CRM Data cleaned.")
     return df
 
-def clean_ecommerce_data(ecommerce_df):
+@instrument
+def clean_ecommerce_data(ecommerce_df, verbose=True):
     if ecommerce_df is None or ecommerce_df.empty:
-        print("E-commerce data is empty or None. Skipping cleaning.")
+        if verbose:
+            print("E-commerce data is empty or None. Skipping cleaning.")
         return pd.DataFrame()
-    print("\nCleaning E-commerce Data...")
-    df = ecommerce_df.copy()
+    if verbose:
+        print("\nCleaning E-commerce Data...")
+    df = ecommerce_df.copy(deep=False)
     if 'cust_email' in df.columns:
-        df['cust_email'] = standardize_email(df['cust_email'])
-    print("E-commerce Data cleaned.")
+        emails = validate_emails(df['cust_email'])
+        df['cust_email'] = emails['email']
+        df['email_status'] = emails['email_status']
+        if verbose:
+            _report_email_statuses(df['email_status'])
+    if verbose:
+        print("E-commerce Data cleaned.")
     return df
 
-def clean_website_data(website_df):
+@instrument
+def clean_website_data(website_df, verbose=True):
     if website_df is None or website_df.empty:
-        print("Website data is empty or None. Skipping cleaning.")
+        if verbose:
+            print("Website data is empty or None. Skipping cleaning.")
         return pd.DataFrame()
-    print("\nCleaning Website Data...")
-    df = website_df.copy()
+    if verbose:
+        print("\nCleaning Website Data...")
+    df = website_df.copy(deep=False)
     if 'user_email' in df.columns:
-        df['user_email'] = standardize_email(df['user_email'])
-    print("Website Data cleaned.")
+        emails = validate_emails(df['user_email'])
+        df['user_email'] = emails['email']
+        df['email_status'] = emails['email_status']
+        if verbose:
+            _report_email_statuses(df['email_status'])
+    if verbose:
+        print("Website Data cleaned.")
     return df
\ No newline at end of file
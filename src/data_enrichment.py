@@ -1,26 +1,22 @@
 import pandas as pd
-from src import config
+from src import config, feature_registry
+from src.instrumentation import instrument
 
-def enrich_customer_data(customer_360_df):
+@instrument
+def enrich_customer_data(customer_360_df, features=config.ENRICHMENT_FEATURES, as_of=config.ENRICHMENT_AS_OF):
     if customer_360_df is None or customer_360_df.empty:
         print("Customer 360 DataFrame is empty. Skipping enrichment.")
         return pd.DataFrame()
-    print("\nEnriching customer data...")
-    df = customer_360_df.copy()
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    print(f"\nEnriching customer data (as of {as_of})...")
 
-    if 'total_spend' in df.columns:
-        df['is_vip'] = df['total_spend'] > config.MIN_ORDER_VALUE_FOR_VIP
-    else:
-        df['is_vip'] = False
+    # Features are computed into a dict and attached in one assign; only requested features and their dependencies run.
+    feature_columns = feature_registry.compute_features(customer_360_df, features, as_of)
+    requested = set(features)
+    df = customer_360_df.assign(**{
+        name: values for name, values in feature_columns.items()
+        if name in requested or name in customer_360_df.columns
+    })
 
-    if 'last_order_date' in df.columns:
-        df['last_order_date'] = pd.to_datetime(df['last_order_date'], errors='coerce')
-        if pd.api.types.is_datetime64_any_dtype(df['last_order_date']):
-            df['days_since_last_order'] = (pd.Timestamp.now(tz=df['last_order_date'].dt.tz) - df['last_order_date']).dt.days
-        else:
-            df['days_since_last_order'] = pd.NA
-    else:
-        df['days_since_last_order'] = pd.NA
-        
     print("Customer data enriched.")
-    return df
\ No newline at end of file
+    return df
@@ -1,5 +1,6 @@
 import pandas as pd
-from src import config
+from src import config, memory_optimization
+from src.instrumentation import instrument
 
 def load_data():
     try:
@@ -13,4 +14,18 @@ def load_data():
         return None, None, None
     except Exception as e:
         print(f"An unexpected error occurred during data loading: {e}")
-        return None, None, None
\ No newline at end of file
+        return None, None, None
+
+@instrument
+def load_source(path, dtypes=None, date_columns=()):
+    try:
+        df = pd.read_csv(path, dtype=dtypes)
+        memory_optimization.parse_dates(df, date_columns)
+        print(f"Loaded {len(df)} rows from {path}.")
+        return df
+    except FileNotFoundError as e:
+        print(f"Error loading data: {e}")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred during data loading: {e}")
+        return None
\ No newline at end of file
@@ -1,28 +1,248 @@
+import datetime
+import json
+import os
+import re
+import numpy as np
 import pandas as pd
+from src import config
+from src.instrumentation import instrument
 
-def profile_dataframe(df, df_name):
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+ROW_HASH_MULTIPLIER = np.uint64(1_000_003)
+
+def hash_column(series):
+    # Hash distinct values once and broadcast; nulls (code -1) map to NULL_HASH.
+    codes, uniques = pd.factorize(series)
+    values = np.asarray(uniques, dtype=object) if uniques.dtype.kind == 'O' else np.asarray(uniques)
+    unique_hashes = pd.util.hash_array(values, categorize=False)
+    return np.append(unique_hashes, NULL_HASH)[codes], codes < 0
+
+def combine_row_hashes(column_hashes, n_rows):
+    row_hashes = np.zeros(n_rows, dtype='uint64')
+    for hashes in column_hashes:
+        row_hashes = (row_hashes * ROW_HASH_MULTIPLIER) ^ hashes
+    return row_hashes
+
+class HyperLogLog:
+    def __init__(self, precision=config.PROFILE_HLL_PRECISION):
+        # precision >= 12 keeps the shifted hash within float64's exact integer range below.
+        self.precision = max(12, precision)
+        self.registers = np.zeros(1 << self.precision, dtype='uint8')
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype('int64')
+        # Sentinel bit bounds the rank when the remaining bits are all zero.
+        remaining = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        _, exponent = np.frexp((remaining >> np.uint64(11)).astype('float64'))
+        rank = (64 - (exponent + 11) + 1).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype('int64')))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+class DuplicateSketch:
+    # Exact duplicate counts over the rows whose hash falls in a shrinking slice of the hash space;
+    # the slice halves whenever more than `capacity` distinct rows are held.
+    def __init__(self, capacity=config.PROFILE_DUPLICATE_SAMPLE_SIZE):
+        self.capacity = capacity
+        self.level = 0
+        self.counts = pd.Series(dtype='int64')
+
+    def _in_sample(self, hashes):
+        if self.level == 0:
+            return np.ones(len(hashes), dtype=bool)
+        return (hashes >> np.uint64(64 - self.level)) == 0
+
+    def add_hashes(self, hashes):
+        hashes = hashes[self._in_sample(hashes)]
+        counts = pd.Series(hashes).value_counts()
+        self.counts = counts if self.counts.empty else pd.concat([self.counts, counts]).groupby(level=0).sum()
+        while len(self.counts) > self.capacity:
+            self.level += 1
+            self.counts = self.counts[self._in_sample(self.counts.index.to_numpy(dtype='uint64'))]
+
+    def duplicate_rate(self):
+        sampled_rows = int(self.counts.sum())
+        return 1 - len(self.counts) / sampled_rows if sampled_rows else 0.0
+
+class QuantileSketch:
+    # Bottom-k reservoir over random priorities: a uniform sample that can be folded chunk by chunk.
+    def __init__(self, size=config.PROFILE_QUANTILE_SAMPLE_SIZE, seed=42):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.values = np.empty(0, dtype='float64')
+        self.priorities = np.empty(0, dtype='float64')
+
+    def add(self, values):
+        values = np.concatenate([self.values, values])
+        priorities = np.concatenate([self.priorities, self.rng.random(len(values) - len(self.values))])
+        if len(values) > self.size:
+            keep = np.argpartition(priorities, self.size)[:self.size]
+            values, priorities = values[keep], priorities[keep]
+        self.values, self.priorities = values, priorities
+
+    def quantiles(self, qs=QUANTILES):
+        if len(self.values) == 0:
+            return {}
+        return {f"p{int(q * 100):02d}": float(v) for q, v in zip(qs, np.quantile(self.values, qs))}
+
+class ColumnProfile:
+    def __init__(self, dtype, numeric):
+        self.dtype = dtype
+        self.numeric = numeric
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        if numeric:
+            self.count, self.total, self.total_sq = 0, 0.0, 0.0
+            self.min, self.max = None, None
+            self.sketch = QuantileSketch()
+
+    def update(self, series, hashes, nulls, sampled):
+        self.nulls += int(nulls.sum())
+        self.hll.add_hashes(hashes[~nulls])
+        if self.numeric and not nulls.all():
+            values = series.to_numpy(dtype='float64')[~nulls]
+            self.count += len(values)
+            self.total += values.sum()
+            self.total_sq += np.square(values).sum()
+            self.min = values.min() if self.min is None else min(self.min, values.min())
+            self.max = values.max() if self.max is None else max(self.max, values.max())
+            self.sketch.add(values[sampled[~nulls]])
+
+    def result(self, rows):
+        profile = {
+            'dtype': self.dtype,
+            'null_count': self.nulls,
+            'null_fraction': self.nulls / rows if rows else 0.0,
+            'distinct_estimate': self.hll.estimate(),
+        }
+        if self.numeric and self.count:
+            mean = self.total / self.count
+            variance = max(self.total_sq / self.count - mean * mean, 0.0) * self.count / max(self.count - 1, 1)
+            profile.update({
+                'min': float(self.min), 'max': float(self.max),
+                'mean': float(mean), 'std': float(np.sqrt(variance)),
+                'quantiles': self.sketch.quantiles(),
+            })
+        return profile
+
+class SourceProfiler:
+    def __init__(self, df_name, sample_fraction=config.PROFILE_SAMPLE_FRACTION, seed=42):
+        self.df_name = df_name
+        self.sample_fraction = sample_fraction
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.profiled_rows = 0
+        self.columns = None
+        self.duplicates = DuplicateSketch()
+
+    def update(self, chunk):
+        # Hash sketches are already memory-bounded, so every row feeds the null counts, cardinality and duplicate
+        # estimates; the sample only thins the rows offered to the quantile reservoir.
+        self.rows += len(chunk)
+        sampled = np.ones(len(chunk), dtype=bool)
+        if self.sample_fraction < 1.0:
+            sampled = self.rng.random(len(chunk)) < self.sample_fraction
+        if self.columns is None:
+            self.columns = {
+                col: ColumnProfile(str(dtype), pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype))
+                for col, dtype in chunk.dtypes.items()
+            }
+        self.profiled_rows += int(sampled.sum())
+        column_hashes = []
+        # Each column is hashed once; the same hashes feed cardinality and the row-level duplicate estimate.
+        for col, column_profile in self.columns.items():
+            hashes, nulls = hash_column(chunk[col])
+            column_profile.update(chunk[col], hashes, nulls, sampled)
+            column_hashes.append(hashes)
+        self.duplicates.add_hashes(combine_row_hashes(column_hashes, len(chunk)))
+
+    def result(self):
+        duplicate_rate = self.duplicates.duplicate_rate()
+        return {
+            'source': self.df_name,
+            'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'rows': self.rows,
+            'profiled_rows': self.profiled_rows,
+            'sample_fraction': self.sample_fraction,
+            'duplicate_rate': duplicate_rate,
+            'duplicate_rows_estimate': int(round(duplicate_rate * self.rows)),
+            'columns': {col: column_profile.result(self.rows)
+                        for col, column_profile in (self.columns or {}).items()},
+        }
+
+def profile_path_for(df_name, profile_dir=config.PROFILE_DIR):
+    return os.path.join(profile_dir, re.sub(r'[^a-z0-9]+', '_', df_name.lower()).strip('_') + ".json")
+
+def profile_chunks(chunks, df_name, sample_fraction=config.PROFILE_SAMPLE_FRACTION):
+    profiler = SourceProfiler(df_name, sample_fraction)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.result()
+
+def save_profile(profile, profile_path):
+    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+    with open(profile_path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+def load_profiles(profile_dir=config.PROFILE_DIR):
+    profiles = {}
+    if not os.path.isdir(profile_dir):
+        return profiles
+    for file_name in sorted(os.listdir(profile_dir)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(profile_dir, file_name)) as f:
+                profile = json.load(f)
+            profiles[profile.get('source', file_name)] = profile
+    return profiles
+
+def print_profile(profile):
+    print("Shape:", (profile['rows'], len(profile['columns'])))
+    if profile['sample_fraction'] < 1.0:
+        print(f"Quantiles sampled from {profile['profiled_rows']} rows (fraction {profile['sample_fraction']}); "
+              f"counts and distinct estimates cover every row.")
+    columns = pd.DataFrame(profile['columns']).T
+    print("\nColumns:")
+    print(columns[['dtype', 'null_count', 'distinct_estimate']])
+    print(f"\nDuplicates (approx.): {profile['duplicate_rows_estimate']} ({profile['duplicate_rate']:.2%})")
+    print("\nBasic Stats (for numeric columns):")
+    if 'mean' in columns.columns:
+        numeric = columns.dropna(subset=['mean'])
+        print(numeric[['min', 'mean', 'std', 'max']])
+    else:
+        print("No numeric columns to describe.")
+
+@instrument
+def profile_dataframe(df, df_name, sample_fraction=config.PROFILE_SAMPLE_FRACTION, chunk_size=config.PROFILE_CHUNK_SIZE,
+                      profile_path=None):
     if df is None or df.empty:
         print(f"\n--- Profiling for {df_name} ---")
         print(f"{df_name} is empty or None. Skipping profiling.")
         print("--- End Profiling ---")
-        return
+        return None
 
     print(f"\n--- Profiling for {df_name} ---")
-    print("Shape:", df.shape)
-    print("\nInfo:")
-    df.info()
-    print("\nMissing Values:")
-    print(df.isnull().sum())
-    print("\nDuplicates:", df.duplicated().sum())
-    print("\nBasic Stats (for numeric columns):")
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    if not numeric_cols.empty:
-        print(df[numeric_cols].describe())
-    else:
-        print("No numeric columns to describe.")
+    profile = profile_chunks((df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)),
+                             df_name, sample_fraction)
+    print_profile(profile)
+    profile_path = profile_path or profile_path_for(df_name)
+    save_profile(profile, profile_path)
+    print(f"Profile saved to {profile_path}")
     print("--- End Profiling ---")
+    return profile
 
 def run_profiling(crm_df, ecommerce_df, website_df):
     profile_dataframe(crm_df, "CRM Data")
     profile_dataframe(ecommerce_df, "E-commerce Data")
-    profile_dataframe(website_df, "Website Logs Data")
\ No newline at end of file
+    profile_dataframe(website_df, "Website Logs Data")
@@ -1,10 +1,15 @@
 import pandas as pd
-import uuid
+import re
+from collections import defaultdict
+from fuzzywuzzy import fuzz
+from src import config, id_registry, data_cleansing
+from src.instrumentation import instrument
 
-def create_master_customer_ids(crm_df, ecommerce_df, website_df):
+@instrument
+def create_master_customer_ids(crm_df, ecommerce_df, website_df, registry_path=config.ID_REGISTRY_PATH):
     print("\nResolving Entities (Email-based)...")
     all_emails_list = []
-    
+
     if crm_df is not None and not crm_df.empty and 'email_address' in crm_df.columns:
         all_emails_list.extend(crm_df['email_address'].dropna().unique().tolist())
     if ecommerce_df is not None and not ecommerce_df.empty and 'cust_email' in ecommerce_df.columns:
@@ -12,14 +17,232 @@ def create_master_customer_ids(crm_df, ecommerce_df, website_df):
     if website_df is not None and not website_df.empty and 'user_email' in website_df.columns:
         all_emails_list.extend(website_df['user_email'].dropna().unique().tolist())
 
-    unique_emails = pd.Series(list(set(all_emails_list))).dropna().unique()
-    
+    return master_customer_ids_for_emails(all_emails_list, registry_path)
+
+def master_customer_ids_for_emails(emails, registry_path=config.ID_REGISTRY_PATH):
+    master_customer_df, to_register, new_entities, merged = resolve_master_customer_ids(emails, registry_path)
+    id_registry.register_master_ids(to_register, registry_path)
+    report_master_customer_ids(master_customer_df, new_entities, merged)
+    return master_customer_df
+
+def resolve_master_customer_ids(emails, registry_path=config.ID_REGISTRY_PATH):
+    # Registry writes are left to the caller, so disjoint sets of emails can be resolved concurrently.
+    unique_emails = pd.Series(sorted(set(emails))).dropna().unique()
     if len(unique_emails) == 0:
+        return pd.DataFrame(columns=['email', 'master_customer_id']), [], 0, 0
+
+    master_customer_df = pd.DataFrame({'email': unique_emails})
+    labels = email_cluster_labels(unique_emails)
+    master_ids, to_register, new_entities = id_registry.resolve_master_ids(unique_emails, labels, registry_path)
+    master_customer_df['master_customer_id'] = master_ids
+    merged = len(unique_emails) - labels.max() - 1 if labels is not None else 0
+    return master_customer_df, to_register, new_entities, merged
+
+def report_master_customer_ids(master_customer_df, new_entities, merged):
+    if master_customer_df.empty:
+        print("No valid emails found to create master customer profiles.")
+        return
+    print(f"Created {master_customer_df['master_customer_id'].nunique()} unique master customer profiles "
+          f"from {len(master_customer_df)} emails ({new_entities} new).")
+    if merged:
+        print(f"Merged {merged} provider-equivalent emails into existing customers.")
+
+def email_cluster_labels(emails):
+    # Addresses with the same canonical key (Gmail dots, +tags, domain aliases) share a master ID.
+    if not config.EMAIL_CANONICALIZATION or len(emails) == 0:
+        return None
+    return pd.factorize(data_cleansing.canonical_email_keys(emails))[0]
+
+def provider_equivalent_emails(emails, candidates):
+    if not config.EMAIL_CANONICALIZATION or not emails:
+        return set()
+    candidates = pd.Series(candidates, dtype='str').dropna().drop_duplicates()
+    keys = set(data_cleansing.canonical_email_keys(sorted(emails)).dropna())
+    return set(candidates[data_cleansing.canonical_email_keys(candidates).isin(keys).to_numpy()])
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return True
+
+_SOUNDEX_CODES = {}
+for _letters, _digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _digit
+
+def soundex(word):
+    if not isinstance(word, str):
+        return None
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return None
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+def build_resolution_records(crm_df, ecommerce_df, website_df):
+    frames = []
+    if crm_df is not None and not crm_df.empty and 'email_address' in crm_df.columns:
+        crm_cols = [col for col in ['email_address', 'first_name', 'last_name', 'phone_standardized'] if col in crm_df.columns]
+        crm_records = crm_df[crm_cols].rename(columns={'email_address': 'email'}).dropna(subset=['email'])
+        frames.append(crm_records.drop_duplicates(subset=['email']))
+    if ecommerce_df is not None and not ecommerce_df.empty and 'cust_email' in ecommerce_df.columns:
+        frames.append(pd.DataFrame({'email': ecommerce_df['cust_email'].dropna().unique()}))
+    if website_df is not None and not website_df.empty and 'user_email' in website_df.columns:
+        frames.append(pd.DataFrame({'email': website_df['user_email'].dropna().unique()}))
+
+    records = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['email'])
+    for col in ['first_name', 'last_name', 'phone_standardized']:
+        if col not in records.columns:
+            records[col] = None
+    records = records.drop_duplicates(subset=['email'], keep='first').reset_index(drop=True)
+    return records[['email', 'first_name', 'last_name', 'phone_standardized']]
+
+def _blocking_keys(email, first_name, last_name, phone, prefix_len):
+    keys = []
+    local, _, domain = email.partition('@')
+    local_alnum = re.sub(r'[^a-z0-9]', '', local)
+    if local_alnum:
+        keys.append(f"e:{domain}:{local_alnum[:prefix_len]}")
+        keys.append(f"s:{domain}:{local_alnum[-prefix_len:]}")
+    if isinstance(phone, str):
+        digits = re.sub(r'\D', '', phone)
+        if len(digits) >= 7:
+            keys.append(f"p:{digits[-7:]}")
+    last_code = soundex(last_name)
+    if last_code and isinstance(first_name, str) and first_name:
+        keys.append(f"n:{last_code}:{first_name[0].lower()}")
+    return keys
+
+def _local_part_score(a, b):
+    if a['digits'] != b['digits']:
+        return 0
+    if len(a['tokens']) > 1 and len(a['tokens']) == len(b['tokens']):
+        return min(fuzz.ratio(x, y) for x, y in zip(a['tokens'], b['tokens']))
+    return fuzz.ratio(''.join(a['tokens']), ''.join(b['tokens']))
+
+def _is_match(a, b, threshold):
+    email_score = 0
+    if a['domain'] == b['domain']:
+        email_score = _local_part_score(a, b)
+
+    name_score = None
+    if a['name'] and b['name']:
+        name_score = fuzz.token_sort_ratio(a['name'], b['name'])
+
+    if email_score >= threshold and (name_score is None or name_score >= threshold):
+        return True
+    if a['phone'] and a['phone'] == b['phone'] and name_score is not None and name_score >= threshold:
+        return True
+    return False
+
+def _neighbourhood_sort_keys(block_key, keyed):
+    # Email blocks are ordered by the forward and reversed local part, so typos at either end still land near
+    # each other. Phone and name blocks say nothing about the email, so they are ordered by name first.
+    if block_key.startswith(('p:', 'n:')):
+        return (lambda idx: keyed[idx]['name'], lambda idx: keyed[idx]['local'])
+    return (lambda idx: keyed[idx]['local'], lambda idx: keyed[idx]['local'][::-1])
+
+def _candidate_pairs(members, keyed, max_block_size, window, block_key=''):
+    if len(members) <= max_block_size:
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                yield members[i], members[j]
+    else:
+        # Oversized blocks fall back to a sorted-neighbourhood scan so the cost stays linear in block size.
+        for sort_key in _neighbourhood_sort_keys(block_key, keyed):
+            ordered = sorted(members, key=sort_key)
+            for i in range(len(ordered)):
+                for j in range(i + 1, min(i + window + 1, len(ordered))):
+                    yield ordered[i], ordered[j]
+
+@instrument
+def resolve_entity_clusters(records, threshold=config.FUZZY_MATCH_THRESHOLD,
+                            prefix_len=config.FUZZY_BLOCK_PREFIX_LENGTH,
+                            max_block_size=config.FUZZY_MAX_BLOCK_SIZE,
+                            window=config.FUZZY_NEIGHBOURHOOD_WINDOW, seed_labels=None):
+    keyed = []
+    blocks = defaultdict(list)
+    for idx, row in enumerate(records.itertuples(index=False)):
+        local, _, domain = row.email.partition('@')
+        first = row.first_name if isinstance(row.first_name, str) else ''
+        last = row.last_name if isinstance(row.last_name, str) else ''
+        keyed.append({
+            'local': local,
+            'tokens': [token for token in re.split(r'[^a-z]+', local) if token],
+            'digits': re.sub(r'\D', '', local),
+            'domain': domain,
+            'name': f"{first} {last}".strip().lower(),
+            'phone': row.phone_standardized if isinstance(row.phone_standardized, str) else None,
+        })
+        for key in _blocking_keys(row.email, row.first_name, row.last_name, row.phone_standardized, prefix_len):
+            blocks[key].append(idx)
+
+    uf = UnionFind(len(keyed))
+    if seed_labels is not None:
+        # Provider-equivalent addresses (same canonical email key) start out in one cluster.
+        first_of_label = {}
+        for idx, label in enumerate(seed_labels):
+            uf.union(first_of_label.setdefault(label, idx), idx)
+    pairs_compared = 0
+    for block_key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        for a, b in _candidate_pairs(members, keyed, max_block_size, window, block_key):
+            if uf.find(a) == uf.find(b):
+                continue
+            pairs_compared += 1
+            if _is_match(keyed[a], keyed[b], threshold):
+                uf.union(a, b)
+
+    labels = [uf.find(i) for i in range(len(keyed))]
+    return labels, {'records': len(keyed), 'blocks': len(blocks), 'pairs_compared': pairs_compared}
+
+@instrument
+def create_fuzzy_master_customer_ids(crm_df, ecommerce_df, website_df, threshold=config.FUZZY_MATCH_THRESHOLD,
+                                     registry_path=config.ID_REGISTRY_PATH):
+    print("\nResolving Entities (Fuzzy, blocked)...")
+    records = build_resolution_records(crm_df, ecommerce_df, website_df)
+
+    if records.empty:
         print("No valid emails found to create master customer profiles.")
         return pd.DataFrame(columns=['email', 'master_customer_id'])
 
-    master_customer_df = pd.DataFrame({'email': unique_emails})
-    master_customer_df['master_customer_id'] = [str(uuid.uuid4()) for _ in range(len(master_customer_df))]
-    
-    print(f"Created {len(master_customer_df)} unique master customer profiles.")
-    return master_customer_df
\ No newline at end of file
+    labels, stats = resolve_entity_clusters(records, threshold=threshold,
+                                            seed_labels=email_cluster_labels(records['email'].values))
+    master_ids, new_entities = id_registry.assign_master_ids(records['email'].values, labels, registry_path=registry_path)
+
+    master_customer_df = pd.DataFrame({'email': records['email'].values})
+    master_customer_df['master_customer_id'] = master_ids
+
+    print(f"Compared {stats['pairs_compared']} candidate pairs across {stats['blocks']} blocks.")
+    print(f"Created {len(set(labels))} unique master customer profiles from {len(master_customer_df)} emails "
+          f"({new_entities} new).")
+    return master_customer_df
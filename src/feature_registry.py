@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from src import config
+
+class Feature:
+    def __init__(self, name, inputs, func, default=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.func = func
+        self.default = default
+
+FEATURE_REGISTRY = {}
+
+def register_feature(name, inputs, default=None):
+    def decorator(func):
+        FEATURE_REGISTRY[name] = Feature(name, inputs, func, default)
+        return func
+    return decorator
+
+def _days_before(as_of, timestamps):
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        return pd.Series(pd.NA, index=timestamps.index)
+    as_of = as_of.tz_localize(timestamps.dt.tz) if as_of.tz is None and timestamps.dt.tz is not None else as_of
+    return (as_of - timestamps).dt.days
+
+def _ratio(numerator, denominator):
+    denominator = pd.to_numeric(denominator, errors='coerce')
+    return (pd.to_numeric(numerator, errors='coerce') / denominator.where(denominator > 0)).fillna(0.0)
+
+def _quantile_score(values, ascending=True, bins=config.RFM_SCORE_BINS):
+    # Rank-based bins handle heavy ties (e.g. many zero-spend customers) where qcut edges would collide.
+    pct = pd.to_numeric(values, errors='coerce').rank(method='average', pct=True, ascending=ascending)
+    return np.ceil(pct.fillna(1 / bins) * bins).clip(1, bins).astype('int64')
+
+# A feature that lists its own name as an input transforms the raw column of that name in place.
+@register_feature('last_order_date', ['last_order_date'])
+def last_order_date(cols, as_of):
+    return pd.to_datetime(cols['last_order_date'], errors='coerce')
+
+@register_feature('is_vip', ['total_spend'], default=False)
+def is_vip(cols, as_of):
+    return cols['total_spend'] > config.MIN_ORDER_VALUE_FOR_VIP
+
+@register_feature('days_since_last_order', ['last_order_date'], default=pd.NA)
+def days_since_last_order(cols, as_of):
+    return _days_before(as_of, cols['last_order_date'])
+
+@register_feature('tenure_days', ['signup_date'], default=pd.NA)
+def tenure_days(cols, as_of):
+    return _days_before(as_of, pd.to_datetime(cols['signup_date'], errors='coerce'))
+
+@register_feature('avg_order_value', ['total_spend', 'num_orders'], default=0.0)
+def avg_order_value(cols, as_of):
+    return _ratio(cols['total_spend'], cols['num_orders'])
+
+@register_feature('spend_per_session', ['total_spend', 'num_sessions'], default=0.0)
+def spend_per_session(cols, as_of):
+    return _ratio(cols['total_spend'], cols['num_sessions'])
+
+@register_feature('avg_session_seconds', ['total_time_spent_seconds', 'num_sessions'], default=0.0)
+def avg_session_seconds(cols, as_of):
+    return _ratio(cols['total_time_spent_seconds'], cols['num_sessions'])
+
+@register_feature('recency_score', ['days_since_last_order'], default=1)
+def recency_score(cols, as_of):
+    return _quantile_score(cols['days_since_last_order'], ascending=False)
+
+@register_feature('frequency_score', ['num_orders'], default=1)
+def frequency_score(cols, as_of):
+    return _quantile_score(cols['num_orders'])
+
+@register_feature('monetary_score', ['total_spend'], default=1)
+def monetary_score(cols, as_of):
+    return _quantile_score(cols['total_spend'])
+
+@register_feature('rfm_score', ['recency_score', 'frequency_score', 'monetary_score'], default=111)
+def rfm_score(cols, as_of):
+    return cols['recency_score'] * 100 + cols['frequency_score'] * 10 + cols['monetary_score']
+
+@register_feature('is_churn_risk', ['days_since_last_order'], default=False)
+def is_churn_risk(cols, as_of):
+    return (pd.to_numeric(cols['days_since_last_order'], errors='coerce') > config.CHURN_INACTIVITY_DAYS).fillna(False)
+
+@register_feature('is_web_only', ['num_orders', 'num_sessions'], default=False)
+def is_web_only(cols, as_of):
+    return (cols['num_orders'] == 0) & (cols['num_sessions'] > 0)
+
+@register_feature('last_visit', ['last_visit'])
+def last_visit(cols, as_of):
+    return pd.to_datetime(cols['last_visit'], errors='coerce')
+
+@register_feature('days_since_last_visit', ['last_visit'], default=pd.NA)
+def days_since_last_visit(cols, as_of):
+    return _days_before(as_of, cols['last_visit'])
+
+@register_feature('web_visit_frequency', ['web_sessions', 'first_visit'], default=0.0)
+def web_visit_frequency(cols, as_of):
+    # Sessions per 30 days between the first visit (inside the event window) and the as-of time.
+    observed_days = _days_before(as_of, pd.to_datetime(cols['first_visit'], errors='coerce'))
+    return _ratio(cols['web_sessions'] * 30, pd.to_numeric(observed_days, errors='coerce').clip(lower=1))
+
+@register_feature('web_pages_per_session', ['web_events', 'web_sessions'], default=0.0)
+def web_pages_per_session(cols, as_of):
+    return _ratio(cols['web_events'], cols['web_sessions'])
+
+def resolve_features(requested, registry=FEATURE_REGISTRY):
+    # Requested features plus their feature dependencies, in dependency order.
+    ordered, visiting = [], set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular feature dependency at '{name}'")
+        visiting.add(name)
+        for dep in registry[name].inputs:
+            if dep in registry and dep != name:
+                visit(dep)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in requested:
+        if name not in registry:
+            raise ValueError(f"Unknown feature: {name}")
+        visit(name)
+    return ordered
+
+def compute_features(df, requested, as_of, registry=FEATURE_REGISTRY):
+    cols = {}
+    for name in resolve_features(requested, registry):
+        feature = registry[name]
+        inputs = {}
+        for col in feature.inputs:
+            source = cols if col in cols and col != name else df
+            if col not in source:
+                break
+            inputs[col] = source[col]
+        if len(inputs) < len(feature.inputs):
+            cols[name] = pd.Series(feature.default, index=df.index)
+        else:
+            cols[name] = feature.func(inputs, as_of)
+    return cols
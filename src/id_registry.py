@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import uuid
+from src import config
+
+MASTER_ID_NAMESPACE = uuid.UUID("6f1c7a52-3d4e-5b8f-9a0c-2e7d4b1f8c36")
+
+def deterministic_master_id(email):
+    return str(uuid.uuid5(MASTER_ID_NAMESPACE, email))
+
+def open_registry(registry_path=config.ID_REGISTRY_PATH):
+    registry_dir = os.path.dirname(registry_path)
+    if registry_dir:
+        os.makedirs(registry_dir, exist_ok=True)
+    conn = sqlite3.connect(registry_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS master_ids ("
+        "email TEXT PRIMARY KEY, master_customer_id TEXT NOT NULL, seq INTEGER NOT NULL)"
+    )
+    return conn
+
+def lookup_ids(conn, emails, batch_size=config.ID_REGISTRY_BATCH_SIZE):
+    found = {}
+    emails = list(emails)
+    for start in range(0, len(emails), batch_size):
+        batch = emails[start:start + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT email, master_customer_id, seq FROM master_ids WHERE email IN ({placeholders})", batch
+        )
+        for email, master_id, seq in rows:
+            found[email] = (master_id, seq)
+    return found
+
+def register_ids(conn, assignments):
+    if not assignments:
+        return
+    next_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM master_ids").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO master_ids (email, master_customer_id, seq) VALUES (?, ?, ?) "
+        "ON CONFLICT(email) DO UPDATE SET master_customer_id = excluded.master_customer_id",
+        [(email, master_id, next_seq + i) for i, (email, master_id) in enumerate(assignments)],
+    )
+    conn.commit()
+
+def resolve_master_ids(emails, labels=None, registry_path=config.ID_REGISTRY_PATH):
+    # Reads the registry only: returns the ID of every email and the (email, id) rows still to be registered.
+    emails = list(emails)
+    if labels is None:
+        labels = list(range(len(emails)))
+
+    clusters = {}
+    for email, label in zip(emails, labels):
+        clusters.setdefault(label, []).append(email)
+
+    if registry_path is None:
+        cluster_ids = {label: deterministic_master_id(min(members)) for label, members in clusters.items()}
+        return [cluster_ids[label] for label in labels], [], 0
+
+    conn = open_registry(registry_path)
+    try:
+        known = lookup_ids(conn, emails)
+    finally:
+        conn.close()
+    cluster_ids = {}
+    for label, members in clusters.items():
+        registered = [known[email] for email in members if email in known]
+        if registered:
+            # The oldest registration wins when a cluster spans several previously known IDs.
+            cluster_ids[label] = min(registered, key=lambda entry: entry[1])[0]
+        else:
+            cluster_ids[label] = deterministic_master_id(min(members))
+
+    assigned = [cluster_ids[label] for label in labels]
+    to_register = [(email, master_id) for email, master_id in zip(emails, assigned)
+                   if email not in known or known[email][0] != master_id]
+    new_entities = sum(1 for email in emails if email not in known)
+    return assigned, to_register, new_entities
+
+def register_master_ids(assignments, registry_path=config.ID_REGISTRY_PATH):
+    if registry_path is None or not assignments:
+        return
+    conn = open_registry(registry_path)
+    try:
+        register_ids(conn, assignments)
+    finally:
+        conn.close()
+
+def assign_master_ids(emails, labels=None, registry_path=config.ID_REGISTRY_PATH):
+    assigned, to_register, new_entities = resolve_master_ids(emails, labels, registry_path)
+    register_master_ids(to_register, registry_path)
+    return assigned, new_entities
@@ -0,0 +1,277 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from src import config, data_cleansing, schema_mapping, id_registry, entity_resolution, web_analytics
+
+SOURCE_WATERMARK_COLUMNS = {
+    'crm': 'signup_date',
+    'ecommerce': 'order_date',
+    'website': 'visit_timestamp',
+}
+BASE_360_COLUMNS = [
+    'email', 'master_customer_id', 'first_name', 'last_name', 'full_name_standardized',
+    'phone_standardized', 'crm_city', 'signup_date', 'total_spend', 'last_order_date',
+    'num_orders', 'total_time_spent_seconds', 'num_sessions'
+]
+# Read back as text so values such as E.164 phones ('+1984...') are not parsed as numbers.
+STRING_360_COLUMNS = [
+    'email', 'master_customer_id', 'first_name', 'last_name', 'full_name_standardized',
+    'phone_standardized', 'crm_city', 'signup_date', 'last_order_date'
+]
+STRING_CRM_STATE_COLUMNS = ['full_name', 'email_address', 'phone', 'city', 'signup_date', 'first_name', 'last_name',
+                            'full_name_standardized', 'phone_standardized', 'email_status']
+
+def row_hashes(df):
+    if df is None or df.empty:
+        return np.array([], dtype='uint64')
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def session_pair_hashes(website_df_cleaned):
+    if website_df_cleaned is None or website_df_cleaned.empty or 'session_id' not in website_df_cleaned.columns:
+        return pd.Series(dtype='uint64')
+    pairs = website_df_cleaned[['user_email', 'session_id']].dropna()
+    return pd.util.hash_pandas_object(pairs, index=False)
+
+def _state_path(state_dir, name):
+    return os.path.join(state_dir, name)
+
+def load_state(state_dir=config.INCREMENTAL_STATE_DIR):
+    meta_path = _state_path(state_dir, 'watermarks.json')
+    if not os.path.exists(meta_path) or not os.path.exists(config.OUTPUT_CSV_PATH):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    state = {'meta': meta}
+    for source in SOURCE_WATERMARK_COLUMNS:
+        state[f'{source}_hashes'] = np.load(_state_path(state_dir, f'{source}_row_hashes.npy'))
+    state['session_pairs'] = np.load(_state_path(state_dir, 'session_pair_hashes.npy'))
+    state['web'] = None
+    if 'web' in meta and all(os.path.exists(_state_path(state_dir, name))
+                             for name in ('web_events.parquet', 'web_features.parquet')):
+        state['web'] = {
+            'events': pd.read_parquet(_state_path(state_dir, 'web_events.parquet')),
+            'features': pd.read_parquet(_state_path(state_dir, 'web_features.parquet')),
+            'params': meta['web'],
+        }
+    state['crm_cleaned'] = pd.read_csv(
+        _state_path(state_dir, 'crm_cleaned.csv'),
+        dtype={'_row_hash': 'uint64', **{col: 'str' for col in STRING_CRM_STATE_COLUMNS}},
+        float_precision='round_trip'
+    )
+    return state
+
+def _watermark(df, column):
+    if df is None or df.empty or column not in df.columns:
+        return None
+    value = df[column].dropna().max()
+    return None if pd.isna(value) else str(value)
+
+def crm_state_from_cleaned(crm_df, crm_df_cleaned):
+    crm_state = crm_df_cleaned.copy() if crm_df_cleaned is not None else pd.DataFrame()
+    if not crm_state.empty:
+        crm_state['_row_hash'] = pd.Series(row_hashes(crm_df), index=crm_df.index)
+    return crm_state
+
+def web_events(website_df_cleaned):
+    # Every cleaned website event before the as-of window is applied, so later runs can re-sessionize single
+    # customers without recleaning the whole log.
+    if website_df_cleaned is None or website_df_cleaned.empty \
+            or not {'user_email', 'visit_timestamp'} <= set(website_df_cleaned.columns):
+        website_df_cleaned = pd.DataFrame({'user_email': pd.Series(dtype='str'),
+                                           'visit_timestamp': pd.Series(dtype='datetime64[ns]')})
+    return web_analytics.prepare_web_events(website_df_cleaned, pd.Timestamp.max, None)
+
+def web_state_from_cleaned(website_df_cleaned, web_features, as_of, window_days,
+                           gap_minutes=config.WEB_SESSION_GAP_MINUTES):
+    return {
+        'events': web_events(website_df_cleaned),
+        'features': web_features if web_features is not None else web_analytics.session_features(None),
+        'params': {'as_of': str(pd.Timestamp(as_of)), 'window_days': window_days, 'gap_minutes': gap_minutes},
+    }
+
+def update_web_state(web_state, website_delta_cleaned, as_of, window_days, gap_minutes=config.WEB_SESSION_GAP_MINUTES):
+    new_events = web_events(website_delta_cleaned)
+    events = web_state['events']
+    if not new_events.empty:
+        events = pd.concat([events, new_events], ignore_index=True)
+    previous = web_state['params']
+    in_window = web_analytics.in_window(events['visit_timestamp'], as_of, window_days)
+    if previous['gap_minutes'] != gap_minutes:
+        affected = set(events['email'])
+    else:
+        # A customer's features only change with new events or events crossing the moving as-of/window edges.
+        was_in_window = web_analytics.in_window(events['visit_timestamp'], pd.Timestamp(previous['as_of']),
+                                                previous['window_days'])
+        affected = set(new_events['email']) | set(events['email'][in_window != was_in_window])
+    is_affected = events['email'].isin(affected)
+    recomputed = web_analytics.session_features(events[is_affected & in_window], gap_minutes)
+    kept = web_state['features'][~web_state['features']['email'].isin(affected)]
+    features = pd.concat([kept, recomputed], ignore_index=True) if not recomputed.empty else kept
+    print(f"Re-sessionized {len(affected)} website visitors from {int(is_affected.sum())} of {len(events)} events.")
+    return {
+        'events': events,
+        'features': features.reset_index(drop=True),
+        'params': {'as_of': str(pd.Timestamp(as_of)), 'window_days': window_days, 'gap_minutes': gap_minutes},
+    }
+
+def save_state(crm_df, crm_state, ecommerce_df, website_df, session_pairs, web_state,
+               state_dir=config.INCREMENTAL_STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    sources = {'crm': crm_df, 'ecommerce': ecommerce_df, 'website': website_df}
+    meta = {}
+    for source, df in sources.items():
+        hashes = row_hashes(df)
+        np.save(_state_path(state_dir, f'{source}_row_hashes.npy'), hashes)
+        meta[source] = {
+            'rows': int(len(hashes)),
+            'watermark': _watermark(df, SOURCE_WATERMARK_COLUMNS[source]),
+        }
+    np.save(_state_path(state_dir, 'session_pair_hashes.npy'), np.unique(np.asarray(session_pairs, dtype='uint64')))
+    crm_state.to_csv(_state_path(state_dir, 'crm_cleaned.csv'), index=False)
+    web_state['events'].to_parquet(_state_path(state_dir, 'web_events.parquet'), index=False)
+    web_state['features'].to_parquet(_state_path(state_dir, 'web_features.parquet'), index=False)
+    meta['web'] = web_state['params']
+
+    with open(_state_path(state_dir, 'watermarks.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"Incremental state saved to {state_dir}")
+
+def surplus_rows(hashes, reference_hashes):
+    # Rows are compared as a multiset: for each hash, the occurrences beyond its count in the reference are
+    # surplus (the later ones), so an appended copy of an existing row is a new row rather than a duplicate.
+    hashes = np.asarray(hashes, dtype='uint64')
+    reference_values, reference_counts = np.unique(np.asarray(reference_hashes, dtype='uint64'), return_counts=True)
+    if len(hashes) == 0 or len(reference_values) == 0:
+        return np.ones(len(hashes), dtype=bool)
+    values, inverse = np.unique(hashes, return_inverse=True)
+    positions = np.minimum(np.searchsorted(reference_values, values), len(reference_values) - 1)
+    allowed = np.where(reference_values[positions] == values, reference_counts[positions], 0)
+    order = np.argsort(inverse, kind='stable')
+    group_starts = np.searchsorted(inverse[order], np.arange(len(values)))
+    occurrence = np.empty(len(hashes), dtype='int64')
+    occurrence[order] = np.arange(len(hashes)) - group_starts[inverse[order]]
+    return occurrence >= allowed[inverse]
+
+def _split_delta(df, seen_hashes, source, meta):
+    hashes = row_hashes(df)
+    is_new = surplus_rows(hashes, seen_hashes)
+    removed = int(surplus_rows(seen_hashes, hashes).sum())
+    delta = df[is_new] if df is not None else df
+    watermark = meta.get(source, {}).get('watermark')
+    late = 0
+    column = SOURCE_WATERMARK_COLUMNS[source]
+    if watermark is not None and delta is not None and column in delta.columns:
+        late = int((delta[column].astype(str) <= watermark).sum())
+    print(f"{source}: {int(is_new.sum())} new/changed rows, {removed} removed, {late} at or before watermark {watermark}")
+    return delta, is_new, removed
+
+def run_incremental(crm_df, ecommerce_df, website_df, as_of=None, web_window_days=config.WEB_WINDOW_DAYS,
+                    state_dir=config.INCREMENTAL_STATE_DIR):
+    print("\nRunning incremental update...")
+    if config.ENTITY_RESOLUTION_MODE != "exact":
+        print("Incremental mode supports exact entity resolution only. Falling back to a full rebuild.")
+        return None
+    state = load_state(state_dir)
+    if state is None:
+        print("No previous incremental state found. Falling back to a full rebuild.")
+        return None
+    if any(df is None for df in (crm_df, ecommerce_df, website_df)):
+        return None
+    if state['web'] is None:
+        print("No saved website event state. Falling back to a full rebuild.")
+        return None
+
+    meta = state['meta']
+    crm_delta, crm_is_new, crm_removed = _split_delta(crm_df, state['crm_hashes'], 'crm', meta)
+    ecommerce_delta, _, ecommerce_removed = _split_delta(ecommerce_df, state['ecommerce_hashes'], 'ecommerce', meta)
+    website_delta, _, website_removed = _split_delta(website_df, state['website_hashes'], 'website', meta)
+
+    if ecommerce_removed or website_removed:
+        print("E-commerce and website sources are append-only in incremental mode. Falling back to a full rebuild.")
+        return None
+
+    crm_hashes = row_hashes(crm_df)
+    crm_state = state['crm_cleaned']
+    removed_mask = surplus_rows(crm_state['_row_hash'].to_numpy(), crm_hashes)
+    removed_crm_rows = crm_state[removed_mask]
+    crm_state = crm_state[~removed_mask]
+    if not crm_delta.empty:
+        crm_delta_cleaned = data_cleansing.clean_crm_data(crm_delta)
+        crm_delta_cleaned['_row_hash'] = crm_hashes[crm_is_new]
+        crm_state = pd.concat([crm_state, crm_delta_cleaned], ignore_index=True)
+        # Keep source row order so duplicate CRM rows per email integrate in the same order as a full run.
+        positions = pd.Series(np.arange(len(crm_hashes)), index=crm_hashes)
+        positions = positions[~positions.index.duplicated()]
+        crm_state = crm_state.iloc[np.argsort(crm_state['_row_hash'].map(positions).to_numpy(), kind='stable')]
+        crm_state = crm_state.reset_index(drop=True)
+    ecommerce_delta_cleaned = data_cleansing.clean_ecommerce_data(ecommerce_delta)
+    website_delta_cleaned = data_cleansing.clean_website_data(website_delta)
+    web_state = update_web_state(state['web'], website_delta_cleaned, as_of, web_window_days)
+
+    affected = set(removed_crm_rows['email_address'].dropna()) if 'email_address' in removed_crm_rows.columns else set()
+    if not crm_delta.empty:
+        affected.update(crm_delta_cleaned['email_address'].dropna())
+    if not ecommerce_delta_cleaned.empty:
+        affected.update(ecommerce_delta_cleaned['cust_email'].dropna())
+    if not website_delta_cleaned.empty:
+        affected.update(website_delta_cleaned['user_email'].dropna())
+
+    previous_df = pd.read_csv(config.OUTPUT_CSV_PATH, dtype={col: 'str' for col in STRING_360_COLUMNS},
+                              float_precision='round_trip')
+    previous_df = previous_df[[col for col in BASE_360_COLUMNS if col in previous_df.columns]]
+    if not affected:
+        print("No new or changed rows. Reusing previous Customer 360 state.")
+        return previous_df, crm_state, state['session_pairs'], web_state
+    # Customers already known under a provider-equivalent address must be reassigned together with the new one.
+    affected.update(entity_resolution.provider_equivalent_emails(affected, previous_df['email']))
+
+    print(f"Recomputing {len(affected)} affected customers...")
+    previous_aggs = previous_df.drop_duplicates(subset=['email']).set_index('email')
+    previous_aggs = previous_aggs.reindex(sorted(affected))
+    still_active = (previous_aggs[['num_orders', 'total_time_spent_seconds', 'num_sessions']].fillna(0) > 0).any(axis=1)
+
+    crm_affected = crm_state[crm_state['email_address'].isin(affected)]
+    present = set(previous_aggs.index[still_active]) | set(crm_affected['email_address'])
+    if not ecommerce_delta_cleaned.empty:
+        present.update(ecommerce_delta_cleaned['cust_email'].dropna())
+    if not website_delta_cleaned.empty:
+        present.update(website_delta_cleaned['user_email'].dropna())
+    present_emails = sorted(present)
+
+    master_delta = pd.DataFrame({'email': present_emails})
+    master_delta['master_customer_id'] = (
+        id_registry.assign_master_ids(present_emails, entity_resolution.email_cluster_labels(present_emails))[0]
+        if present_emails else []
+    )
+
+    delta_360 = schema_mapping.integrate_data(
+        master_delta, crm_affected.drop(columns=['_row_hash']), ecommerce_delta_cleaned, website_delta_cleaned
+    )
+
+    new_pairs = session_pair_hashes(website_delta_cleaned)
+    new_pairs_mask = ~new_pairs.isin(state['session_pairs']) & ~new_pairs.duplicated()
+    if not website_delta_cleaned.empty:
+        new_session_counts = website_delta_cleaned.loc[new_pairs_mask[new_pairs_mask].index, 'user_email'].value_counts()
+    else:
+        new_session_counts = pd.Series(dtype='int64')
+
+    if not delta_360.empty:
+        prev = previous_aggs.reindex(delta_360['email'])
+        for col in ['total_spend', 'num_orders', 'total_time_spent_seconds']:
+            delta_360[col] = delta_360[col].fillna(0).to_numpy() + prev[col].fillna(0).to_numpy()
+        delta_360['num_sessions'] = (
+            delta_360['email'].map(new_session_counts).fillna(0).to_numpy() + prev['num_sessions'].fillna(0).to_numpy()
+        )
+        delta_360['last_order_date'] = pd.concat([
+            pd.to_datetime(delta_360['last_order_date'], errors='coerce').reset_index(drop=True),
+            pd.to_datetime(prev['last_order_date'], errors='coerce').reset_index(drop=True),
+        ], axis=1).max(axis=1).to_numpy()
+
+    unaffected = previous_df[~previous_df['email'].isin(affected)]
+    customer_360_df = pd.concat([unaffected, delta_360[[col for col in previous_df.columns if col in delta_360.columns]]],
+                                ignore_index=True)
+    customer_360_df = customer_360_df.sort_values('email', kind='stable').reset_index(drop=True)
+    session_pairs = np.concatenate([state['session_pairs'], new_pairs[new_pairs_mask].to_numpy()])
+    print(f"Incremental update complete: {len(delta_360)} rows rewritten, {len(unaffected)} rows reused.")
+    return customer_360_df, crm_state, session_pairs, web_state
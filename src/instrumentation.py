@@ -0,0 +1,226 @@
+import cProfile
+import datetime
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from src import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class _State:
+    def __init__(self):
+        self.enabled = config.INSTRUMENTATION_ENABLED
+        self.profile = config.INSTRUMENTATION_PROFILE
+        self.tracemalloc = config.INSTRUMENTATION_TRACEMALLOC
+        self.run_id = None
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.sequence = itertools.count()
+
+_state = _State()
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def current_rss_mb():
+    # Resident set size right now; /proc is Linux-only, so elsewhere per-stage memory is not measured.
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class RssSampler:
+    # Polls RSS on a background thread while a stage runs, so its peak is measured against the RSS at the stage's
+    # start rather than read from the process-lifetime ru_maxrss.
+    def __init__(self, interval=config.INSTRUMENTATION_RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start_mb = self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb, rss)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        return False
+
+    def peak_delta_mb(self):
+        return None if self.start_mb is None else self.peak_mb - self.start_mb
+
+def is_enabled():
+    return _state.enabled
+
+def configure(enabled=None, profile=None, trace_memory=None):
+    if enabled is not None:
+        _state.enabled = enabled
+    if profile is not None:
+        _state.profile = profile
+    if trace_memory is not None:
+        _state.tracemalloc = trace_memory
+
+def start_run():
+    _state.run_id = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
+    _state.events = []
+    _state.sequence = itertools.count()
+    if _state.enabled and _state.tracemalloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _state.run_id
+
+def row_count(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    if isinstance(value, tuple):
+        counts = [row_count(item) for item in value]
+        return next((count for count in counts if count is not None), None)
+    return None
+
+def frame_memory_mb(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=config.INSTRUMENTATION_DEEP_MEMORY)
+        return float(np.sum(usage)) / (1024 * 1024)
+    if isinstance(value, tuple):
+        return next((mb for mb in (frame_memory_mb(item) for item in value) if mb is not None), None)
+    return None
+
+def record(kind, name, **fields):
+    event = {'run_id': _state.run_id, 'timestamp': time.time(), 'kind': kind, 'name': name,
+             'thread': threading.current_thread().name, **fields}
+    with _state.lock:
+        _state.events.append(event)
+    return event
+
+def record_stage(name, stage_metrics, result=None, inputs=()):
+    if not _state.enabled:
+        return
+    record('stage', name, wall_seconds=stage_metrics.get('wall_seconds'),
+           peak_rss_delta_mb=stage_metrics.get('peak_rss_delta_mb'),
+           cached=bool(stage_metrics.get('cached')), rows_in=sum(row_count(value) or 0 for value in inputs),
+           rows_out=row_count(result), output_memory_mb=frame_memory_mb(result))
+
+def record_pipeline(pipeline_metrics):
+    if _state.enabled:
+        record('pipeline', '_pipeline', **pipeline_metrics)
+
+def _profile_path(name):
+    # The same function can run several times per run (one load per source), so calls are numbered.
+    return os.path.join(config.METRICS_DIR, 'profiles', f"{_state.run_id}_{next(_state.sequence):03d}_{name}.prof")
+
+def instrument(func=None, name=None):
+    if func is None:
+        return lambda f: instrument(f, name)
+    event_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        depth = getattr(_state.local, 'depth', 0)
+        _state.local.depth = depth + 1
+        profiler = None
+        # Only the outermost instrumented call in a thread is profiled; cProfile cannot nest and
+        # tracemalloc keeps a single peak.
+        if _state.profile and depth == 0:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is active on a different thread
+                profiler = None
+        traced_before = None
+        if depth == 0 and tracemalloc.is_tracing():
+            traced_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - start
+            _state.local.depth = depth
+            if profiler is not None:
+                profiler.disable()
+        fields = {
+            'wall_seconds': wall,
+            'rows_in': sum(row_count(arg) or 0 for arg in args if isinstance(arg, (pd.DataFrame, pd.Series))),
+            'rows_out': row_count(result),
+            'output_memory_mb': frame_memory_mb(result),
+            'process_peak_rss_mb': peak_rss_mb(),
+            'depth': depth,
+        }
+        if traced_before is not None:
+            fields['tracemalloc_peak_mb'] = (tracemalloc.get_traced_memory()[1] - traced_before) / (1024 * 1024)
+        if profiler is not None:
+            fields['profile_path'] = _profile_path(event_name)
+            os.makedirs(os.path.dirname(fields['profile_path']), exist_ok=True)
+            profiler.dump_stats(fields['profile_path'])
+        record('function', event_name, **fields)
+        return result
+
+    return wrapper
+
+def finish_run(mode, log_path=config.METRICS_LOG_PATH, summary_path=config.METRICS_SUMMARY_PATH):
+    if not _state.enabled:
+        return None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    pipeline = [event for event in _state.events if event['kind'] == 'pipeline']
+    summary = {
+        'run_id': _state.run_id,
+        'mode': mode,
+        'finished_at': time.time(),
+        'pipeline': pipeline[-1] if pipeline else {},
+        'peak_rss_mb': peak_rss_mb(),
+        'events': [event for event in _state.events if event['kind'] != 'pipeline'],
+    }
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    # One JSON object per line, appended across runs; the summary file holds only the latest run.
+    with open(log_path, 'a') as f:
+        for event in _state.events:
+            f.write(json.dumps(event, default=str) + "\n")
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+    print(f"Pipeline metrics written to {summary_path}")
+    return summary
+
+def load_run_summary(summary_path=config.METRICS_SUMMARY_PATH):
+    if not os.path.exists(summary_path):
+        return None
+    with open(summary_path) as f:
+        return json.load(f)
+
+def load_run_history(log_path=config.METRICS_LOG_PATH):
+    if not os.path.exists(log_path):
+        return pd.DataFrame()
+    with open(log_path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
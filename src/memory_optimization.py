@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# Explicit read_csv dtypes for the memory-optimized mode. Text is read as Arrow-backed 'str', repeated
+# labels as categoricals; integer ids and counts are left to inference so a missing value cannot fail the load.
+SOURCE_DTYPES = {
+    'crm': {'full_name': 'str', 'email_address': 'str', 'phone': 'str', 'city': 'category', 'signup_date': 'str'},
+    'ecommerce': {'cust_email': 'str', 'product_name': 'category', 'order_date': 'str', 'order_value': 'float64',
+                  'shipping_address': 'str'},
+    'website': {'session_id': 'str', 'user_email': 'str', 'page_visited': 'category', 'visit_timestamp': 'str'},
+}
+SOURCE_DATE_COLUMNS = {
+    'crm': ['signup_date'],
+    'ecommerce': ['order_date'],
+    'website': ['visit_timestamp'],
+}
+COUNT_COLUMNS = ['num_orders', 'num_sessions']
+
+def enable_copy_on_write():
+    # pandas 3 always copies on write; pandas 2 needs the option so shallow copies stay safe.
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+def source_read_options(source):
+    return {'dtypes': SOURCE_DTYPES[source], 'date_columns': SOURCE_DATE_COLUMNS[source]}
+
+def parse_dates(df, date_columns):
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+    return df
+
+def integer_counts(df, columns=COUNT_COLUMNS):
+    for col in columns:
+        if col in df.columns and df[col].notna().all() and (df[col] % 1 == 0).all():
+            df[col] = df[col].astype('int64')
+    return df
+
+def bytes_per_row(df):
+    if df is None or len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(index=True, deep=True).sum()) / len(df)
+
+def memory_report(frames):
+    rows = []
+    for name, df in frames.items():
+        if isinstance(df, pd.DataFrame):
+            rows.append({'frame': name, 'rows': len(df), 'bytes_per_row': round(bytes_per_row(df), 1),
+                         'total_mb': round(df.memory_usage(index=True, deep=True).sum() / (1024 * 1024), 2)})
+    return pd.DataFrame(rows, columns=['frame', 'rows', 'bytes_per_row', 'total_mb'])
+
+def compare_reports(before, after):
+    report = before.merge(after, on='frame', how='left', suffixes=('_before', '_after'))
+    report['reduction'] = (1 - report['bytes_per_row_after'] / report['bytes_per_row_before'].replace(0, np.nan)).round(3)
+    return report[['frame', 'rows_before', 'bytes_per_row_before', 'bytes_per_row_after', 'reduction']]
@@ -0,0 +1,207 @@
+import glob
+import io
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pyarrow import ipc
+from src import config, data_cleansing, entity_resolution, id_registry, memory_optimization, schema_mapping, utils
+from src import web_analytics
+from src.instrumentation import instrument
+
+# source name -> (config path attribute, email column, cleaning function)
+SOURCES = {
+    'crm': ('CRM_DATA_PATH', 'email_address', data_cleansing.clean_crm_data),
+    'ecommerce': ('ECOMMERCE_DATA_PATH', 'cust_email', data_cleansing.clean_ecommerce_data),
+    'website': ('WEBSITE_LOGS_PATH', 'user_email', data_cleansing.clean_website_data),
+}
+
+def range_read_options(source, memory_optimized):
+    # Text columns are always read as 'str' so every byte range parses to the same dtypes; categoricals are
+    # built after a partition's ranges are combined, since per-range categories would not concatenate.
+    dtypes = memory_optimization.SOURCE_DTYPES[source]
+    if memory_optimized:
+        read_dtypes = {col: 'str' if dtype == 'category' else dtype for col, dtype in dtypes.items()}
+        categories = [col for col, dtype in dtypes.items() if dtype == 'category']
+        return read_dtypes, categories, memory_optimization.SOURCE_DATE_COLUMNS[source]
+    return {col: 'str' for col, dtype in dtypes.items() if dtype in ('str', 'category')}, [], []
+
+def byte_ranges(path, range_bytes=config.PARTITION_RANGE_BYTES, min_ranges=1):
+    with open(path, 'rb') as f:
+        data_start = len(f.readline())
+    size = os.path.getsize(path)
+    n_ranges = max(min_ranges, -(-(size - data_start) // range_bytes), 1)
+    bounds = [data_start + (size - data_start) * i // n_ranges for i in range(n_ranges + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _line_start_at_or_after(f, position):
+    # Records are one per line (no quoted newlines), so a range owns every line that starts inside it.
+    f.seek(position - 1)
+    f.readline()
+    return f.tell()
+
+def read_csv_range(path, names, start, end, dtypes):
+    with open(path, 'rb') as f:
+        first = _line_start_at_or_after(f, start)
+        last = _line_start_at_or_after(f, end)
+        if last <= first:
+            return None
+        f.seek(first)
+        data = f.read(last - first)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=dtypes)
+
+def partition_ids(emails, n_partitions, provider_rules=config.EMAIL_CANONICALIZATION):
+    # Rows are placed by canonical email key, so provider-equivalent addresses share a partition.
+    # Keys are computed and hashed once per distinct raw address.
+    codes, uniques = pd.factorize(emails)
+    keys = data_cleansing.canonicalize_emails(pd.Series(uniques, dtype='str'), provider_rules=provider_rules)['email_key']
+    hashed = (pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions).astype('int64')
+    return np.where(codes >= 0, hashed[np.maximum(codes, 0)], 0)
+
+def _write_table(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(table, pd.DataFrame):
+        table = utils.to_arrow_table(table)
+    # Uncompressed Arrow IPC files are memory-mapped by the reader instead of being pickled between processes.
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+def _read_tables(paths):
+    frames = [utils.load_columnar_table(path).to_pandas() for path in paths]
+    if not frames:
+        return None
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+def _split_range(task):
+    source, path, names, start, end, range_index, dtypes, email_col, n_partitions, provider_rules, work_dir = task
+    df = read_csv_range(path, names, start, end, dtypes)
+    if df is None or df.empty:
+        return source, 0
+    ids = partition_ids(df[email_col], n_partitions, provider_rules)
+    write_partitions(df, ids, n_partitions, work_dir, source, range_index)
+    return source, len(df)
+
+def write_partitions(df, ids, n_partitions, work_dir, source, file_index):
+    # One take into partition order, then each partition is a zero-copy slice of the sorted table.
+    table = utils.to_arrow_table(df).take(np.argsort(ids, kind='stable'))
+    counts = np.bincount(ids, minlength=n_partitions)
+    offset = 0
+    for partition, count in enumerate(counts):
+        if count:
+            _write_table(table.slice(offset, count),
+                         os.path.join(work_dir, source, f"{partition:04d}", f"{file_index:06d}.arrow"))
+        offset += count
+
+def load_partition(work_dir, source, partition, categories=(), date_columns=()):
+    df = _read_tables(sorted(glob.glob(os.path.join(work_dir, source, f"{partition:04d}", "*.arrow"))))
+    if df is None:
+        return None
+    memory_optimization.parse_dates(df, date_columns)
+    for col in categories:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def _process_partition(task):
+    partition, work_dir, read_options, registry_path, as_of, web_window_days = task
+    output_dir = os.path.join(work_dir, 'output', f"{partition:04d}")
+    cleaned = {}
+    for source, (_, email_col, clean) in SOURCES.items():
+        _, categories, date_columns = read_options[source]
+        cleaned[source] = clean(load_partition(work_dir, source, partition, categories, date_columns), verbose=False)
+    aggregates = {
+        'ecommerce': schema_mapping.ecommerce_email_aggregates(cleaned['ecommerce']),
+        'website': schema_mapping.website_email_aggregates(cleaned['website']),
+        'web_features': web_analytics.sessionize_web_logs(cleaned['website'], as_of, web_window_days, verbose=False),
+    }
+
+    # Provider-equivalent addresses share a partition, so each partition resolves its own master IDs.
+    emails = [email for source, (_, email_col, _) in SOURCES.items() if email_col in cleaned[source].columns
+              for email in cleaned[source][email_col].dropna().unique()]
+    master_customers, to_register, new_entities, merged = entity_resolution.resolve_master_customer_ids(
+        emails, registry_path)
+    outputs = {'master': None, 'to_register': None, 'crm': None, 'ecommerce': None, 'website': None,
+               'web_features': None, 'new_entities': new_entities, 'merged': merged}
+    if not master_customers.empty:
+        outputs['master'] = os.path.join(output_dir, 'master.arrow')
+        _write_table(master_customers, outputs['master'])
+    if to_register:
+        outputs['to_register'] = os.path.join(output_dir, 'to_register.arrow')
+        _write_table(pd.DataFrame(to_register, columns=['email', 'master_customer_id']), outputs['to_register'])
+    if not cleaned['crm'].empty:
+        outputs['crm'] = os.path.join(output_dir, 'crm.arrow')
+        _write_table(cleaned['crm'], outputs['crm'])
+    for source, agg in aggregates.items():
+        if agg is not None:
+            outputs[source] = os.path.join(output_dir, f"{source}_agg.arrow")
+            _write_table(agg, outputs[source])
+    return outputs
+
+def _map(pool, func, tasks):
+    return pool.map(func, tasks) if pool is not None else map(func, tasks)
+
+@instrument
+def build_customer_360_partitioned(memory_optimized=config.MEMORY_OPTIMIZED, n_partitions=config.PARTITION_COUNT,
+                                   workers=config.PARTITION_WORKERS, work_dir=config.PARTITION_DIR,
+                                   registry_path=config.ID_REGISTRY_PATH, as_of=config.ENRICHMENT_AS_OF,
+                                   web_window_days=config.WEB_WINDOW_DAYS):
+    print(f"\nBuilding Customer 360 over {n_partitions} email-hash partitions on a process pool of {workers}...")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    read_options = {source: range_read_options(source, memory_optimized) for source in SOURCES}
+    split_tasks = []
+    for source, (path_attr, email_col, _) in SOURCES.items():
+        path = getattr(config, path_attr)
+        if not os.path.exists(path):
+            print(f"Error loading data: {path} not found.")
+            continue
+        names = pd.read_csv(path, nrows=0).columns.tolist()
+        for range_index, (start, end) in enumerate(byte_ranges(path, min_ranges=workers)):
+            split_tasks.append((source, path, names, start, end, range_index, read_options[source][0],
+                                email_col, n_partitions, config.EMAIL_CANONICALIZATION, work_dir))
+
+    if registry_path is not None:
+        # Create the registry table up front; workers only read it and the coordinator writes new IDs.
+        id_registry.open_registry(registry_path).close()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        rows = dict.fromkeys(SOURCES, 0)
+        for source, n_rows in _map(pool, _split_range, split_tasks):
+            rows[source] += n_rows
+        print(f"Partitioned {rows['crm']} CRM, {rows['ecommerce']} e-commerce and {rows['website']} website rows "
+              f"from {len(split_tasks)} byte ranges.")
+        outputs = list(_map(pool, _process_partition,
+                            [(partition, work_dir, read_options, registry_path, as_of, web_window_days)
+                             for partition in range(n_partitions)]))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Partitions hold disjoint emails, so combining them is a concatenation; registry writes, the join onto
+    # the master rows, enrichment (global RFM ranks) and segmentation then run once over customer-level data.
+    combined = {name: _read_tables([output[name] for output in outputs if output[name] is not None])
+                for name in ('master', 'to_register', 'crm', 'ecommerce', 'website', 'web_features')}
+    shutil.rmtree(work_dir, ignore_errors=True)
+    crm_df = combined['crm']
+    if crm_df is not None:
+        for col in read_options['crm'][1]:
+            if col in crm_df.columns:
+                crm_df[col] = crm_df[col].astype('category')
+
+    print("\nResolving Entities (Email-based, partitioned)...")
+    master_customers = combined['master']
+    if master_customers is None:
+        master_customers = pd.DataFrame(columns=['email', 'master_customer_id'])
+    master_customers = master_customers.sort_values('email', ignore_index=True)
+    if combined['to_register'] is not None:
+        # Registered in the single-process (sorted email) order so registry sequence numbers match it.
+        to_register = combined['to_register'].sort_values('email')
+        id_registry.register_master_ids(list(zip(to_register['email'], to_register['master_customer_id'])),
+                                        registry_path)
+    entity_resolution.report_master_customer_ids(master_customers, sum(output['new_entities'] for output in outputs),
+                                                 sum(output['merged'] for output in outputs))
+    customer_360_df = schema_mapping.integrate_data(
+        master_customers, crm_df, None, None, ecommerce_agg=combined['ecommerce'], website_agg=combined['website'],
+        integer_counts=memory_optimized
+    )
+    return web_analytics.add_web_features(customer_360_df, combined['web_features'])
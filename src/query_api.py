@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from src import config, utils
+
+def find_output_path():
+    # The most recently written output wins, so a later CSV-only run is not shadowed by an older Arrow file.
+    # save_customer_360 writes the CSV first and the Arrow output last, so once a run finishes its typed output is
+    # the newest; the CSV is only served (with the same typed schema) when it is strictly newer.
+    paths = [path for path in (config.OUTPUT_ARROW_PATH, config.OUTPUT_PARQUET_PATH, config.OUTPUT_CSV_PATH)
+             if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime, default=None)
+
+def _json_column(series):
+    # Object arrays of plain Python values (None for missing) so a row serializes without per-request conversion.
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+    values = series.astype(object).to_numpy(copy=True)
+    values[pd.isna(series).to_numpy()] = None
+    return values
+
+class _KeyIndex:
+    # key -> integer code in a dict; the row positions for each code are a slice of one sorted array.
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(keys)
+        self.order = np.argsort(codes, kind='stable')[np.count_nonzero(codes < 0):]
+        self.bounds = np.searchsorted(codes[self.order], np.arange(len(uniques) + 1))
+        self.codes = dict(zip(uniques.tolist(), range(len(uniques))))
+
+    def rows(self, key):
+        code = self.codes.get(key)
+        return () if code is None else self.order[self.bounds[code]:self.bounds[code + 1]]
+
+class CustomerSnapshot:
+    def __init__(self, df, source_path=None, source_mtime=None):
+        self.source_path = source_path
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+        self.row_count = len(df)
+        self.column_names = list(df.columns)
+        self.columns = [_json_column(df[col]) for col in self.column_names]
+        self.email_index = _KeyIndex(df['email'].astype('string').str.strip().str.lower()) if 'email' in df.columns else None
+        self.id_index = _KeyIndex(df['master_customer_id'].astype('string')) if 'master_customer_id' in df.columns else None
+        self.segments = (df['segment'].astype('string').fillna('Unknown').to_numpy(dtype=object)
+                         if 'segment' in df.columns else None)
+        self.is_vip = df['is_vip'].fillna(False).astype(bool).to_numpy() if 'is_vip' in df.columns else None
+        self._filtered_rows = {}
+
+    @classmethod
+    def load(cls, path):
+        stat_mtime = os.path.getmtime(path)
+        df = utils.load_columnar(path) if not path.endswith('.csv') else utils.load_customer_360_csv(path)
+        return cls(df, path, stat_mtime)
+
+    def record(self, row):
+        return {col: values[row] for col, values in zip(self.column_names, self.columns)}
+
+    def lookup_email(self, email):
+        if self.email_index is None:
+            return []
+        return [self.record(row) for row in self.email_index.rows((email or "").strip().lower())]
+
+    def lookup_id(self, master_customer_id):
+        if self.id_index is None:
+            return []
+        return [self.record(row) for row in self.id_index.rows(master_customer_id)]
+
+    def filtered_rows(self, segment=None, is_vip=None):
+        key = (segment, is_vip)
+        if key not in self._filtered_rows:
+            # Filter results are memoized per snapshot; a reload starts from an empty memo.
+            mask = np.ones(self.row_count, dtype=bool)
+            if segment is not None:
+                mask &= self.segments == segment if self.segments is not None else False
+            if is_vip is not None:
+                mask &= self.is_vip == is_vip if self.is_vip is not None else False
+            self._filtered_rows[key] = np.flatnonzero(mask)
+        return self._filtered_rows[key]
+
+    def segment_counts(self):
+        if self.segments is None:
+            return {}
+        values, counts = np.unique(self.segments, return_counts=True)
+        return {str(value): int(count) for value, count in zip(values, counts)}
+
+class SnapshotHolder:
+    def __init__(self, path=None):
+        self.path = path
+        self.snapshot = None
+        self._lock = asyncio.Lock()
+
+    def _current_path(self):
+        return self.path or find_output_path()
+
+    async def reload(self, force=False):
+        async with self._lock:
+            path = self._current_path()
+            if path is None or not os.path.exists(path):
+                return False
+            mtime = os.path.getmtime(path)
+            if not force and self.snapshot is not None and self.snapshot.source_path == path \
+                    and self.snapshot.source_mtime == mtime:
+                return False
+            try:
+                # Build the new snapshot off the event loop; requests keep reading the old one until the swap.
+                snapshot = await asyncio.to_thread(CustomerSnapshot.load, path)
+            except Exception as e:
+                print(f"Could not load {path}: {e}. Keeping the current snapshot.")
+                return False
+            self.snapshot = snapshot
+            print(f"Loaded {snapshot.row_count} customers from {path}")
+            return True
+
+    async def watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload()
+
+def _error(message, status_code):
+    return JSONResponse({'error': message}, status_code=status_code)
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+def _is_string_list(value):
+    return value is None or (isinstance(value, list) and all(isinstance(item, str) for item in value))
+
+def _parse_int(value, default, minimum, maximum):
+    try:
+        return min(max(int(value), minimum), maximum) if value is not None else default
+    except ValueError:
+        return default
+
+def create_app(path=None, reload_interval=config.API_RELOAD_INTERVAL_SECONDS):
+    holder = SnapshotHolder(path)
+
+    def current_snapshot():
+        return holder.snapshot
+
+    async def health(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded. Run main.py first.", 503)
+        return JSONResponse({'status': 'ok', 'rows': snapshot.row_count, 'source': snapshot.source_path,
+                             'loaded_at': snapshot.loaded_at})
+
+    async def by_email(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded.", 503)
+        records = snapshot.lookup_email(request.path_params['email'])
+        return JSONResponse({'customers': records}) if records else _error("Customer not found.", 404)
+
+    async def by_id(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded.", 503)
+        records = snapshot.lookup_id(request.path_params['master_customer_id'])
+        return JSONResponse({'customers': records}) if records else _error("Customer not found.", 404)
+
+    async def batch_lookup(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded.", 503)
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error("Request body must be JSON.", 400)
+        if not isinstance(body, dict):
+            return _error("Request body must be a JSON object.", 400)
+        emails, ids = body.get('emails'), body.get('master_customer_ids')
+        if not _is_string_list(emails) or not _is_string_list(ids):
+            return _error("'emails' and 'master_customer_ids' must be lists of strings.", 400)
+        emails, ids = emails or [], ids or []
+        if len(emails) + len(ids) > config.API_MAX_BATCH_SIZE:
+            return _error(f"At most {config.API_MAX_BATCH_SIZE} keys per batch.", 400)
+        return JSONResponse({
+            'emails': {email: snapshot.lookup_email(email) for email in emails},
+            'master_customer_ids': {customer_id: snapshot.lookup_id(customer_id) for customer_id in ids},
+        })
+
+    async def list_customers(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded.", 503)
+        params = request.query_params
+        page = _parse_int(params.get('page'), 0, 0, 2 ** 31)
+        page_size = _parse_int(params.get('page_size'), config.API_DEFAULT_PAGE_SIZE, 1, config.API_MAX_PAGE_SIZE)
+        rows = snapshot.filtered_rows(params.get('segment'), _parse_bool(params.get('is_vip')))
+        page_rows = rows[page * page_size:(page + 1) * page_size]
+        return JSONResponse({'total': int(len(rows)), 'page': page, 'page_size': page_size,
+                             'customers': [snapshot.record(row) for row in page_rows]})
+
+    async def segments(request):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return _error("No pipeline output loaded.", 503)
+        return JSONResponse({'segments': snapshot.segment_counts()})
+
+    async def reload(request):
+        reloaded = await holder.reload(force=True)
+        snapshot = current_snapshot()
+        return JSONResponse({'reloaded': reloaded, 'rows': snapshot.row_count if snapshot else 0})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await holder.reload()
+        watcher = asyncio.create_task(holder.watch(reload_interval)) if reload_interval else None
+        yield
+        if watcher is not None:
+            watcher.cancel()
+
+    routes = [
+        Route('/health', health),
+        Route('/customers', list_customers),
+        Route('/customers/batch', batch_lookup, methods=['POST']),
+        Route('/customers/email/{email}', by_email),
+        Route('/customers/id/{master_customer_id}', by_id),
+        Route('/segments', segments),
+        Route('/reload', reload, methods=['POST']),
+    ]
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.holder = holder
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve Customer 360 lookups over HTTP.")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--path", default=None, help="Pipeline output to serve (defaults to the newest Arrow/Parquet/CSV output).")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.path), host=args.host, port=args.port, log_level="warning")
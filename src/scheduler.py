@@ -0,0 +1,154 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from src import config, stage_cache
+from src.instrumentation import RssSampler, peak_rss_mb, record_pipeline, record_stage
+
+class Stage:
+    def __init__(self, name, func, deps=(), kwargs=None, params=(), outputs=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.kwargs = kwargs or {}
+        self.params = tuple(params)  # config names the stage output depends on, part of its cache key
+        # Files the stage writes as a side effect; the output is cached under their contents after the run.
+        self.outputs = tuple(outputs)
+
+class _StageResults(dict):
+    # Cached outputs are read from disk only when a stage that has to run (or the caller) needs them.
+    def __init__(self, initial, loaders):
+        super().__init__(initial)
+        self.loaders = loaders
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self.loaders
+
+    def __missing__(self, name):
+        if name not in self.loaders:
+            raise KeyError(name)
+        value = self.loaders.pop(name)()
+        self[name] = value
+        return value
+
+def _run_stage(func, args, kwargs):
+    # With the thread executor, overlapping stages share one process, so their RSS deltas include each other.
+    start = time.perf_counter()
+    with RssSampler() as rss:
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start, rss.peak_delta_mb()
+
+def _validate(stages, done):
+    names = set()
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        names.add(stage.name)
+    names.update(done)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+def critical_path_seconds(stages, metrics):
+    finish = {}
+    for stage in stages:
+        upstream = max((finish.get(dep, 0.0) for dep in stage.deps), default=0.0)
+        finish[stage.name] = upstream + metrics.get(stage.name, {}).get('wall_seconds', 0.0)
+    return max(finish.values(), default=0.0)
+
+def cache_keys(stages, initial_results, known=None):
+    keys = {name: stage_cache.fingerprint(value) for name, value in initial_results.items()}
+    keys.update(known or {})
+    by_name = {stage.name: stage for stage in stages}
+
+    def key_for(name):
+        if name not in keys:
+            stage = by_name[name]
+            keys[name] = stage_cache.stage_key(stage, [key_for(dep) for dep in stage.deps])
+        return keys[name]
+
+    for stage in stages:
+        key_for(stage.name)
+    return keys
+
+def run_stages(stages, workers=config.PIPELINE_WORKERS, executor=config.PIPELINE_EXECUTOR, initial_results=None,
+               cache=None):
+    initial_results = dict(initial_results or {})
+    _validate(stages, initial_results)
+    metrics = {}
+    keys = cache_keys(stages, initial_results) if cache is not None else {}
+    loaders = {}
+    for stage in stages:
+        if stage.name not in initial_results and cache is not None and cache.contains(keys[stage.name]):
+            loaders[stage.name] = lambda key=keys[stage.name]: cache.get(key)
+            metrics[stage.name] = {'wall_seconds': 0.0, 'peak_rss_delta_mb': None, 'cached': True}
+            record_stage(stage.name, metrics[stage.name])
+    results = _StageResults(initial_results, loaders)
+    pending = [stage for stage in stages if stage.name not in results]
+    start = time.perf_counter()
+
+    def finish(stage, result, wall, peak):
+        results[stage.name] = result
+        metrics[stage.name] = {'wall_seconds': wall, 'peak_rss_delta_mb': peak}
+        record_stage(stage.name, metrics[stage.name], result, (results[dep] for dep in stage.deps))
+        if cache is not None:
+            if stage.outputs:
+                # A hit is only valid while the files the stage wrote are unchanged, so the output is stored under
+                # their post-run contents and the stages still to run are rekeyed on that. A deleted registry or
+                # model file then misses and the stage runs again to recreate it.
+                keys.update(cache_keys(stages, initial_results, {name: keys[name] for name in keys
+                                                                 if name in results and name != stage.name}))
+            cache.put(keys[stage.name], result)
+
+    if workers <= 1:
+        # Sequential mode runs stages in declaration order, which must already be topological.
+        for stage in pending:
+            args = [results[dep] for dep in stage.deps]
+            finish(stage, *_run_stage(stage.func, args, stage.kwargs))
+    else:
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                ready = [stage for stage in pending if all(dep in results for dep in stage.deps)]
+                for stage in ready:
+                    args = [results[dep] for dep in stage.deps]
+                    running[pool.submit(_run_stage, stage.func, args, stage.kwargs)] = stage
+                    pending.remove(stage)
+                if not running:
+                    raise ValueError(f"Unsatisfiable stage dependencies: {[stage.name for stage in pending]}")
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    finish(stage, *future.result())
+
+    metrics['_pipeline'] = {
+        'wall_seconds': time.perf_counter() - start,
+        'sum_of_stages_seconds': sum(m['wall_seconds'] for m in metrics.values()),
+        'critical_path_seconds': critical_path_seconds(stages, metrics),
+        'cached_stages': sum(1 for m in metrics.values() if m.get('cached')),
+        'workers': workers,
+        'executor': executor if workers > 1 else 'sequential',
+        'process_peak_rss_mb': peak_rss_mb(),
+    }
+    record_pipeline(metrics['_pipeline'])
+    return results, metrics
+
+def print_stage_report(metrics):
+    print("\n--- Pipeline Stage Report ---")
+    for name, stage_metrics in metrics.items():
+        if name.startswith('_'):
+            continue
+        if stage_metrics.get('cached'):
+            print(f"{name:<20}   cached")
+            continue
+        peak = stage_metrics['peak_rss_delta_mb']
+        peak_str = f"+{peak:,.1f} MB" if peak is not None else "n/a"
+        print(f"{name:<20} {stage_metrics['wall_seconds']:>8.3f}s   peak RSS {peak_str}")
+    summary = metrics.get('_pipeline')
+    if summary:
+        print(f"Total wall time: {summary['wall_seconds']:.3f}s "
+              f"(sum of stages {summary['sum_of_stages_seconds']:.3f}s, "
+              f"critical path {summary['critical_path_seconds']:.3f}s, "
+              f"{summary['cached_stages']} cached, "
+              f"{summary['workers']} workers, {summary['executor']})")
+    print("--- End Stage Report ---")
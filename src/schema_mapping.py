@@ -1,63 +1,182 @@
+import numpy as np
 import pandas as pd
+from src import memory_optimization
+from src.instrumentation import instrument
 
-def integrate_data(master_customer_df, crm_df, ecommerce_df, website_df):
+ECOMMERCE_AGG_COLUMNS = ['total_spend', 'last_order_date', 'num_orders']
+WEBSITE_AGG_COLUMNS = ['total_time_spent_seconds', 'num_sessions']
+REQUIRED_ECOMMERCE_COLUMNS = ['email', 'order_value', 'order_date', 'order_id']
+REQUIRED_WEBSITE_COLUMNS = ['email', 'time_spent_seconds', 'session_id']
+
+def _has_required_columns(df, required_cols, source_name):
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        print(f"Skipping {source_name} aggregation due to missing columns: {missing_cols}")
+        return False
+    return True
+
+def aggregate_ecommerce(ecommerce_df):
+    ecommerce_df_renamed = ecommerce_df.rename(columns={'cust_email': 'email'})
+    if not _has_required_columns(ecommerce_df_renamed, REQUIRED_ECOMMERCE_COLUMNS, "e-commerce"):
+        return None
+    return ecommerce_df_renamed.groupby('email').agg(
+        total_spend=('order_value', 'sum'),
+        last_order_date=('order_date', 'max'),
+        num_orders=('order_id', 'count')
+    ).reset_index()
+
+def aggregate_website(website_df):
+    website_df_renamed = website_df.rename(columns={'user_email': 'email'})
+    if not _has_required_columns(website_df_renamed, REQUIRED_WEBSITE_COLUMNS, "website"):
+        return None
+    return website_df_renamed.groupby('email').agg(
+        total_time_spent_seconds=('time_spent_seconds', 'sum'),
+        num_sessions=('session_id', 'nunique')
+    ).reset_index()
+
+def _take(values, indexer):
+    # With allow_fill, -1 becomes NaN and ints are promoted to float only when a -1 is present, as in a left merge.
+    return pd.api.extensions.take(pd.Series(values).array, indexer, allow_fill=True)
+
+def _crm_row_indexers(row_codes, crm_codes, n_keys):
+    # Left-join expansion: each master row repeats once per CRM row with its email (in CRM order), or once with -1.
+    matched = crm_codes >= 0
+    counts = np.bincount(crm_codes[matched], minlength=n_keys)
+    crm_order = np.flatnonzero(matched)[np.argsort(crm_codes[matched], kind='stable')]
+    group_starts = np.cumsum(counts) - counts
+
+    row_matches = np.where(row_codes >= 0, counts[np.maximum(row_codes, 0)], 0)
+    repeats = np.maximum(row_matches, 1)
+    master_indexer = np.repeat(np.arange(len(row_codes)), repeats)
+    offsets = np.arange(len(master_indexer)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+
+    crm_indexer = np.full(len(master_indexer), -1, dtype='int64')
+    has_match = np.repeat(row_matches > 0, repeats)
+    crm_indexer[has_match] = crm_order[group_starts[row_codes[master_indexer][has_match]] + offsets[has_match]]
+    return master_indexer, crm_indexer
+
+def _ecommerce_aggregates(ecommerce_df, email_keys):
+    codes = email_keys.get_indexer(ecommerce_df['email'])
+    rows = codes >= 0
+    agg = pd.DataFrame({'total_spend': ecommerce_df.loc[rows, 'order_value'].groupby(codes[rows]).sum()})
+    # Sorted factorize codes preserve value order, so the latest date is an integer max per email.
+    date_codes, date_uniques = pd.factorize(ecommerce_df['order_date'], sort=True)
+    latest = np.full(len(email_keys), -1, dtype='int64')
+    np.maximum.at(latest, codes[rows], date_codes[rows])
+    agg['last_order_date'] = _take(date_uniques, latest[agg.index])
+    has_order_id = rows & ecommerce_df['order_id'].notna().to_numpy()
+    agg['num_orders'] = np.bincount(codes[has_order_id], minlength=len(email_keys))[agg.index]
+    return agg.index.to_numpy(), agg
+
+def _website_aggregates(website_df, email_keys):
+    codes = email_keys.get_indexer(website_df['email'])
+    rows = codes >= 0
+    agg = pd.DataFrame({
+        'total_time_spent_seconds': website_df.loc[rows, 'time_spent_seconds'].groupby(codes[rows]).sum(),
+    })
+    # Distinct (email code, session code) pairs packed into one int64 give nunique per email via bincount.
+    session_codes, session_uniques = pd.factorize(website_df['session_id'])
+    n_sessions = max(len(session_uniques), 1)
+    with_session = rows & (session_codes >= 0)
+    pairs = np.unique(codes[with_session].astype('int64') * n_sessions + session_codes[with_session])
+    agg['num_sessions'] = np.bincount(pairs // n_sessions, minlength=len(email_keys))[agg.index]
+    return agg.index.to_numpy(), agg
+
+def _precomputed_aggregates(agg_df, email_keys):
+    codes = email_keys.get_indexer(agg_df['email'])
+    matched = codes >= 0
+    return codes[matched], agg_df.loc[matched].drop(columns=['email']).reset_index(drop=True)
+
+def _source_aggregates(agg_df, source_df, email_col, required_cols, source_name, aggregate, email_keys):
+    if agg_df is not None:
+        return _precomputed_aggregates(agg_df, email_keys)
+    if source_df is None or source_df.empty or email_col not in source_df.columns:
+        return None
+    source_df_renamed = source_df.rename(columns={email_col: 'email'})
+    if not _has_required_columns(source_df_renamed, required_cols, source_name):
+        return None
+    return aggregate(source_df_renamed, email_keys)
+
+def _email_keyed_aggregates(source_df, email_col, required_cols, source_name, aggregate):
+    # Per-email aggregates with an 'email' column, the precomputed form integrate_data accepts.
+    if source_df is None or source_df.empty or email_col not in source_df.columns:
+        return None
+    source_df_renamed = source_df.rename(columns={email_col: 'email'})
+    if not _has_required_columns(source_df_renamed, required_cols, source_name):
+        return None
+    email_keys = pd.Index(source_df_renamed['email'].dropna().unique())
+    agg_codes, agg = aggregate(source_df_renamed, email_keys)
+    agg = agg.reset_index(drop=True)
+    agg.insert(0, 'email', email_keys[agg_codes].to_numpy())
+    return agg
+
+def ecommerce_email_aggregates(ecommerce_df):
+    return _email_keyed_aggregates(ecommerce_df, 'cust_email', REQUIRED_ECOMMERCE_COLUMNS, "e-commerce",
+                                   _ecommerce_aggregates)
+
+def website_email_aggregates(website_df):
+    return _email_keyed_aggregates(website_df, 'user_email', REQUIRED_WEBSITE_COLUMNS, "website",
+                                   _website_aggregates)
+
+def _add_aggregate_columns(columns, agg_codes, agg, output_codes, n_keys):
+    positions = np.full(n_keys, -1, dtype='int64')
+    positions[agg_codes] = np.arange(len(agg_codes))
+    agg_indexer = np.where(output_codes >= 0, positions[np.maximum(output_codes, 0)], -1)
+    for col in agg.columns:
+        columns[col] = _take(agg[col], agg_indexer)
+
+@instrument
+def integrate_data(master_customer_df, crm_df, ecommerce_df, website_df, ecommerce_agg=None, website_agg=None,
+                   integer_counts=False):
     print("\nIntegrating data...")
     if master_customer_df is None or master_customer_df.empty:
         print("Master customer DataFrame is empty. Cannot integrate.")
         return pd.DataFrame()
 
-    customer_360_df = master_customer_df.copy()
+    # Emails are factorized once into integer codes shared by every source; the 360 frame is then
+    # assembled column by column from take indexers instead of successive merges on the email strings.
+    row_codes, email_uniques = pd.factorize(master_customer_df['email'])
+    email_keys = pd.Index(email_uniques)
+    n_keys = len(email_keys)
+    master_indexer = np.arange(len(master_customer_df))
+    crm_columns = {}
 
     if crm_df is not None and not crm_df.empty and 'email_address' in crm_df.columns:
         crm_df_renamed = crm_df.rename(columns={'email_address': 'email', 'city': 'crm_city'})
-        crm_cols_to_merge = ['email', 'first_name', 'last_name', 'full_name_standardized', 'phone_standardized', 'crm_city', 'signup_date']
+        crm_cols_to_merge = ['first_name', 'last_name', 'full_name_standardized', 'phone_standardized', 'crm_city', 'signup_date']
         crm_cols_to_merge = [col for col in crm_cols_to_merge if col in crm_df_renamed.columns]
-        if 'email' in crm_cols_to_merge:
-             customer_360_df = pd.merge(customer_360_df, crm_df_renamed[crm_cols_to_merge], on='email', how='left')
-
-    required_ecom_cols = ['email', 'order_value', 'order_date', 'order_id']
-    if ecommerce_df is not None and not ecommerce_df.empty and 'cust_email' in ecommerce_df.columns:
-        ecommerce_df_renamed = ecommerce_df.rename(columns={'cust_email': 'email'})
-        if all(col in ecommerce_df_renamed.columns for col in required_ecom_cols):
-            ecommerce_agg = ecommerce_df_renamed.groupby('email').agg(
-                total_spend=('order_value', 'sum'),
-                last_order_date=('order_date', 'max'),
-                num_orders=('order_id', 'count')
-            ).reset_index()
-            customer_360_df = pd.merge(customer_360_df, ecommerce_agg, on='email', how='left')
-        else:
-            missing_cols = [col for col in required_ecom_cols if col not in ecommerce_df_renamed.columns]
-            print(f"Skipping e-commerce aggregation due to missing columns: {missing_cols}")
-            customer_360_df['total_spend'] = 0
-            customer_360_df['last_order_date'] = pd.NaT
-            customer_360_df['num_orders'] = 0
+        master_indexer, crm_indexer = _crm_row_indexers(
+            row_codes, email_keys.get_indexer(crm_df_renamed['email']), n_keys)
+        crm_columns = {col: _take(crm_df_renamed[col], crm_indexer) for col in crm_cols_to_merge}
+
+    columns = {col: _take(master_customer_df[col], master_indexer) for col in master_customer_df.columns}
+    columns.update(crm_columns)
+    output_codes = row_codes[master_indexer]
+
+    ecommerce = _source_aggregates(ecommerce_agg, ecommerce_df, 'cust_email', REQUIRED_ECOMMERCE_COLUMNS,
+                                   "e-commerce", _ecommerce_aggregates, email_keys)
+    if ecommerce is not None:
+        _add_aggregate_columns(columns, *ecommerce, output_codes, n_keys)
     else:
-        customer_360_df['total_spend'] = 0
-        customer_360_df['last_order_date'] = pd.NaT
-        customer_360_df['num_orders'] = 0
-
-    required_web_cols = ['email', 'time_spent_seconds', 'session_id']
-    if website_df is not None and not website_df.empty and 'user_email' in website_df.columns:
-        website_df_renamed = website_df.rename(columns={'user_email': 'email'})
-        if all(col in website_df_renamed.columns for col in required_web_cols):
-            website_agg = website_df_renamed.groupby('email').agg(
-                total_time_spent_seconds=('time_spent_seconds', 'sum'),
-                num_sessions=('session_id', 'nunique')
-            ).reset_index()
-            customer_360_df = pd.merge(customer_360_df, website_agg, on='email', how='left')
-        else:
-            missing_cols = [col for col in required_web_cols if col not in website_df_renamed.columns]
-            print(f"Skipping website aggregation due to missing columns: {missing_cols}")
-            customer_360_df['total_time_spent_seconds'] = 0
-            customer_360_df['num_sessions'] = 0
+        columns['total_spend'] = 0
+        columns['last_order_date'] = pd.NaT
+        columns['num_orders'] = 0
+
+    website = _source_aggregates(website_agg, website_df, 'user_email', REQUIRED_WEBSITE_COLUMNS,
+                                 "website", _website_aggregates, email_keys)
+    if website is not None:
+        _add_aggregate_columns(columns, *website, output_codes, n_keys)
     else:
-        customer_360_df['total_time_spent_seconds'] = 0
-        customer_360_df['num_sessions'] = 0
-    
+        columns['total_time_spent_seconds'] = 0
+        columns['num_sessions'] = 0
+
+    customer_360_df = pd.DataFrame(columns, index=pd.RangeIndex(len(master_indexer)))
     cols_to_fill_zero = ['total_spend', 'num_orders', 'total_time_spent_seconds', 'num_sessions']
     for col in cols_to_fill_zero:
-        if col in customer_360_df.columns:
+        if col in customer_360_df.columns and customer_360_df[col].hasnans:
             customer_360_df[col] = customer_360_df[col].fillna(0)
-            
+    if integer_counts:
+        memory_optimization.integer_counts(customer_360_df)
+
     print("Data integration complete.")
-    return customer_360_df
\ No newline at end of file
+    return customer_360_df
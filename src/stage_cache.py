@@ -0,0 +1,123 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import pandas as pd
+from src import config
+
+_file_digests = {}
+_code_versions = {}
+
+def _is_project_module(module):
+    path = getattr(module, '__file__', None)
+    return (path is not None and os.path.abspath(path).startswith(config.BASE_DIR + os.sep)
+            and 'site-packages' not in path and module is not config)
+
+def _project_modules(module, seen=None):
+    # Modules a stage function can reach through module globals; config is excluded because
+    # stages declare the config values they depend on explicitly.
+    seen = set() if seen is None else seen
+    if module.__name__ in seen:
+        return seen
+    seen.add(module.__name__)
+    for value in list(vars(module).values()):
+        candidate = value if inspect.ismodule(value) else sys.modules.get(getattr(value, '__module__', None) or '')
+        if candidate is not None and _is_project_module(candidate):
+            _project_modules(candidate, seen)
+    return seen
+
+def code_version(func):
+    module_name = func.__module__
+    if module_name not in _code_versions:
+        digest = hashlib.blake2b(digest_size=16)
+        for name in sorted(_project_modules(sys.modules[module_name])):
+            with open(sys.modules[name].__file__, 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read())
+        _code_versions[module_name] = digest.hexdigest()
+    return _code_versions[module_name]
+
+def file_digest(path):
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if cache_key not in _file_digests:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _file_digests[cache_key] = digest.hexdigest()
+    return _file_digests[cache_key]
+
+def fingerprint(value):
+    if isinstance(value, str) and os.path.isfile(value):
+        return f"file:{file_digest(value)}"
+    if isinstance(value, pd.DataFrame):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(list(value.dtypes.items())).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        return f"frame:{digest.hexdigest()}"
+    if value is None:
+        return "none"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k!r}:{fingerprint(v)}" for k, v in sorted(value.items())) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(fingerprint(v) for v in value) + "]"
+    return repr(value)
+
+def stage_key(stage, dep_keys):
+    parts = [
+        stage.name,
+        code_version(stage.func),
+        stage.func.__qualname__,
+        fingerprint(stage.kwargs),
+        fingerprint({name: getattr(config, name) for name in stage.params}),
+        fingerprint([f"file:{file_digest(path)}" if os.path.isfile(path) else f"missing:{path}"
+                     for path in stage.outputs]),
+        fingerprint(dep_keys),
+    ]
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=20).hexdigest()
+
+class StageCache:
+    def __init__(self, cache_dir=config.STAGE_CACHE_DIR, max_bytes=config.STAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def contains(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        path = self._path(key)
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        os.utime(path)  # mtime doubles as the LRU clock
+        return value
+
+    def put(self, key, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            print(f"Could not cache stage output {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((stat.st_mtime_ns, stat.st_size, file_name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, file_name))
+            total -= size
@@ -0,0 +1,143 @@
+import os
+import shutil
+import pandas as pd
+from src import config, data_cleansing, partitioned, schema_mapping, web_analytics
+
+ECOMMERCE_STREAM_DTYPES = {'order_id': 'str', 'cust_email': 'str', 'order_date': 'str', 'order_value': 'float64'}
+WEBSITE_STREAM_DTYPES = {'session_id': 'str', 'user_email': 'str', 'time_spent_seconds': 'float64'}
+WEB_EVENT_STREAM_DTYPES = {'user_email': 'str', 'page_visited': 'str', 'visit_timestamp': 'str'}
+
+def iter_csv_chunks(path, dtypes, chunksize=config.STREAM_CHUNK_SIZE):
+    # Only columns present in the header are requested, so a source missing one reaches the same
+    # missing-column checks as the in-memory path instead of failing in read_csv.
+    header = set(pd.read_csv(path, nrows=0).columns)
+    columns = [col for col in dtypes if col in header]
+    return pd.read_csv(path, usecols=columns, dtype={col: dtypes[col] for col in columns}, chunksize=chunksize)
+
+def _missing_columns(chunk, required, source_name):
+    missing = [col for col in required if col not in chunk.columns]
+    if missing:
+        print(f"Skipping {source_name} aggregation due to missing columns: {missing}")
+    return missing
+
+class _PartialAggregates:
+    # Per-chunk partial aggregates are kept as a list and merged with one groupby once they outgrow both
+    # compact_rows and the last merged result, so rows are regrouped a bounded number of times and the cost
+    # does not grow with customers x chunks. Without aggregations, partials are distinct rows (e.g. session pairs).
+    def __init__(self, keys, aggregations, compact_rows=config.STREAM_COMPACT_ROWS):
+        self.keys = keys
+        self.aggregations = aggregations
+        self.compact_rows = compact_rows
+        self.partials = []
+        self.pending_rows = 0
+        self.compacted_rows = 0
+
+    def add(self, partial):
+        self.partials.append(partial)
+        self.pending_rows += len(partial)
+        if self.pending_rows > max(self.compact_rows, 2 * self.compacted_rows):
+            self.compact()
+
+    def compact(self):
+        if len(self.partials) > 1 or (self.partials and self.aggregations is None):
+            merged = pd.concat(self.partials, ignore_index=True)
+            if self.aggregations is None:
+                merged = merged.drop_duplicates()
+            else:
+                merged = merged.groupby(self.keys).agg(self.aggregations).reset_index()
+            self.partials = [merged]
+        self.pending_rows = self.compacted_rows = sum(len(partial) for partial in self.partials)
+        return self.partials[0] if self.partials else None
+
+ECOMMERCE_FOLD = {'total_spend': 'sum', 'last_order_date': 'max', 'num_orders': 'sum'}
+
+def stream_ecommerce_aggregates(path=config.ECOMMERCE_DATA_PATH, chunksize=config.STREAM_CHUNK_SIZE,
+                                compact_rows=config.STREAM_COMPACT_ROWS):
+    if not os.path.exists(path):
+        print(f"Error loading data: {path} not found.")
+        return None
+    print(f"\nStreaming e-commerce aggregates from {path}...")
+    aggregates = _PartialAggregates('email', ECOMMERCE_FOLD, compact_rows)
+    rows = 0
+    for chunk in iter_csv_chunks(path, ECOMMERCE_STREAM_DTYPES, chunksize):
+        rows += len(chunk)
+        if 'cust_email' in chunk.columns:
+            chunk['cust_email'] = data_cleansing.standardize_email(chunk['cust_email'])
+        chunk_agg = schema_mapping.aggregate_ecommerce(chunk)
+        if chunk_agg is None:
+            return None
+        aggregates.add(chunk_agg)
+    running = aggregates.compact()
+    print(f"Folded {rows} e-commerce rows into {0 if running is None else len(running)} customers.")
+    return running
+
+def stream_website_aggregates(path=config.WEBSITE_LOGS_PATH, chunksize=config.STREAM_CHUNK_SIZE,
+                              compact_rows=config.STREAM_COMPACT_ROWS):
+    if not os.path.exists(path):
+        print(f"Error loading data: {path} not found.")
+        return None
+    print(f"\nStreaming website aggregates from {path}...")
+    time_spent = _PartialAggregates('email', {'total_time_spent_seconds': 'sum'}, compact_rows)
+    # Distinct (email, session_id) pairs are the mergeable state for nunique; memory follows sessions, not events.
+    session_pairs = _PartialAggregates(['email', 'session_id'], None, compact_rows)
+    rows = 0
+    for chunk in iter_csv_chunks(path, WEBSITE_STREAM_DTYPES, chunksize):
+        if _missing_columns(chunk, WEBSITE_STREAM_DTYPES, "website"):
+            return None
+        rows += len(chunk)
+        chunk['user_email'] = data_cleansing.standardize_email(chunk['user_email'])
+        chunk = chunk.rename(columns={'user_email': 'email', 'time_spent_seconds': 'total_time_spent_seconds'})
+        time_spent.add(chunk.groupby('email')['total_time_spent_seconds'].sum().reset_index())
+        session_pairs.add(chunk[['email', 'session_id']].dropna().drop_duplicates())
+
+    time_spent = time_spent.compact()
+    if time_spent is None:
+        return None
+    pairs = session_pairs.compact()
+    num_sessions = pairs.groupby('email').size() if pairs is not None else pd.Series(dtype='int64')
+
+    website_agg = pd.DataFrame({
+        'email': time_spent['email'],
+        'total_time_spent_seconds': time_spent['total_time_spent_seconds'].to_numpy(),
+        'num_sessions': num_sessions.reindex(time_spent['email'], fill_value=0).to_numpy(),
+    })
+    print(f"Folded {rows} website rows into {len(website_agg)} customers.")
+    return website_agg
+
+def stream_web_features(path=config.WEBSITE_LOGS_PATH, as_of=config.ENRICHMENT_AS_OF,
+                        window_days=config.WEB_WINDOW_DAYS, gap_minutes=config.WEB_SESSION_GAP_MINUTES,
+                        chunksize=config.STREAM_CHUNK_SIZE, n_partitions=config.PARTITION_COUNT,
+                        work_dir=os.path.join(config.PARTITION_DIR, 'web_events')):
+    # Sessions need every event of a customer in time order, so windowed events are spilled to email-hash
+    # partitions on disk and each partition is sessionized on its own; memory follows the largest partition.
+    if not os.path.exists(path):
+        print(f"Error loading data: {path} not found.")
+        return None
+    print(f"\nStreaming website events into {n_partitions} email-hash partitions from {path}...")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    rows = kept = 0
+    for chunk_index, chunk in enumerate(iter_csv_chunks(path, WEB_EVENT_STREAM_DTYPES, chunksize)):
+        if not {'user_email', 'visit_timestamp'} <= set(chunk.columns):
+            print("Website data is missing emails/timestamps. Skipping sessionization.")
+            return None
+        rows += len(chunk)
+        chunk['user_email'] = data_cleansing.standardize_email(chunk['user_email'])
+        events = web_analytics.prepare_web_events(chunk, as_of, window_days)
+        kept += len(events)
+        if events.empty:
+            continue
+        ids = partitioned.partition_ids(events['email'], n_partitions)
+        partitioned.write_partitions(events, ids, n_partitions, work_dir, 'website', chunk_index)
+
+    features = []
+    for partition in range(n_partitions):
+        events = partitioned.load_partition(work_dir, 'website', partition)
+        if events is not None:
+            features.append(web_analytics.session_features(events, gap_minutes))
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if not features:
+        return None
+    web_features = pd.concat(features, ignore_index=True)
+    print(f"Sessionized {kept} of {rows} website events into {int(web_features['web_sessions'].sum())} sessions "
+          f"for {len(web_features)} visitors.")
+    return web_features
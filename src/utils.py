@@ -1,8 +1,139 @@
+import os
 import pandas as pd
 
+CUSTOMER_360_SCHEMA = {
+    'email': 'string',
+    'master_customer_id': 'string',
+    'first_name': 'string',
+    'last_name': 'string',
+    'full_name_standardized': 'string',
+    'phone_standardized': 'string',
+    'crm_city': 'string',
+    'signup_date': 'date',
+    'total_spend': 'float64',
+    'last_order_date': 'date',
+    'num_orders': 'int64',
+    'total_time_spent_seconds': 'float64',
+    'num_sessions': 'int64',
+    'web_events': 'int64',
+    'web_sessions': 'int64',
+    'web_active_days': 'int64',
+    'first_visit': 'date',
+    'last_visit': 'date',
+    'top_page': 'string',
+    'top_page_share': 'float64',
+    'is_vip': 'bool',
+    'days_since_last_order': 'int64',
+    'tenure_days': 'int64',
+    'avg_order_value': 'float64',
+    'spend_per_session': 'float64',
+    'avg_session_seconds': 'float64',
+    'recency_score': 'int64',
+    'frequency_score': 'int64',
+    'monetary_score': 'int64',
+    'rfm_score': 'int64',
+    'is_churn_risk': 'bool',
+    'is_web_only': 'bool',
+    'days_since_last_visit': 'int64',
+    'web_visit_frequency': 'float64',
+    'web_pages_per_session': 'float64',
+    'segment': 'string',
+}
+
 def save_dataframe(df, path):
     try:
-        df.to_csv(path, index=False)
+        # Same temporary-file-and-rename as save_columnar, so a watcher never reads a half-written CSV.
+        tmp_path = path + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        print(f"DataFrame saved to {path}")
+    except Exception as e:
+        print(f"Error saving DataFrame to {path}: {e}")
+
+def _arrow_type(pa, type_name):
+    return {
+        'string': pa.string(),
+        'date': pa.timestamp('ns'),
+        'float64': pa.float64(),
+        'int64': pa.int64(),
+        'bool': pa.bool_(),
+    }[type_name]
+
+def _coerce_column(series, type_name):
+    if type_name == 'string':
+        return series.astype('string')
+    if type_name == 'date':
+        return pd.to_datetime(series, errors='coerce')
+    if type_name == 'float64':
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    if type_name == 'int64':
+        return pd.to_numeric(series, errors='coerce').round().astype('Int64')
+    if type_name == 'bool':
+        return series.fillna(False).astype(bool)
+    raise ValueError(f"Unsupported schema type: {type_name}")
+
+def load_customer_360_csv(path, schema=CUSTOMER_360_SCHEMA):
+    # Text columns are read as text (E.164 phones, segment labels), and the rest are coerced to the types the
+    # Arrow output carries, so a CSV snapshot serves the same values as the columnar one.
+    df = pd.read_csv(path, dtype={col: 'str' for col, type_name in schema.items() if type_name == 'string'},
+                     float_precision='round_trip')
+    for col in df.columns:
+        if col in schema:
+            df[col] = _coerce_column(df[col], schema[col])
+    return df
+
+def to_arrow_table(df, schema=None):
+    import pyarrow as pa
+
+    if schema is None:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    columns = {}
+    fields = []
+    for col in df.columns:
+        if col in schema:
+            columns[col] = _coerce_column(df[col], schema[col])
+            fields.append(pa.field(col, _arrow_type(pa, schema[col])))
+        else:
+            columns[col] = df[col]
+            fields.append(pa.field(col, pa.Array.from_pandas(df[col]).type))
+    return pa.Table.from_pandas(pd.DataFrame(columns, index=df.index), schema=pa.schema(fields), preserve_index=False)
+
+def save_columnar(df, path, schema=None):
+    try:
+        import pyarrow.parquet as pq
+        from pyarrow import ipc
+
+        table = to_arrow_table(df, schema)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file and rename, so readers (dashboard, query API reload) never see a partial file.
+        tmp_path = path + ".tmp"
+        if path.endswith('.parquet'):
+            pq.write_table(table, tmp_path)
+        else:
+            # Uncompressed Arrow IPC files can be memory-mapped and read without copying.
+            with ipc.new_file(tmp_path, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
         print(f"DataFrame saved to {path}")
     except Exception as e:
-        print(f"Error saving DataFrame to {path}: {e}")
\ No newline at end of file
+        print(f"Error saving DataFrame to {path}: {e}")
+
+def load_columnar_table(path, columns=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import ipc
+
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.select(columns) if columns is not None else table
+
+def arrow_table_to_pandas(table):
+    import pyarrow as pa
+
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype(), pa.int64(): pd.Int64Dtype()}.get)
+
+def load_columnar(path, columns=None):
+    return arrow_table_to_pandas(load_columnar_table(path, columns))
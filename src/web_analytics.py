@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from src import config
+from src.instrumentation import instrument
+
+WEB_FEATURE_COLUMNS = ['web_events', 'web_sessions', 'web_active_days', 'first_visit', 'last_visit', 'top_page',
+                       'top_page_share']
+WEB_COUNT_COLUMNS = ['web_events', 'web_sessions', 'web_active_days']
+NANOSECONDS_PER_DAY = 86_400 * 10 ** 9
+
+def _as_of(as_of):
+    return pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+
+def in_window(timestamps, as_of=None, window_days=config.WEB_WINDOW_DAYS):
+    as_of = _as_of(as_of)
+    inside = timestamps <= as_of
+    if window_days:
+        inside &= timestamps > as_of - pd.Timedelta(days=window_days)
+    return inside
+
+def prepare_web_events(website_df, as_of=None, window_days=config.WEB_WINDOW_DAYS):
+    # Timestamps are parsed once here (or at load in memory-optimized mode); events after the as-of time or
+    # outside the window are dropped before anything is sorted.
+    timestamps = website_df['visit_timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, format='ISO8601', errors='coerce')
+    keep = website_df['user_email'].notna() & timestamps.notna() & in_window(timestamps, as_of, window_days)
+    pages = website_df['page_visited'] if 'page_visited' in website_df.columns else pd.Series(None, index=website_df.index)
+    return pd.DataFrame({
+        'email': website_df['user_email'][keep].astype('str'),
+        'visit_timestamp': timestamps[keep].astype('datetime64[ns]'),
+        'page_visited': pages[keep].astype('str'),
+    }).reset_index(drop=True)
+
+def _empty_features():
+    return pd.DataFrame({
+        'email': pd.Series(dtype='str'),
+        **{col: pd.Series(dtype='int64') for col in WEB_COUNT_COLUMNS},
+        'first_visit': pd.Series(dtype='datetime64[ns]'),
+        'last_visit': pd.Series(dtype='datetime64[ns]'),
+        'top_page': pd.Series(dtype='str'),
+        'top_page_share': pd.Series(dtype='float64'),
+    })
+
+def _top_pages(codes, page_codes, n_customers, n_pages):
+    # Page view counts per (customer, page) pair; pairs are hashed, not sorted, and ties go to the
+    # alphabetically first page because page codes come from a sorted factorize.
+    valid = page_codes >= 0
+    pair_codes, pairs = pd.factorize(codes[valid].astype('int64') * n_pages + page_codes[valid])
+    counts = np.bincount(pair_codes, minlength=len(pairs))
+    pair_customers, pair_pages = pairs // n_pages, pairs % n_pages
+    best = np.zeros(n_customers, dtype='int64')
+    np.maximum.at(best, pair_customers, counts)
+    is_best = counts == best[pair_customers]
+    top = np.full(n_customers, n_pages, dtype='int64')
+    np.minimum.at(top, pair_customers[is_best], pair_pages[is_best])
+    return np.where(top < n_pages, top, -1), best
+
+def session_features(events, gap_minutes=config.WEB_SESSION_GAP_MINUTES):
+    if events is None or events.empty:
+        return _empty_features()
+    email_codes, emails = pd.factorize(events['email'])
+    page_codes, pages = pd.factorize(events['page_visited'], sort=True)
+    timestamps = events['visit_timestamp'].to_numpy(dtype='datetime64[ns]').view('int64')
+
+    # The only sort over events: by email, then time. Every feature below is a segment reduction over it.
+    order = np.lexsort((timestamps, email_codes))
+    codes, timestamps, page_codes = email_codes[order], timestamps[order], page_codes[order]
+    n_events = len(codes)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], n_events] - 1
+    new_customer = np.zeros(n_events, dtype=bool)
+    new_customer[starts] = True
+    new_session = new_customer | (np.diff(timestamps, prepend=timestamps[0]) > gap_minutes * 60 * 10 ** 9)
+    days = timestamps // NANOSECONDS_PER_DAY
+    new_day = new_customer | (np.diff(days, prepend=days[0]) != 0)
+
+    web_events = np.diff(np.r_[starts, n_events])
+    top, top_count = _top_pages(codes, page_codes, len(starts), max(len(pages), 1))
+    return pd.DataFrame({
+        'email': emails[codes[starts]],
+        'web_events': web_events,
+        'web_sessions': np.add.reduceat(new_session, starts).astype('int64'),
+        'web_active_days': np.add.reduceat(new_day, starts).astype('int64'),
+        'first_visit': timestamps[starts].view('datetime64[ns]'),
+        'last_visit': timestamps[ends].view('datetime64[ns]'),
+        'top_page': pd.api.extensions.take(pd.Series(pages, dtype='str').array, top, allow_fill=True),
+        'top_page_share': top_count / web_events,
+    })
+
+@instrument
+def sessionize_web_logs(website_df, as_of=None, window_days=config.WEB_WINDOW_DAYS,
+                        gap_minutes=config.WEB_SESSION_GAP_MINUTES, verbose=True):
+    if website_df is None or website_df.empty:
+        if verbose:
+            print("Website data is empty or None. Skipping sessionization.")
+        return None
+    if not {'user_email', 'visit_timestamp'} <= set(website_df.columns):
+        print("Website data is missing emails/timestamps. Skipping sessionization.")
+        return None
+    if verbose:
+        window = f"last {window_days} days" if window_days else "all history"
+        print(f"\nSessionizing website events ({window}, {gap_minutes}-minute inactivity gap)...")
+    features = session_features(prepare_web_events(website_df, as_of, window_days), gap_minutes)
+    if verbose:
+        print(f"Built {int(features['web_sessions'].sum())} sessions for {len(features)} website visitors.")
+    return features
+
+def add_web_features(customer_360_df, web_features):
+    if customer_360_df is None or customer_360_df.empty or web_features is None:
+        return customer_360_df
+    positions = pd.Index(web_features['email']).get_indexer(customer_360_df['email'])
+    matched = positions >= 0
+    columns = {}
+    for col in WEB_FEATURE_COLUMNS:
+        if col in WEB_COUNT_COLUMNS:
+            # Customers without website events have zero visits rather than missing counts.
+            columns[col] = np.where(matched, web_features[col].to_numpy()[np.maximum(positions, 0)], 0)
+        else:
+            columns[col] = pd.api.extensions.take(web_features[col].array, positions, allow_fill=True)
+    columns['top_page_share'] = np.nan_to_num(columns['top_page_share'].astype('float64'))
+    return customer_360_df.assign(**columns)
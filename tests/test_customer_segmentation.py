@@ -0,0 +1,26 @@
+import os
+import numpy as np
+import pandas as pd
+from src import customer_segmentation
+
+def _customers(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    groups = rng.integers(0, 2, n)
+    return pd.DataFrame({
+        'total_spend': np.where(groups, 900.0, 50.0) + rng.normal(0, 5, n),
+        'num_orders': np.where(groups, 12, 1) + rng.integers(0, 2, n),
+        'web_sessions': np.where(groups, 30, 2) + rng.integers(0, 3, n),
+    })
+
+def test_refit_after_feature_list_change(tmp_path):
+    model_path = os.path.join(tmp_path, 'segment_model.json')
+    customers = _customers()
+    # A model saved before the feature list grew has the same k but fewer centroid dimensions.
+    features, data = customer_segmentation._segment_features(customers, ['total_spend', 'num_orders'])
+    customer_segmentation.save_segment_model(
+        customer_segmentation.fit_segment_model(data, features, n_clusters=2), model_path)
+
+    segmented = customer_segmentation.segment_customers_scalable(customers, n_clusters=2, model_path=model_path)
+    assert customer_segmentation.load_segment_model(model_path)['features'] == ['total_spend', 'num_orders',
+                                                                                 'web_sessions']
+    assert segmented['segment'].nunique() == 2
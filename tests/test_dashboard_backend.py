@@ -0,0 +1,39 @@
+import os
+import time
+import pandas as pd
+from src import dashboard_backend, utils
+
+def _write_run(tmp_path):
+    df = pd.DataFrame({'email': ['a@example.com', 'b@example.com'], 'master_customer_id': ['1', '2'],
+                       'total_spend': [10.0, 20.0], 'num_orders': [1, 2], 'segment': ['0', '1']})
+    paths = {name: os.path.join(tmp_path, file_name) for name, file_name in [
+        ('csv_path', 'out.csv'), ('table_path', 'out.arrow'), ('summary_path', 'summary.json'),
+        ('email_index_path', 'email_index.arrow'), ('segment_index_path', 'segment_index.arrow')]}
+    utils.save_dataframe(df, paths['csv_path'])
+    utils.save_columnar(df, paths['table_path'], schema=utils.CUSTOMER_360_SCHEMA)
+    dashboard_backend.write_dashboard_artifacts(df, paths['summary_path'], paths['email_index_path'],
+                                                paths['segment_index_path'])
+    return paths
+
+def _from_artifacts(paths):
+    return dashboard_backend.CustomerStore.from_artifacts(
+        paths['table_path'], paths['summary_path'], paths['email_index_path'], paths['segment_index_path'],
+        other_output_paths=(paths['csv_path'],))
+
+def _touch(path, offset):
+    stamp = time.time() + offset
+    os.utime(path, (stamp, stamp))
+
+def test_artifacts_from_the_latest_run_are_used(tmp_path):
+    store = _from_artifacts(_write_run(tmp_path))
+    assert store is not None and store.summary['row_count'] == 2
+
+def test_newer_csv_output_makes_artifacts_stale(tmp_path):
+    paths = _write_run(tmp_path)
+    _touch(paths['csv_path'], 10)
+    assert _from_artifacts(paths) is None
+
+def test_artifacts_older_than_the_table_are_stale(tmp_path):
+    paths = _write_run(tmp_path)
+    _touch(paths['table_path'], 10)
+    assert _from_artifacts(paths) is None
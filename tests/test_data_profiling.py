@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from src import data_profiling
+
+def _half_duplicated(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = pd.DataFrame({'id': rng.permutation(n), 'value': rng.random(n)})
+    return pd.concat([rows, rows], ignore_index=True)
+
+def _profile(df, sample_fraction):
+    return data_profiling.profile_chunks((df.iloc[start:start + 5000] for start in range(0, len(df), 5000)), 'test',
+                                         sample_fraction)
+
+def test_sampling_does_not_bias_duplicate_or_distinct_estimates():
+    df = _half_duplicated()
+    full, sampled = _profile(df, 1.0), _profile(df, 0.1)
+    assert full['duplicate_rate'] == sampled['duplicate_rate'] == 0.5
+    assert sampled['duplicate_rows_estimate'] == 20000
+    assert sampled['columns']['id']['distinct_estimate'] == full['columns']['id']['distinct_estimate']
+    assert abs(sampled['columns']['id']['distinct_estimate'] - 20000) < 20000 * 0.03
+    assert sampled['profiled_rows'] < len(df) // 5
+    assert abs(sampled['columns']['value']['quantiles']['p50'] - 0.5) < 0.05
@@ -0,0 +1,53 @@
+import os
+import pandas as pd
+from src import config, data_cleansing, entity_resolution
+
+GMAIL_VARIANTS = ['jane.doe@gmail.com', 'janedoe+promo@gmail.com', 'Jane.Doe@googlemail.com']
+
+def _keys(emails):
+    return data_cleansing.canonical_email_keys(emails).tolist()
+
+def test_gmail_dots_tags_and_alias_share_a_key():
+    assert _keys(GMAIL_VARIANTS) == ['janedoe@gmail.com'] * 3
+
+def test_plus_tags_are_dropped_only_for_listed_domains():
+    assert _keys(['sam+news@outlook.com', 'sam+news@hotmail.com', 'sam+news@example.com']) == \
+        ['sam@outlook.com', 'sam@hotmail.com', 'sam+news@example.com']
+
+def test_dots_are_kept_outside_gmail():
+    assert _keys(['j.doe@outlook.com', 'j.doe@example.com']) == ['j.doe@outlook.com', 'j.doe@example.com']
+
+def test_tag_only_local_part_is_kept():
+    assert _keys(['+news@gmail.com']) == ['+news@gmail.com']
+
+def test_email_statuses():
+    emails = pd.Series(['a@example.com', 'A.B@gmail.com', 'not-an-email', None, 'bob@localhost'])
+    result = data_cleansing.canonicalize_emails(emails, provider_rules=True)
+    assert result['email_status'].tolist() == ['valid', 'canonicalized', 'malformed', 'missing', 'invalid_domain']
+    assert result['email'].tolist()[:2] == ['a@example.com', 'a.b@gmail.com']
+    assert result['email_key'].tolist()[:2] == ['a@example.com', 'ab@gmail.com']
+
+def test_validation_does_not_canonicalize():
+    result = data_cleansing.validate_emails(pd.Series(['A.B@gmail.com']))
+    assert result['email'].tolist() == ['a.b@gmail.com']
+    assert result['email_status'].tolist() == ['valid']
+
+def test_canonicalization_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(config, 'EMAIL_CANONICALIZATION', False)
+    assert entity_resolution.email_cluster_labels(GMAIL_VARIANTS) is None
+
+def test_variants_share_a_master_id(tmp_path):
+    ecommerce = pd.DataFrame({'cust_email': [email.lower() for email in GMAIL_VARIANTS] + ['other@example.com']})
+    master = entity_resolution.create_master_customer_ids(None, ecommerce, None,
+                                                          registry_path=os.path.join(tmp_path, 'ids.sqlite'))
+    ids = dict(zip(master['email'], master['master_customer_id']))
+    assert len({ids[email.lower()] for email in GMAIL_VARIANTS}) == 1
+    assert ids['other@example.com'] != ids['jane.doe@gmail.com']
+
+def test_fuzzy_mode_merges_variants(tmp_path):
+    ecommerce = pd.DataFrame({'cust_email': [email.lower() for email in GMAIL_VARIANTS] + ['other@example.com']})
+    master = entity_resolution.create_fuzzy_master_customer_ids(None, ecommerce, None,
+                                                                registry_path=os.path.join(tmp_path, 'ids.sqlite'))
+    ids = dict(zip(master['email'], master['master_customer_id']))
+    assert len({ids[email.lower()] for email in GMAIL_VARIANTS}) == 1
+    assert ids['other@example.com'] != ids['jane.doe@gmail.com']
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from src import incremental, web_analytics
+
+def _orders(rows):
+    return pd.DataFrame(rows, columns=['order_id', 'cust_email', 'order_date', 'order_value'])
+
+BASE_ORDERS = [
+    (1, 'a@example.com', '2025-01-01', 25.0),
+    (2, 'b@example.com', '2025-01-02', 10.0),
+]
+
+def test_surplus_rows_counts_repeated_hashes():
+    assert incremental.surplus_rows([1, 2, 1, 3, 1], [1, 2]).tolist() == [False, False, True, True, True]
+    assert incremental.surplus_rows([3, 1, 3], [3, 3, 1]).tolist() == [False, False, False]
+    assert incremental.surplus_rows([4, 4], []).tolist() == [True, True]
+    assert incremental.surplus_rows([], [1]).tolist() == []
+
+def test_appended_copy_of_existing_row_is_new():
+    previous = _orders(BASE_ORDERS)
+    current = _orders(BASE_ORDERS + [BASE_ORDERS[0]])
+    delta, is_new, removed = incremental._split_delta(current, incremental.row_hashes(previous), 'ecommerce', {})
+    assert is_new.tolist() == [False, False, True]
+    assert removed == 0
+    assert delta['order_value'].tolist() == [25.0]
+
+def test_removed_duplicate_is_reported():
+    previous = _orders(BASE_ORDERS + [BASE_ORDERS[0]])
+    current = _orders(BASE_ORDERS)
+    delta, is_new, removed = incremental._split_delta(current, incremental.row_hashes(previous), 'ecommerce', {})
+    assert delta.empty
+    assert removed == 1
+
+def test_changed_row_is_new_and_removed():
+    previous = _orders(BASE_ORDERS)
+    current = _orders([BASE_ORDERS[0], (2, 'b@example.com', '2025-01-02', 12.0)])
+    delta, is_new, removed = incremental._split_delta(current, incremental.row_hashes(previous), 'ecommerce', {})
+    assert is_new.tolist() == [False, True]
+    assert removed == 1
+
+def test_unchanged_source_has_no_delta():
+    previous = _orders(BASE_ORDERS)
+    delta, is_new, removed = incremental._split_delta(previous.copy(), incremental.row_hashes(previous),
+                                                      'ecommerce', {})
+    assert not np.any(is_new)
+    assert removed == 0
+
+def _visits(rows):
+    return pd.DataFrame(rows, columns=['user_email', 'visit_timestamp', 'page_visited']).astype(
+        {'visit_timestamp': 'datetime64[ns]'})
+
+def _sorted_features(features):
+    return features.sort_values('email', ignore_index=True)
+
+BASE_VISITS = [
+    ('a@example.com', '2025-01-01 10:00', '/home'),
+    ('a@example.com', '2025-01-20 10:00', '/cart'),
+    ('b@example.com', '2025-01-05 09:00', '/home'),
+    ('c@example.com', '2025-02-01 12:00', '/about'),
+]
+
+def test_web_state_update_matches_full_sessionization():
+    previous_as_of, as_of = pd.Timestamp('2025-01-31'), pd.Timestamp('2025-02-10')
+    previous = _visits(BASE_VISITS)
+    state = incremental.web_state_from_cleaned(
+        previous, web_analytics.sessionize_web_logs(previous, previous_as_of, 30, verbose=False), previous_as_of, 30)
+    delta = _visits([('b@example.com', '2025-02-02 08:00', '/cart')])
+    updated = incremental.update_web_state(state, delta, as_of, 30)
+    expected = web_analytics.sessionize_web_logs(pd.concat([previous, delta], ignore_index=True), as_of, 30,
+                                                 verbose=False)
+    pd.testing.assert_frame_equal(_sorted_features(updated['features']), _sorted_features(expected))
+    assert updated['params']['as_of'] == str(as_of)
@@ -0,0 +1,41 @@
+import os
+import time
+import pandas as pd
+from src import config, query_api, utils
+
+def _customers():
+    return pd.DataFrame({
+        'email': ['a@example.com', 'b@example.com'],
+        'phone_standardized': ['+19843916088', None],
+        'num_orders': [1, 3],
+        'total_spend': [10.5, 99.99],
+        'is_vip': [False, True],
+        'segment': ['0', '1'],
+    })
+
+def test_csv_snapshot_matches_arrow_snapshot(tmp_path):
+    csv_path, arrow_path = os.path.join(tmp_path, 'out.csv'), os.path.join(tmp_path, 'out.arrow')
+    utils.save_dataframe(_customers(), csv_path)
+    utils.save_columnar(_customers(), arrow_path, schema=utils.CUSTOMER_360_SCHEMA)
+    from_csv = query_api.CustomerSnapshot.load(csv_path)
+    from_arrow = query_api.CustomerSnapshot.load(arrow_path)
+    assert from_csv.lookup_email('a@example.com') == from_arrow.lookup_email('a@example.com')
+    record = from_csv.lookup_email('a@example.com')[0]
+    assert record['phone_standardized'] == '+19843916088'
+    assert record['num_orders'] == 1 and isinstance(record['num_orders'], int)
+    assert record['segment'] == '0'
+    assert not os.path.exists(csv_path + '.tmp')
+
+def test_find_output_path_prefers_current_arrow(tmp_path, monkeypatch):
+    csv_path, arrow_path = os.path.join(tmp_path, 'out.csv'), os.path.join(tmp_path, 'out.arrow')
+    monkeypatch.setattr(config, 'OUTPUT_CSV_PATH', csv_path)
+    monkeypatch.setattr(config, 'OUTPUT_ARROW_PATH', arrow_path)
+    monkeypatch.setattr(config, 'OUTPUT_PARQUET_PATH', os.path.join(tmp_path, 'out.parquet'))
+    utils.save_dataframe(_customers(), csv_path)
+    utils.save_columnar(_customers(), arrow_path, schema=utils.CUSTOMER_360_SCHEMA)
+    now = time.time()
+    os.utime(csv_path, (now, now))
+    os.utime(arrow_path, (now, now))
+    assert query_api.find_output_path() == arrow_path
+    os.utime(csv_path, (now + 10, now + 10))
+    assert query_api.find_output_path() == csv_path
@@ -0,0 +1,17 @@
+import numpy as np
+from src import scheduler
+
+def _heavy():
+    return float(np.ones(20_000_000).sum())
+
+def _light(total):
+    return total + 1
+
+def test_stage_memory_is_measured_per_stage():
+    _, metrics = scheduler.run_stages([scheduler.Stage('heavy', _heavy), scheduler.Stage('light', _light, ['heavy'])],
+                                      workers=1)
+    if metrics['heavy']['peak_rss_delta_mb'] is None:  # RSS sampling needs /proc
+        return
+    # A later, lighter stage no longer repeats the heavy stage's process peak.
+    assert metrics['heavy']['peak_rss_delta_mb'] > 100
+    assert metrics['light']['peak_rss_delta_mb'] < 50
@@ -0,0 +1,72 @@
+import os
+import main
+from src import config, scheduler, stage_cache
+
+SOURCE_STAGES = {'load_crm', 'load_ecommerce', 'load_website', 'clean_crm', 'clean_ecommerce', 'clean_website',
+                 'profile_crm', 'profile_ecommerce', 'profile_website', 'sessionize'}
+RESOLUTION_DOWNSTREAM = {'resolve_entities', 'integrate', 'web_features', 'enrich', 'segment'}
+
+def _keys(as_of='2025-06-01'):
+    return scheduler.cache_keys(main.pipeline_stages(as_of), {})
+
+def _changed(before, after):
+    return {name for name in before if before[name] != after[name]}
+
+def test_keys_are_stable():
+    assert _keys() == _keys()
+
+def test_email_rules_invalidate_resolution_and_downstream(monkeypatch):
+    before = _keys()
+    monkeypatch.setattr(config, 'EMAIL_CANONICALIZATION', not config.EMAIL_CANONICALIZATION)
+    assert _changed(before, _keys()) == RESOLUTION_DOWNSTREAM
+
+def test_email_provider_lists_are_part_of_the_key(monkeypatch):
+    before = _keys()
+    monkeypatch.setattr(config, 'EMAIL_PLUS_TAG_DOMAINS', config.EMAIL_PLUS_TAG_DOMAINS + ('example.com',))
+    after_tags = _keys()
+    monkeypatch.setattr(config, 'EMAIL_DOMAIN_ALIASES', {**config.EMAIL_DOMAIN_ALIASES, 'example.org': 'example.com'})
+    after_aliases = _keys()
+    assert _changed(before, after_tags) == RESOLUTION_DOWNSTREAM
+    assert _changed(after_tags, after_aliases) == RESOLUTION_DOWNSTREAM
+
+def test_fuzzy_params_invalidate_resolution_and_downstream(monkeypatch):
+    before = _keys()
+    monkeypatch.setattr(config, 'FUZZY_MATCH_THRESHOLD', config.FUZZY_MATCH_THRESHOLD + 1)
+    assert _changed(before, _keys()) == RESOLUTION_DOWNSTREAM
+
+def test_as_of_invalidates_only_time_dependent_stages():
+    changed = _changed(_keys('2025-06-01'), _keys('2025-06-30'))
+    assert {'sessionize', 'enrich', 'segment'} <= changed
+    assert not changed & (SOURCE_STAGES - {'sessionize'}) and 'resolve_entities' not in changed
+
+def test_stage_key_includes_params(monkeypatch):
+    stage = scheduler.Stage('example', main.pipeline_stages, params=('FUZZY_MATCH_THRESHOLD',))
+    before = stage_cache.stage_key(stage, [])
+    monkeypatch.setattr(config, 'FUZZY_MATCH_THRESHOLD', config.FUZZY_MATCH_THRESHOLD + 1)
+    assert stage_cache.stage_key(stage, []) != before
+    assert stage_cache.stage_key(scheduler.Stage('example', main.pipeline_stages), []) != before
+
+def test_deleted_side_effect_file_forces_a_rerun(tmp_path):
+    model_path = os.path.join(tmp_path, 'model.json')
+    cache = stage_cache.StageCache(os.path.join(tmp_path, 'cache'))
+
+    def fit():
+        with open(model_path, 'w') as f:
+            f.write('{"k": 2}')
+        return 2
+
+    def assign(k):
+        return k + 1
+
+    stages = [scheduler.Stage('fit', fit, outputs=[model_path]), scheduler.Stage('assign', assign, ['fit'])]
+
+    def cached_stages():
+        _, metrics = scheduler.run_stages(stages, workers=1, cache=cache)
+        return {name for name, stage_metrics in metrics.items() if stage_metrics.get('cached')}
+
+    assert cached_stages() == set()
+    assert cached_stages() == {'fit', 'assign'}
+    os.remove(model_path)
+    assert cached_stages() == set()
+    assert os.path.exists(model_path)
+    assert cached_stages() == {'fit', 'assign'}
@@ -0,0 +1,34 @@
+import os
+import pandas as pd
+from src import config, data_cleansing, schema_mapping, streaming
+
+def _chunked(func, path):
+    # Many small chunks and a tiny compaction threshold exercise the partial-aggregate merges.
+    return func(path, chunksize=7, compact_rows=5)
+
+def test_streamed_aggregates_match_in_memory():
+    ecommerce = pd.read_csv(config.ECOMMERCE_DATA_PATH, dtype=streaming.ECOMMERCE_STREAM_DTYPES,
+                            usecols=list(streaming.ECOMMERCE_STREAM_DTYPES))
+    ecommerce['cust_email'] = data_cleansing.standardize_email(ecommerce['cust_email'])
+    expected = schema_mapping.aggregate_ecommerce(ecommerce)
+    streamed = _chunked(streaming.stream_ecommerce_aggregates, config.ECOMMERCE_DATA_PATH)
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-12)
+
+    website = pd.read_csv(config.WEBSITE_LOGS_PATH, dtype=streaming.WEBSITE_STREAM_DTYPES,
+                          usecols=list(streaming.WEBSITE_STREAM_DTYPES))
+    website['user_email'] = data_cleansing.standardize_email(website['user_email'])
+    expected = schema_mapping.aggregate_website(website)
+    streamed = _chunked(streaming.stream_website_aggregates, config.WEBSITE_LOGS_PATH)
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-12)
+
+def test_missing_column_is_skipped(tmp_path, capsys):
+    path = os.path.join(tmp_path, 'orders.csv')
+    pd.DataFrame({'order_id': ['1'], 'cust_email': ['a@example.com'], 'order_date': ['2025-01-01']}).to_csv(
+        path, index=False)
+    assert streaming.stream_ecommerce_aggregates(path) is None
+    assert "missing columns: ['order_value']" in capsys.readouterr().out
+
+    path = os.path.join(tmp_path, 'visits.csv')
+    pd.DataFrame({'user_email': ['a@example.com'], 'session_id': ['s1']}).to_csv(path, index=False)
+    assert streaming.stream_website_aggregates(path) is None
+    assert streaming.stream_web_features(path, work_dir=os.path.join(tmp_path, 'events')) is None